@@ -5,8 +5,20 @@
 __all__ = [
     # modules
     "lmfit_utils",
+    "multistart",
+    "batch",
+    "mcmc",
     # functions
     "scipy_residual_to_lmfit",
+    "multistart_minimize",
+    "batch_minimize",
+    "summarize_chain",
+    "report_mcmc_fit",
+    # classes
+    "MultiStartResult",
+    "OnlineQuantiles",
+    "ChainWriter",
+    "ChainReader",
 ]
 
 
@@ -14,8 +26,16 @@ __all__ = [
 # IMPORTS
 
 # PROJECT-SPECIFIC
-from . import lmfit_utils
-from .lmfit_utils import scipy_residual_to_lmfit
+from . import batch, lmfit_utils, mcmc, multistart
+from .batch import batch_minimize
+from .lmfit_utils import report_mcmc_fit, scipy_residual_to_lmfit
+from .mcmc import (
+    ChainReader,
+    ChainWriter,
+    OnlineQuantiles,
+    summarize_chain,
+)
+from .multistart import MultiStartResult, multistart_minimize
 
 # from .astropy_decorator import scipy_function_to_astropy_model
 
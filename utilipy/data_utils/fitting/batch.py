@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+
+"""Batch Fitting.
+
+`batch_minimize` fits the same `scipy_residual_to_lmfit` residual to many
+independent datasets, e.g. thousands of light curves. The datasets are sent
+to a process pool in chunks and the results are collected in a
+`~astropy.table.Table`, optionally streamed to a checkpoint file from which
+an interrupted batch can be resumed.
+
+"""
+
+__author__ = "Nathaniel Starkman"
+
+
+__all__ = [
+    "batch_minimize",
+]
+
+
+##############################################################################
+# IMPORTS
+
+# BUILT-IN
+import csv
+import itertools
+import os
+import time
+import typing as T
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# THIRD PARTY
+import numpy as np
+from astropy.io import ascii
+from astropy.table import Table
+
+# PROJECT-SPECIFIC
+from .lmfit_utils import (
+    _DFUN_METHODS,
+    HAS_LMFIT,
+    ParametersType,
+    scipy_residual_to_lmfit,
+)
+
+if HAS_LMFIT:
+    import lmfit
+
+##############################################################################
+# PARAMETERS
+
+# fit statistics in the results table, from the MinimizerResult
+_STAT_COLUMNS: T.Tuple[str, ...] = ("nfev", "chisqr", "redchi", "aic", "bic")
+
+# set in each worker process by `_init_worker`
+_worker_state: T.Optional[tuple] = None
+
+##############################################################################
+# CODE
+##############################################################################
+
+
+def _result_columns(param_order: T.Sequence[str]) -> T.List[str]:
+    """Columns of the results table.
+
+    Parameters
+    ----------
+    param_order : sequence of str
+
+    Returns
+    -------
+    list of str
+        "id", "success", the fit statistics, the value and "<name>_err"
+        standard error of each parameter, "time", and "message".
+
+    """
+    columns = ["id", "success", *_STAT_COLUMNS]
+    for name in param_order:
+        columns.extend((name, name + "_err"))
+    columns.extend(("time", "message"))
+    return columns
+
+
+# /def
+
+
+def _init_worker(
+    residual: scipy_residual_to_lmfit,
+    params: ParametersType,
+    args: tuple,
+    fit_kws: dict,
+) -> None:
+    """Store the residual, parameters, and fit options in a worker process.
+
+    These are the same for every dataset, so are sent once per worker, not
+    once per chunk.
+
+    """
+    global _worker_state
+    _worker_state = (residual, params, args, fit_kws)
+
+
+# /def
+
+
+def _fit_chunk(
+    chunk: T.Sequence[T.Tuple[T.Any, tuple]], state: T.Optional[tuple] = None
+) -> T.List[list]:
+    """Fit each dataset in a chunk.
+
+    Parameters
+    ----------
+    chunk : sequence of (id, dataset) tuples
+        `dataset` is the tuple of arguments into the residual function.
+    state : tuple or None, optional
+        (residual, params, args, fit_kws), where `args` are the shared
+        arguments after the dataset. If None, uses those stored in the
+        worker process by `_init_worker`.
+
+    Returns
+    -------
+    list of list
+        The rows of the results table.
+
+    """
+    residual, params, args, fit_kws = state or _worker_state
+    names = residual.param_order
+
+    rows = []
+    for id_, dataset in chunk:
+        tic = time.perf_counter()
+        try:
+            result = lmfit.minimize(
+                residual.lmfit, params, args=(*dataset, *args), **fit_kws
+            )
+        except Exception as e:  # a bad dataset shouldn't stop the batch
+            row = [id_, False, 0, *[np.nan] * (len(_STAT_COLUMNS) - 1)]
+            row.extend([np.nan] * (2 * len(names)))
+            row.extend((time.perf_counter() - tic, _one_line(repr(e))))
+        else:
+            row = [id_, bool(result.success)]
+            row.extend(getattr(result, k, np.nan) for k in _STAT_COLUMNS)
+            for name in names:
+                param = result.params[name]
+                stderr = param.stderr
+                row.extend((param.value, np.nan if stderr is None else stderr))
+            message = _one_line(result.message or "")
+            row.extend((time.perf_counter() - tic, message))
+        rows.append(row)
+
+    return rows
+
+
+# /def
+
+
+def _one_line(message: str) -> str:
+    """Join a multi-line message, for the CSV checkpoint."""
+    return " ".join(message.split())
+
+
+# /def
+
+
+def _read_checkpoint(checkpoint: str, int_ids: bool = False) -> Table:
+    """Read the results table from a checkpoint file.
+
+    Parameters
+    ----------
+    checkpoint : str
+        Path to the CSV checkpoint file.
+    int_ids : bool, optional
+        Whether the ids are int, e.g. positions, not str.
+
+    Returns
+    -------
+    `~astropy.table.Table`
+        The "id" (unless `int_ids`) and "message" columns are str, not
+        guessed, so ids like "001" are kept.
+
+    """
+    as_str = [ascii.convert_numpy(str)]
+    table = Table.read(
+        checkpoint,
+        format="ascii.csv",
+        converters={"id": as_str, "message": as_str},
+    )
+
+    # CSV does not keep the types
+    if table["success"].dtype.kind != "b":
+        table["success"] = table["success"] == "True"
+    if table.masked or hasattr(table["message"], "mask"):
+        table["message"] = table["message"].filled("")
+    if int_ids:
+        table["id"] = table["id"].astype(int)
+
+    return table
+
+
+# /def
+
+
+# -------------------------------------------------------------------
+
+
+def batch_minimize(
+    residual: scipy_residual_to_lmfit,
+    params: ParametersType,
+    datasets: T.Iterable[T.Any],
+    ids: T.Optional[T.Iterable[T.Any]] = None,
+    args: tuple = (),
+    kws: T.Optional[dict] = None,
+    method: str = "leastsq",
+    chunksize: int = 100,
+    max_workers: T.Optional[int] = None,
+    checkpoint: T.Optional[str] = None,
+    **fit_kws: T.Any,
+) -> Table:
+    """Fit a residual function to many independent datasets.
+
+    Parameters
+    ----------
+    residual : `scipy_residual_to_lmfit`
+        The residual function. It is sent to the worker processes, so must be
+        picklable, e.g. defined at the top level of a module.
+    params : `~lmfit.Parameters`
+        The starting parameters, the same for each dataset.
+        Must contain every name in ``residual.param_order``.
+    datasets : iterable
+        Each dataset is a tuple of positional arguments into the residual
+        function, e.g. ``(x, data, eps_data)``. Anything else is the sole
+        argument. The iterable is consumed lazily, one chunk at a time.
+    ids : iterable or None, optional
+        An identifier for each dataset, e.g. the name of the light curve.
+        If None (default), uses the position in `datasets`.
+    args : tuple, optional
+        Positional arguments into the residual function, after the dataset,
+        shared by all the datasets.
+    kws : dict or None, optional
+        Keyword arguments into the residual function.
+    method : str, optional
+        The `lmfit.minimize` method (default "leastsq").
+    chunksize : int, optional
+        The number of datasets sent to a worker process at once. Larger
+        chunks amortize the cost of pickling.
+    max_workers : int or None, optional
+        The number of worker processes. None (default) uses the number of
+        CPUs. With 1 the fits are run serially in this process.
+    checkpoint : str or None, optional
+        Path to a CSV file. The rows for each chunk are appended as the chunk
+        finishes. If the file exists, the datasets whose ids, as str, are in
+        it are skipped, resuming an interrupted batch.
+    **fit_kws
+        Keyword arguments into `lmfit.minimize`. If the residual is
+        ``vectorized``, ``Dfun`` defaults to its ``jacobian``.
+
+    Returns
+    -------
+    `~astropy.table.Table`
+        One row per dataset, in the order the fits finished, with columns
+        "id", "success", "nfev", "chisqr", "redchi", "aic", "bic", the value
+        and "<name>_err" standard error of each parameter, the "time" of the
+        fit in seconds, and the fit or exception "message".
+        If `checkpoint` is given, this includes the rows of earlier runs, and
+        the ids are read from it as str, unless `ids` is None.
+
+    Raises
+    ------
+    TypeError
+        If `residual` is not a `scipy_residual_to_lmfit`.
+    ValueError
+        If `chunksize` is not positive.
+
+    """
+    if not isinstance(residual, scipy_residual_to_lmfit):
+        raise TypeError("residual must be a scipy_residual_to_lmfit")
+    elif chunksize < 1:
+        raise ValueError("chunksize must be positive")
+
+    args = tuple(args)
+    fit_kws = dict(kws=kws, method=method, **fit_kws)
+    if residual.vectorized and method in _DFUN_METHODS:
+        fit_kws.setdefault("Dfun", residual.jacobian)
+    columns = _result_columns(residual.param_order)
+
+    # ----------------
+    # datasets
+
+    positional_ids = ids is None
+    if positional_ids:
+        ids = itertools.count()
+    pending = (
+        (id_, ds if isinstance(ds, tuple) else (ds,))
+        for id_, ds in zip(ids, datasets)
+    )
+
+    # resuming: skip the datasets already in the checkpoint
+    if checkpoint is not None and os.path.exists(checkpoint):
+        done = {str(id_) for id_ in _read_checkpoint(checkpoint)["id"]}
+        pending = (item for item in pending if str(item[0]) not in done)
+        new_file = False
+    else:
+        new_file = True
+
+    chunks = iter(lambda: list(itertools.islice(pending, chunksize)), [])
+
+    # ----------------
+    # fitting
+
+    rows: T.List[list] = []
+    stream = None
+    if checkpoint is not None:
+        stream = open(checkpoint, "a", newline="")
+        writer = csv.writer(stream)
+        if new_file:
+            writer.writerow(columns)
+
+    def collect(chunk_rows: T.List[list]) -> None:
+        rows.extend(chunk_rows)
+        if stream is not None:
+            writer.writerows(chunk_rows)
+            stream.flush()
+
+    try:
+        if max_workers == 1:
+            state = (residual, params, args, fit_kws)
+            for chunk in chunks:
+                collect(_fit_chunk(chunk, state=state))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(residual, params, args, fit_kws),
+            ) as executor:
+                # bound the chunks in flight, so `datasets` is read lazily
+                n_inflight = 2 * (max_workers or os.cpu_count() or 1)
+                futures = {
+                    executor.submit(_fit_chunk, chunk)
+                    for chunk in itertools.islice(chunks, n_inflight)
+                }
+                while futures:
+                    finished, futures = wait(
+                        futures, return_when=FIRST_COMPLETED
+                    )
+                    for future in finished:
+                        collect(future.result())
+                    for chunk in itertools.islice(chunks, len(finished)):
+                        futures.add(executor.submit(_fit_chunk, chunk))
+    finally:
+        if stream is not None:
+            stream.close()
+
+    # ----------------
+    # results table
+
+    if checkpoint is not None:
+        return _read_checkpoint(checkpoint, int_ids=positional_ids)
+    elif not rows:
+        return Table(names=columns)
+    return Table(rows=rows, names=columns)
+
+
+# /def
+
+
+##############################################################################
+# END
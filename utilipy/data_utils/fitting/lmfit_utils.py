@@ -14,12 +14,19 @@ compatible with lmfit
 # IMPORTS
 
 # BUILT-IN
+import sys
 import typing as T
+from collections import OrderedDict, namedtuple
+from operator import itemgetter
 
 # THIRD PARTY
 import numpy as np
+from astropy.table import Table
 from wrapt import ObjectProxy
 
+# PROJECT-SPECIFIC
+from .mcmc import SIGMA_PERCENTILES, summarize_chain
+
 try:
     import lmfit
 except ImportError:
@@ -35,6 +42,17 @@ if HAS_LMFIT:
 else:
     ParametersType = T.Any
 
+# relative step of the finite-difference Jacobian
+_FD_STEP: float = np.sqrt(np.finfo(np.float64).eps)
+
+# lmfit methods which accept a ``Dfun``. "least_squares" takes a ``jac``
+# instead, with a different signature, and passes on unknown keywords.
+_DFUN_METHODS: T.Tuple[str, ...] = ("leastsq",)
+
+CacheInfo: namedtuple = namedtuple(
+    "CacheInfo", ["hits", "misses", "maxsize", "currsize"]
+)
+
 ##############################################################################
 # CODE
 
@@ -50,6 +68,15 @@ class scipy_residual_to_lmfit(ObjectProxy):
         the variable order used by lmfit
         the strings are the names of the lmfit parameters
         must be in the same order as the scipy residual function
+    cache_size : int, optional
+        The number of residuals to keep in a least-recently-used cache,
+        keyed on the parameter values. 0 (default) disables the cache.
+        See Notes.
+    vectorized : bool, optional
+        Whether the residual function also accepts a 2-D array of parameter
+        values, shape (n_params, k), returning the k residuals stacked along
+        the first axis. If True, `jacobian` evaluates the finite-difference
+        Jacobian in one call. See Notes.
 
     Returns
     -------
@@ -62,6 +89,29 @@ class scipy_residual_to_lmfit(ObjectProxy):
     add a .lmfit function for use in lmfit minimizations
     see https://lmfit.github.io/lmfit-py/fitting.html
 
+    The parameter values are gathered into a preallocated float64 array,
+    which is reused between calls to ``.lmfit``. The residual function
+    should copy the array if it needs to keep the values.
+
+    Finite-difference Jacobians and line searches often re-evaluate the
+    residual at the same parameter values. With a `cache_size` these are
+    returned from the cache, not recomputed; the statistics are in
+    `cache_info`. The cache is cleared when the other arguments (e.g. the
+    data) are not the same objects as in the previous call. The cached
+    residuals are returned as-is, so should not be modified.
+
+    A `vectorized` residual can usually be written by adding a trailing axis
+    to the parameters, which then broadcast against the data:
+
+    >>> @scipy_residual_to_lmfit(param_order=["amp", "decay"], vectorized=True)
+    ... def residual(variables, x, data):
+    ...     amp, decay = np.asarray(variables)[..., None]
+    ...     return data - amp * np.exp(-x * decay)
+
+    and the Jacobian is passed to lmfit with
+    ``lmfit.minimize(residual.lmfit, params, args=(x, data),
+    Dfun=residual.jacobian)``.
+
     >>> @scipy_residual_to_lmfit(param_order=['amp', 'phase', 'freq', 'decay'])
     ... def residual(variables, x, data, eps_data):
     ...     amp, phase, freq, decay = variables
@@ -79,6 +129,8 @@ class scipy_residual_to_lmfit(ObjectProxy):
         cls,
         func: T.Callable = None,
         param_order: T.Optional[T.Sequence] = None,
+        cache_size: int = 0,
+        vectorized: bool = False,
     ):
         """Create Proxy."""
         if param_order is None:
@@ -91,42 +143,298 @@ class scipy_residual_to_lmfit(ObjectProxy):
 
         # allowing scipy_residual_to_lmfit to act as a decorator
         if func is None:
-            return self.decorator(param_order)
+            return self.decorator(
+                param_order, cache_size=cache_size, vectorized=vectorized
+            )
         return self
 
     # /def
 
     @classmethod
-    def decorator(cls, param_order: T.Sequence) -> T.Callable:
+    def decorator(
+        cls,
+        param_order: T.Sequence,
+        cache_size: int = 0,
+        vectorized: bool = False,
+    ) -> T.Callable:
         """Decorator."""
 
         # @functools.wraps(cls)  # not needed when using ObjectProxy
         def wrapper(func: T.Callable) -> T.Callable:
             """scipy_residual_to_lmfit wrapper."""
-            return cls(func, param_order=param_order)
+            return cls(
+                func,
+                param_order=param_order,
+                cache_size=cache_size,
+                vectorized=vectorized,
+            )
 
         # /def
         return wrapper
 
     # /def
 
-    def __init__(self, func: T.Callable, param_order: T.Sequence):
+    def __init__(
+        self,
+        func: T.Callable,
+        param_order: T.Sequence,
+        cache_size: int = 0,
+        vectorized: bool = False,
+    ):
         """Initialize Proxy."""
         super().__init__(func)  # initializing function into ObjectProxy
+
+        if cache_size < 0:
+            raise ValueError("cache_size must be non-negative")
+        self._self_cache_size = cache_size
+        self._self_cache = OrderedDict() if cache_size else None
+        self._self_cache_args = None  # (args, kwargs) of the cached calls
+        self._self_hits = self._self_misses = 0
+
         self.param_order = param_order
+
+        self._self_vectorized = bool(vectorized)
+
         return
 
     # /def
 
+    @property
+    def param_order(self) -> T.Tuple[str, ...]:
+        """Order of the lmfit parameters in the scipy residual.
+
+        Stored as a tuple. To change the order, assign a new sequence, which
+        also rebuilds `param_index` and clears the residual cache.
+
+        """
+        return self._self_param_order
+
+    @param_order.setter
+    def param_order(self, param_order: T.Sequence[str]):
+        param_order = tuple(param_order)
+        self._self_param_order = param_order
+        self._self_param_index = {n: i for i, n in enumerate(param_order)}
+        self._self_values = _make_values_getter(param_order)
+        self.cache_clear()  # the values are in a different order
+
+    # /def
+
+    @property
+    def param_index(self) -> T.Dict[str, int]:
+        """Position of each lmfit parameter in the scipy residual."""
+        return self._self_param_index
+
+    # /def
+
+    @property
+    def vectorized(self) -> bool:
+        """Whether the residual accepts a 2-D array of parameter values."""
+        return self._self_vectorized
+
+    # /def
+
+    def __reduce_ex__(self, protocol: int) -> T.Union[str, tuple]:
+        """Pickle, e.g. to send to a process pool.
+
+        A residual decorated at the top level of a module replaces the
+        function in the module, so it is pickled by reference. Otherwise the
+        function and `param_order` are pickled.
+
+        """
+        module = sys.modules.get(getattr(self, "__module__", None), None)
+        name = getattr(self, "__qualname__", "")
+        obj = module
+        for attr in name.split("."):
+            obj = getattr(obj, attr, None)
+        if obj is self:
+            return name
+
+        return (
+            type(self),
+            (
+                self.__wrapped__,
+                self._self_param_order,
+                self._self_cache_size,
+                self._self_vectorized,
+            ),
+        )
+
+    # /def
+
+    # ------------------------------
+    # Cache
+
+    def cache_info(self) -> "CacheInfo":
+        """Report the residual cache statistics.
+
+        Returns
+        -------
+        `CacheInfo`
+            Named tuple of the hits, misses, maxsize, and currsize, like
+            :func:`functools.lru_cache`.
+
+        """
+        cache = self._self_cache
+        return CacheInfo(
+            self._self_hits,
+            self._self_misses,
+            self._self_cache_size,
+            0 if cache is None else len(cache),
+        )
+
+    # /def
+
+    def cache_clear(self) -> None:
+        """Clear the residual cache and its statistics."""
+        if self._self_cache is not None:
+            self._self_cache.clear()
+        self._self_cache_args = None
+        self._self_hits = self._self_misses = 0
+
+    # /def
+
+    def _cached_call(
+        self, variables: T.Sequence, args: tuple, kwargs: dict
+    ) -> T.Sequence:
+        """Call the residual function, through the cache.
+
+        Parameters
+        ----------
+        variables : Sequence
+            The parameter values. The cache key is their shape and float64
+            bytes, so a point and a vectorized batch do not collide.
+        args : tuple
+        kwargs : dict
+            Arguments into ``__wrapped__``, the residual function. The cache
+            is cleared if these are not the same objects as in the last call.
+
+        Returns
+        -------
+        return_ : Any
+            Returns from called ``__wrapped__``, or the cache.
+
+        """
+        cache = self._self_cache
+        if not _same_arguments(self._self_cache_args, args, kwargs):
+            cache.clear()
+            self._self_cache_args = (args, kwargs)
+
+        values = np.asarray(variables, dtype=np.float64)
+        key = (values.shape, values.tobytes())
+        try:
+            return_ = cache[key]
+        except KeyError:
+            self._self_misses += 1
+            return_ = self.__wrapped__(variables, *args, **kwargs)
+            cache[key] = return_
+            if len(cache) > self._self_cache_size:
+                cache.popitem(last=False)  # least recently used
+        else:
+            self._self_hits += 1
+            cache.move_to_end(key)
+
+        return return_
+
+    # /def
+
     def lmfit(
         self, params: ParametersType, *args: T.Any, **kwargs: T.Any
     ) -> T.Sequence:
-        """`lmfit` version of function."""
-        variables = [params[n].value for n in self.param_order]
+        """`lmfit` version of function.
+
+        The parameter values are passed to the residual function in an array
+        which is reused, and overwritten, by the next call. The residual
+        function must copy it to keep the values, e.g. ``variables.copy()``.
+
+        Parameters
+        ----------
+        params : `~lmfit.Parameters`
+            Must contain every name in `param_order`.
+        *args : Any
+            Arguments into ``__wrapped__``, the residual function.
+        **kwargs : Any
+            Keyword arguments into ``__wrapped__``, the residual function.
+
+        Returns
+        -------
+        return_ : Any
+            Returns from called ``__wrapped__``.
+
+        """
+        variables = self._self_values(params)
+        if self._self_cache is not None:
+            return self._cached_call(variables, args, kwargs)
         return self.__wrapped__(variables, *args, **kwargs)
 
     # /def
 
+    def jacobian(
+        self, params: ParametersType, *args: T.Any, **kwargs: T.Any
+    ) -> np.ndarray:
+        """Finite-difference Jacobian of the residual, for lmfit's ``Dfun``.
+
+        The base and the perturbed parameter values are evaluated in a single
+        call of the `vectorized` residual function.
+
+        Parameters
+        ----------
+        params : `~lmfit.Parameters`
+            Must contain every name in `param_order`.
+        *args : Any
+            Arguments into ``__wrapped__``, the residual function.
+        **kwargs : Any
+            Keyword arguments into ``__wrapped__``, the residual function.
+
+        Returns
+        -------
+        jac : ndarray
+            Shape (n_data, n_varys), the forward-difference derivatives of
+            the (flattened) residual with respect to the varying parameters,
+            in the order of `params`.
+
+        Raises
+        ------
+        ValueError
+            If the residual is not `vectorized`.
+
+        """
+        if not self._self_vectorized:
+            raise ValueError("the residual is not vectorized")
+
+        var_names = [n for n, p in params.items() if p.vary]
+        index = self._self_param_index
+        values = self._self_values(params).copy()
+        constrained = any(params[n].expr is not None for n in index)
+
+        # column 0 is the base, column j + 1 perturbs varying parameter j
+        batch = np.repeat(values[:, None], len(var_names) + 1, axis=1)
+        steps = np.empty(len(var_names))
+        for j, name in enumerate(var_names):
+            param = params[name]
+            value = param.value
+            step = _FD_STEP * max(abs(value), 1.0)
+            if value + step > param.max:  # step away from the upper bound
+                step = -step
+            steps[j] = step
+
+            if constrained:  # propagate to the constrained parameters
+                param.value = value + step
+                params.update_constraints()
+                batch[:, j + 1] = self._self_values(params)
+                param.value = value
+            elif name in index:
+                batch[index[name], j + 1] += step
+
+        if constrained:
+            params.update_constraints()
+
+        residuals = np.asarray(self.__wrapped__(batch, *args, **kwargs))
+        residuals = residuals.reshape(len(var_names) + 1, -1)
+
+        return ((residuals[1:] - residuals[0]) / steps[:, None]).T
+
+    # /def
+
     def __call__(self, *args: T.Any, **kwargs: T.Any) -> T.Sequence:
         """Call scipy residual.
 
@@ -143,6 +451,8 @@ class scipy_residual_to_lmfit(ObjectProxy):
             Returns from called ``__wrapped__``.
 
         """
+        if self._self_cache is not None and args:
+            return self._cached_call(args[0], args[1:], kwargs)
         return self.__wrapped__(*args, **kwargs)
 
     # /def
@@ -154,12 +464,138 @@ class scipy_residual_to_lmfit(ObjectProxy):
 ##############################################################################
 
 
-def report_mcmc_fit(mcmc_res):
+def _same_arguments(
+    cached: T.Optional[T.Tuple[tuple, dict]], args: tuple, kwargs: dict
+) -> bool:
+    """Whether the arguments are the same objects as the cached arguments.
+
+    Parameters
+    ----------
+    cached : (tuple, dict) or None
+        The arguments of the cached calls, None if there are none.
+    args : tuple
+    kwargs : dict
+
+    Returns
+    -------
+    bool
+
+    """
+    if cached is None:
+        return False
+    cargs, ckwargs = cached
+    return (
+        len(cargs) == len(args)
+        and all(c is a for c, a in zip(cargs, args))
+        and ckwargs.keys() == kwargs.keys()
+        and all(ckwargs[k] is v for k, v in kwargs.items())
+    )
+
+
+# /def
+
+
+def _make_values_getter(
+    param_order: T.Sequence[str],
+) -> T.Callable[[ParametersType], np.ndarray]:
+    """Make a function to gather parameter values into a float64 array.
+
+    Parameters
+    ----------
+    param_order : sequence of str
+        The names of the parameters, in order.
+
+    Returns
+    -------
+    values : Callable
+        Takes `~lmfit.Parameters` and returns the values in `param_order`.
+        The same preallocated array is filled and returned on each call.
+
+    """
+    buffer = np.empty(len(param_order), dtype=np.float64)
+
+    # itemgetter returns a tuple only for 2+ names
+    if len(param_order) == 1:
+        (name,) = param_order
+
+        def getter(params):
+            return (params[name],)
+
+    else:
+        getter = itemgetter(*param_order)
+
+    def values(params: ParametersType) -> np.ndarray:
+        buffer[:] = [p.value for p in getter(params)]
+        return buffer
+
+    return values
+
+
+# /def
+
+
+##############################################################################
+
+
+def report_mcmc_fit(
+    mcmc_res,
+    chain: T.Optional[T.Union[np.ndarray, T.Iterable[np.ndarray]]] = None,
+    chunksize: T.Optional[int] = None,
+    verbose: bool = True,
+) -> Table:
     """Report output of MCMC fit.
 
     Code from https://lmfit.github.io/lmfit-py/fitting.html
 
+    Parameters
+    ----------
+    mcmc_res : `~lmfit.minimizer.MinimizerResult`
+        The result of an "emcee" minimization.
+    chain : array-like or iterable of array-like or None, optional
+        The samples to summarize, if not ``mcmc_res.flatchain``, e.g. chunks
+        read from disk. See `~utilipy.data_utils.fitting.summarize_chain`.
+    chunksize : int or None, optional
+        If given, the chain is summarized online, `chunksize` samples at
+        a time. See `~utilipy.data_utils.fitting.summarize_chain`.
+    verbose : bool, optional
+        Whether to print the report (default True).
+
+    Returns
+    -------
+    summary : `~astropy.table.Table`
+        The output of `~utilipy.data_utils.fitting.summarize_chain` for the
+        -2, -1, 0, 1, 2 sigma percentiles, with the columns "mle", the
+        maximum likelihood value (if ``mcmc_res`` has the chain), and
+        "value" and "stderr" of ``mcmc_res.params``.
+
     """
+    var_names = list(mcmc_res.var_names)
+    if chain is None:
+        chain = mcmc_res.flatchain
+
+    summary = summarize_chain(
+        chain,
+        names=var_names,
+        percentiles=SIGMA_PERCENTILES,
+        chunksize=chunksize,
+    )
+
+    # Max Likelihood
+    lnprob = getattr(mcmc_res, "lnprob", None)
+    if lnprob is not None:
+        hp_loc = np.unravel_index(np.argmax(lnprob), lnprob.shape)
+        summary["mle"] = np.asarray(mcmc_res.chain)[hp_loc]
+
+    # Median of distribution, from lmfit
+    params = [mcmc_res.params[name] for name in var_names]
+    summary["value"] = [p.value for p in params]
+    summary["stderr"] = [
+        np.nan if p.stderr is None else p.stderr for p in params
+    ]
+
+    if not verbose:
+        return summary
+
     # -----------------------
     # Median of distribution
 
@@ -167,31 +603,17 @@ def report_mcmc_fit(mcmc_res):
     print("--------------------------------------------")
     lmfit.report_fit(mcmc_res.params)
 
-    p = mcmc_res.params.copy()
-
-    highest_prob = np.argmax(mcmc_res.lnprob)
-    hp_loc = np.unravel_index(highest_prob, mcmc_res.lnprob.shape)
-    mle_soln = mcmc_res.chain[hp_loc]
-    for i, par in enumerate(p):
-        p[par].value = mle_soln[i]
-
     # -----------------------
     # Max Likelihood
 
-    print("\nMaximum Likelihood Estimation from emcee       ")
-    print("-------------------------------------------------")
-    print("Parameter  MLE Value   Median Value   Uncertainty")
-
-    fmt = "  {:5s}  {:11.5f} {:11.5f}   {:11.5f}".format
-    for name, param in p.items():
-        print(
-            fmt(
-                name,
-                param.value,
-                mcmc_res.params[name].value,
-                mcmc_res.params[name].stderr,
-            )
-        )
+    if "mle" in summary.colnames:
+        print("\nMaximum Likelihood Estimation from emcee       ")
+        print("-------------------------------------------------")
+        print("Parameter  MLE Value   Median Value   Uncertainty")
+
+        fmt = "  {:5s}  {:11.5f} {:11.5f}   {:11.5f}".format
+        for row in summary:
+            print(fmt(row["name"], row["mle"], row["value"], row["stderr"]))
 
     # -----------------------
     # Error Estimate
@@ -200,21 +622,15 @@ def report_mcmc_fit(mcmc_res):
     print("------------------------------------------------------")
     print("Parameter  -2sigma  -1sigma   median  +1sigma  +2sigma ")
 
-    for name in p.keys():
-        quantiles = np.percentile(
-            mcmc_res.flatchain[name], [2.275, 15.865, 50, 84.135, 97.275]
-        )
-        median = quantiles[2]
-        err_m2 = quantiles[0] - median
-        err_m1 = quantiles[1] - median
-        err_p1 = quantiles[3] - median
-        err_p2 = quantiles[4] - median
-        fmt = "  {:5s}   {:8.4f} {:8.4f} {:8.4f} {:8.4f} {:8.4f}".format
-        print(fmt(name, err_m2, err_m1, median, err_p1, err_p2))
+    fmt = "  {:5s}   {:8.4f} {:8.4f} {:8.4f} {:8.4f} {:8.4f}".format
+    for row in summary:
+        median = row["median"]
+        err_m2, err_m1, _, err_p1, err_p2 = row["percentiles"] - median
+        print(fmt(row["name"], err_m2, err_m1, median, err_p1, err_p2))
 
     # /for
 
-    return
+    return summary
 
 
 # /def
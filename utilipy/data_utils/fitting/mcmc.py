@@ -0,0 +1,718 @@
+# -*- coding: utf-8 -*-
+
+"""MCMC Chains.
+
+`summarize_chain` computes the mean, standard deviation, and percentiles of
+each parameter of an MCMC chain. All the parameters are summarized in one
+vectorized call or, for chains too large for memory, online over chunks with
+`OnlineQuantiles`.
+
+Long chains can be stored on disk while sampling, with `ChainWriter`, and
+read back as memory-mapped arrays, with `ChainReader`.
+
+"""
+
+__author__ = "Nathaniel Starkman"
+
+
+__all__ = [
+    "summarize_chain",
+    "OnlineQuantiles",
+    "ChainWriter",
+    "ChainReader",
+    "SIGMA_PERCENTILES",
+]
+
+
+##############################################################################
+# IMPORTS
+
+# BUILT-IN
+import json
+import os
+import struct
+import typing as T
+
+# THIRD PARTY
+import numpy as np
+from astropy.table import Table
+
+##############################################################################
+# PARAMETERS
+
+# percentiles of -2, -1, 0, +1, +2 sigma of a normal distribution
+SIGMA_PERCENTILES: T.Tuple[float, ...] = (2.275, 15.865, 50, 84.135, 97.725)
+
+# size of the .npy headers written by `ChainWriter`. The header is rewritten
+# in place as the chain grows, so it is padded to have room for any shape.
+_NPY_HEADER_SIZE: int = 128
+
+##############################################################################
+# CODE
+##############################################################################
+
+
+class OnlineQuantiles:
+    """Online estimator of the quantiles of each parameter of a chain.
+
+    The samples are binned into a histogram per parameter, which is widened
+    (merging pairs of bins) whenever a chunk falls outside its range, so the
+    memory is fixed however many samples are added. The quantiles are
+    interpolated from the histogram, with an error of at most one current
+    `bin_width`. This starts at about the range of the first chunk / `bins`
+    and doubles with each widening, so if the range grows, e.g. by a late
+    outlier, the quantiles are coarser than the final range of the samples
+    / `bins` suggests. The count, mean, standard deviation, minimum, and
+    maximum are exact.
+
+    Parameters
+    ----------
+    n_params : int
+        The number of parameters, i.e. columns of each chunk.
+    bins : int, optional
+        The number of histogram bins per parameter (default 4096). Must be
+        even, so that pairs of bins can be merged.
+
+    Raises
+    ------
+    ValueError
+        If `bins` is not even and positive.
+
+    Examples
+    --------
+    >>> oq = OnlineQuantiles(2)
+    >>> for chunk in np.array_split(np.random.normal(size=(10000, 2)), 10):
+    ...     oq.update(chunk)
+    >>> oq.count
+    10000
+
+    """
+
+    def __init__(self, n_params: int, bins: int = 4096):
+        if bins < 2 or bins % 2:
+            raise ValueError("bins must be even and positive")
+
+        self.n_params = n_params
+        self.bins = bins
+
+        self.count: int = 0
+        self._mean = np.zeros(n_params)
+        self._m2 = np.zeros(n_params)  # sum of squared deviations
+        self.min = np.full(n_params, np.inf)
+        self.max = np.full(n_params, -np.inf)
+
+        self._hist = np.zeros((n_params, bins), dtype=np.int64)
+        self._lo = np.zeros(n_params)
+        self._width = np.zeros(n_params)  # of the bins. 0 if not set
+
+    # /def
+
+    @property
+    def mean(self) -> np.ndarray:
+        """Mean of each parameter."""
+        return self._mean.copy()
+
+    # /def
+
+    @property
+    def std(self) -> np.ndarray:
+        """Standard deviation of each parameter."""
+        return np.sqrt(self._m2 / max(self.count, 1))
+
+    # /def
+
+    @property
+    def bin_width(self) -> np.ndarray:
+        """Current histogram bin width of each parameter. 0 if no samples.
+
+        This bounds the error of the `quantiles`.
+
+        """
+        return self._width.copy()
+
+    # /def
+
+    def update(self, chunk: np.ndarray) -> None:
+        """Add a chunk of samples.
+
+        Parameters
+        ----------
+        chunk : array-like
+            Shape (n_samples, `n_params`). Non-finite samples are not
+            supported.
+
+        Raises
+        ------
+        ValueError
+            If `chunk` does not have `n_params` columns.
+
+        """
+        chunk = np.asarray(chunk, dtype=np.float64).reshape(-1, self.n_params)
+        n = len(chunk)
+        if n == 0:
+            return
+
+        # moments, merged with Chan et al.'s parallel algorithm
+        mean = chunk.mean(axis=0)
+        m2 = ((chunk - mean) ** 2).sum(axis=0)
+        total = self.count + n
+        delta = mean - self._mean
+        self._mean += delta * (n / total)
+        self._m2 += m2 + delta**2 * (self.count * n / total)
+        self.count = total
+
+        cmin, cmax = chunk.min(axis=0), chunk.max(axis=0)
+        np.minimum(self.min, cmin, out=self.min)
+        np.maximum(self.max, cmax, out=self.max)
+
+        # histogram range
+        for j in np.nonzero(self._width == 0)[0]:  # first samples
+            span = cmax[j] - cmin[j]
+            pad = 0.05 * span if span > 0 else max(abs(cmin[j]), 1.0)
+            self._lo[j] = cmin[j] - pad
+            self._width[j] = (span + 2 * pad) / self.bins
+        hi = self._lo + self._width * self.bins
+        for j in np.nonzero((cmin < self._lo) | (cmax >= hi))[0]:
+            self._widen(j, cmin[j], cmax[j])
+
+        # bin all the parameters at once, offsetting each parameter's bins
+        idx = ((chunk - self._lo) / self._width).astype(np.int64)
+        np.clip(idx, 0, self.bins - 1, out=idx)
+        idx += np.arange(self.n_params) * self.bins
+        self._hist += np.bincount(
+            idx.ravel(), minlength=self._hist.size
+        ).reshape(self._hist.shape)
+
+    # /def
+
+    def _widen(self, j: int, lo: float, hi: float) -> None:
+        """Double the range of histogram `j` until it includes [lo, hi]."""
+        hist = self._hist[j]
+        half = self.bins // 2
+        while (
+            lo < self._lo[j] or hi >= self._lo[j] + self._width[j] * self.bins
+        ):
+            merged = hist[0::2] + hist[1::2]
+            hist[:] = 0
+            if lo < self._lo[j]:  # extend down, keeping the upper edge
+                hist[half:] = merged
+                self._lo[j] -= self._width[j] * self.bins
+            else:  # extend up, keeping the lower edge
+                hist[:half] = merged
+            self._width[j] *= 2
+
+    # /def
+
+    def quantiles(self, q: T.Union[float, T.Sequence[float]]) -> np.ndarray:
+        """Estimate quantiles of each parameter.
+
+        Parameters
+        ----------
+        q : float or sequence of floats
+            In [0, 1].
+
+        Returns
+        -------
+        ndarray
+            Shape (len(q), `n_params`), or (`n_params`,) for scalar `q`.
+
+        Raises
+        ------
+        ValueError
+            If there are no samples.
+
+        """
+        if self.count == 0:
+            raise ValueError("no samples")
+
+        q = np.asarray(q, dtype=np.float64)
+        targets = np.atleast_1d(q) * self.count
+
+        out = np.empty((len(targets), self.n_params))
+        cdf = np.cumsum(self._hist, axis=1)
+        for j in range(self.n_params):
+            # interpolate the bin edges against the cumulative counts
+            edges = self._lo[j] + self._width[j] * np.arange(self.bins + 1)
+            counts = np.concatenate(([0], cdf[j]))
+            out[:, j] = np.interp(targets, counts, edges)
+
+        np.clip(out, self.min, self.max, out=out)
+        return out[0] if q.ndim == 0 else out
+
+    # /def
+
+
+# /class
+
+
+# -------------------------------------------------------------------
+
+
+def summarize_chain(
+    chain: T.Union[np.ndarray, T.Iterable[np.ndarray]],
+    names: T.Optional[T.Sequence[str]] = None,
+    percentiles: T.Sequence[float] = SIGMA_PERCENTILES,
+    chunksize: T.Optional[int] = None,
+    bins: int = 4096,
+) -> Table:
+    """Summarize each parameter of an MCMC chain.
+
+    Parameters
+    ----------
+    chain : array-like or iterable of array-like
+        The samples. Either an array, the last axis of which is the
+        parameters, e.g. a ``flatchain`` or a memory-mapped file, or an
+        iterable of such arrays (chunks), e.g. read from disk.
+    names : sequence of str or None, optional
+        The parameter names. If None, uses the columns of a
+        `~pandas.DataFrame` `chain`, otherwise "p0", "p1", ...
+    percentiles : sequence of float, optional
+        In [0, 100]. The default is the -2, -1, 0, 1, 2 sigma percentiles.
+    chunksize : int or None, optional
+        If given, an array `chain` is summarized online, `chunksize` samples
+        at a time, instead of all at once.
+    bins : int, optional
+        The number of histogram bins of the online estimator.
+        See `OnlineQuantiles`.
+
+    Returns
+    -------
+    `~astropy.table.Table`
+        One row per parameter, with columns "name", "mean", "std", "median",
+        and "percentiles", shape (n_params, len(`percentiles`)). The
+        percentiles are also in ``meta["percentiles"]``, and
+        ``meta["exact"]`` is whether they were computed exactly, or
+        estimated online.
+
+    """
+    percentiles = np.asarray(percentiles, dtype=np.float64)
+
+    if names is None and hasattr(chain, "columns"):  # DataFrame
+        names = list(chain.columns)
+    if hasattr(chain, "to_numpy"):
+        chain = chain.to_numpy()
+
+    exact = isinstance(chain, np.ndarray) and chunksize is None
+    if exact:  # all the parameters, in one call
+        n_params = chain.shape[-1]
+        flat = chain.reshape(-1, n_params)
+        pct = np.percentile(flat, np.append(percentiles, 50), axis=0).T
+        mean, std = flat.mean(axis=0), flat.std(axis=0)
+    else:
+        if not isinstance(chain, np.ndarray):
+            chunks = iter(chain)
+        elif chain.ndim <= 2:
+            flat = chain.reshape(-1, chain.shape[-1])
+            chunks = (
+                flat[i : i + chunksize] for i in range(0, len(flat), chunksize)
+            )
+        else:  # chunk over the steps, so (memory-mapped) views aren't copied
+            steps = max(1, chunksize // int(np.prod(chain.shape[1:-1])))
+            chunks = (
+                chain[i : i + steps].reshape(-1, chain.shape[-1])
+                for i in range(0, len(chain), steps)
+            )
+
+        oq = None
+        for chunk in chunks:
+            chunk = np.asarray(chunk)
+            if oq is None:
+                n_params = chunk.shape[-1]
+                oq = OnlineQuantiles(n_params, bins=bins)
+            oq.update(chunk)
+        if oq is None:
+            raise ValueError("the chain is empty")
+
+        q = np.append(percentiles, 50) / 100
+        pct = oq.quantiles(q).T
+        mean, std = oq.mean, oq.std
+
+    if names is None:
+        names = [f"p{i}" for i in range(n_params)]
+
+    summary = Table(
+        [list(names), mean, std, pct[:, -1], pct[:, :-1]],
+        names=["name", "mean", "std", "median", "percentiles"],
+        meta={"percentiles": percentiles.tolist(), "exact": exact},
+    )
+    return summary
+
+
+# /def
+
+
+##############################################################################
+
+
+def _write_npy_header(fh: T.BinaryIO, dtype: np.dtype, shape: tuple) -> None:
+    """Write a fixed-size ``.npy`` (version 1.0) header at the file start.
+
+    Parameters
+    ----------
+    fh : file
+        Opened for binary writing.
+    dtype : `~numpy.dtype`
+    shape : tuple
+
+    Raises
+    ------
+    ValueError
+        If the header does not fit in ``_NPY_HEADER_SIZE`` bytes.
+
+    """
+    header = repr(
+        {
+            "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+            "fortran_order": False,
+            "shape": tuple(shape),
+        }
+    )
+    # magic string, version, and header length take 10 bytes
+    header = header.ljust(_NPY_HEADER_SIZE - 11) + "\n"
+    if len(header) + 10 > _NPY_HEADER_SIZE:  # would overwrite the data
+        raise ValueError(
+            f"the .npy header of {np.dtype(dtype)} {shape} does not fit in "
+            f"{_NPY_HEADER_SIZE} bytes"
+        )
+    fh.seek(0)
+    fh.write(np.lib.format.magic(1, 0))
+    fh.write(struct.pack("<H", len(header)))  # little-endian, as required
+    fh.write(header.encode("latin1"))
+
+
+# /def
+
+
+class ChainWriter:
+    """Append MCMC samples to files on disk, in blocks.
+
+    The samples are buffered in memory, `block_size` steps at a time, then
+    appended to "chain.npy" (and the log-probabilities to "lnprob.npy") in
+    the directory `path`. These are standard ``.npy`` files, the headers of
+    which are updated after each block, so they can be read with
+    `ChainReader` or :func:`numpy.load` while sampling continues.
+
+    Parameters
+    ----------
+    path : str
+        The directory of the chain. It is created if it doesn't exist.
+    n_walkers : int
+    n_params : int
+    names : sequence of str or None, optional
+        The parameter names, stored with the chain.
+    block_size : int, optional
+        The number of steps buffered before writing (default 100).
+    mode : {"w", "a"}, optional
+        "w" (default) starts a new chain, overwriting any existing one.
+        "a" appends to an existing chain, e.g. to resume a run.
+
+    Raises
+    ------
+    ValueError
+        If `mode` is "a" and the existing chain has a different number of
+        walkers or parameters.
+
+    Examples
+    --------
+    With an `emcee <https://emcee.readthedocs.io>`_ sampler:
+
+    >>> with ChainWriter("run1", nwalkers, ndim) as writer:
+    ...     for state in sampler.sample(p0, iterations=10**6):
+    ...         writer.append(state.coords, state.log_prob)
+    ... # doctest: +SKIP
+
+    """
+
+    def __init__(
+        self,
+        path: str,
+        n_walkers: int,
+        n_params: int,
+        names: T.Optional[T.Sequence[str]] = None,
+        block_size: int = 100,
+        mode: str = "w",
+    ):
+        if mode not in ("w", "a"):
+            raise ValueError("mode must be 'w' or 'a'")
+
+        self.path = path
+        self.n_walkers = n_walkers
+        self.n_params = n_params
+        self.block_size = block_size
+
+        os.makedirs(path, exist_ok=True)
+        meta_file = os.path.join(path, "meta.json")
+        if mode == "a" and os.path.exists(meta_file):
+            with open(meta_file, "r") as f:
+                meta = json.load(f)
+            if (meta["n_walkers"], meta["n_params"]) != (n_walkers, n_params):
+                raise ValueError(
+                    "the chain has a different number of walkers or params"
+                )
+            self.names = meta["names"]
+            self.n_steps = meta["n_steps"]
+            has_lnprob = meta["has_lnprob"]
+        else:
+            mode = "w"
+            self.names = None if names is None else list(names)
+            self.n_steps = 0
+            has_lnprob = None  # not yet known
+
+        self._files: T.Dict[str, T.BinaryIO] = {}
+        self._open("chain", (n_walkers, n_params), mode)
+        if has_lnprob:
+            self._open("lnprob", (n_walkers,), mode)
+        self._has_lnprob = has_lnprob
+
+        self._buffer = np.empty((block_size, n_walkers, n_params))
+        self._lnprob_buffer = np.empty((block_size, n_walkers))
+        self._n_buffered = 0
+
+        self._write_meta()
+
+    # /def
+
+    def _open(self, name: str, shape: tuple, mode: str) -> None:
+        """Open a ``.npy`` file of the chain, for appending."""
+        fname = os.path.join(self.path, name + ".npy")
+        if mode == "a":
+            fh = open(fname, "r+b")
+            # drop anything written after the last complete block
+            fh.truncate(
+                _NPY_HEADER_SIZE + self.n_steps * int(np.prod(shape)) * 8
+            )
+            _write_npy_header(fh, np.float64, (self.n_steps, *shape))
+        else:
+            fh = open(fname, "w+b")
+            _write_npy_header(fh, np.float64, (0, *shape))
+        self._files[name] = fh
+
+    # /def
+
+    def _write_meta(self) -> None:
+        """Write the metadata, e.g. number of steps and parameter names."""
+        meta = dict(
+            n_steps=self.n_steps,
+            n_walkers=self.n_walkers,
+            n_params=self.n_params,
+            names=self.names,
+            has_lnprob=self._has_lnprob,  # None if not yet known
+        )
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+    # /def
+
+    def append(
+        self, samples: np.ndarray, lnprob: T.Optional[np.ndarray] = None
+    ) -> None:
+        """Append steps to the chain.
+
+        Parameters
+        ----------
+        samples : array-like
+            Shape (n_walkers, n_params) for one step,
+            or (n_steps, n_walkers, n_params).
+        lnprob : array-like or None, optional
+            The log-probabilities, shape (n_walkers,) or (n_steps, n_walkers).
+            Must be given for all or none of the steps.
+
+        Raises
+        ------
+        ValueError
+            If `lnprob` is given for some steps, but not others.
+
+        """
+        samples = np.asarray(samples, dtype=np.float64)
+        samples = samples.reshape(-1, self.n_walkers, self.n_params)
+
+        if self._has_lnprob is None:  # first call
+            self._has_lnprob = lnprob is not None
+            if self._has_lnprob:
+                self._open("lnprob", (self.n_walkers,), "w")
+        elif self._has_lnprob != (lnprob is not None):
+            raise ValueError("lnprob must be given for all or no steps")
+        if lnprob is not None:
+            lnprob = np.asarray(lnprob, dtype=np.float64)
+            lnprob = lnprob.reshape(-1, self.n_walkers)
+
+        # fill the buffer, writing each time it is full
+        start = 0
+        while start < len(samples):
+            n = min(self.block_size - self._n_buffered, len(samples) - start)
+            i = self._n_buffered
+            self._buffer[i : i + n] = samples[start : start + n]
+            if lnprob is not None:
+                self._lnprob_buffer[i : i + n] = lnprob[start : start + n]
+            self._n_buffered += n
+            start += n
+            if self._n_buffered == self.block_size:
+                self.flush()
+
+    # /def
+
+    def flush(self) -> None:
+        """Write the buffered steps to disk."""
+        n = self._n_buffered
+        buffers = {"chain": self._buffer, "lnprob": self._lnprob_buffer}
+        for name, fh in self._files.items():
+            # append the data, then update the header to include it
+            fh.seek(0, os.SEEK_END)
+            fh.write(buffers[name][:n].tobytes())
+            shape = (self.n_steps + n, *buffers[name].shape[1:])
+            _write_npy_header(fh, np.float64, shape)
+            fh.flush()
+
+        self.n_steps += n
+        self._n_buffered = 0
+        self._write_meta()
+
+    # /def
+
+    def close(self) -> None:
+        """Flush and close the files."""
+        if not self._files:
+            return
+        self.flush()
+        for fh in self._files.values():
+            fh.close()
+        self._files = {}
+
+    # /def
+
+    def __enter__(self) -> "ChainWriter":
+        """Enter context, returning the writer."""
+        return self
+
+    # /def
+
+    def __exit__(self, *exc: T.Any) -> None:
+        """Exit context, closing the writer."""
+        self.close()
+
+    # /def
+
+
+# /class
+
+
+# -------------------------------------------------------------------
+
+
+class ChainReader:
+    """Read an MCMC chain written by `ChainWriter`, as memory-mapped arrays.
+
+    Burn-in and thinning are applied lazily, as views of the memory-mapped
+    files, so no samples are read until they are used.
+
+    Parameters
+    ----------
+    path : str
+        The directory of the chain.
+    burn : int, optional
+        The number of initial steps to discard (default 0).
+    thin : int, optional
+        Keep every `thin` step (default 1).
+
+    Examples
+    --------
+    >>> reader = ChainReader("run1", burn=1000, thin=10)  # doctest: +SKIP
+    >>> summary = reader.summarize()  # doctest: +SKIP
+
+    """
+
+    def __init__(self, path: str, burn: int = 0, thin: int = 1):
+        if burn < 0 or thin < 1:
+            raise ValueError("burn must be >= 0 and thin >= 1")
+
+        self.path = path
+        self.burn = burn
+        self.thin = thin
+
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            meta = json.load(f)
+        self.n_walkers: int = meta["n_walkers"]
+        self.n_params: int = meta["n_params"]
+        self.names: T.List[str] = meta["names"] or [
+            f"p{i}" for i in range(self.n_params)
+        ]
+        self._has_lnprob: bool = bool(meta["has_lnprob"])
+
+    # /def
+
+    def _load(self, name: str) -> np.ndarray:
+        """Memory-map a ``.npy`` file of the chain, with burn and thin."""
+        fname = os.path.join(self.path, name + ".npy")
+        return np.load(fname, mmap_mode="r")[self.burn :: self.thin]
+
+    # /def
+
+    @property
+    def chain(self) -> np.ndarray:
+        """The samples, shape (n_steps, n_walkers, n_params)."""
+        return self._load("chain")
+
+    # /def
+
+    @property
+    def lnprob(self) -> T.Optional[np.ndarray]:
+        """The log-probabilities, shape (n_steps, n_walkers), if written."""
+        return self._load("lnprob") if self._has_lnprob else None
+
+    # /def
+
+    def __len__(self) -> int:
+        """The number of steps, after burn-in and thinning."""
+        return len(self.chain)
+
+    # /def
+
+    def iter_flatchain(self, chunksize: int = 10**6) -> T.Iterator[np.ndarray]:
+        """Iterate over the flattened chain, in chunks.
+
+        Parameters
+        ----------
+        chunksize : int, optional
+            The number of samples (steps x walkers) per chunk, rounded down
+            to whole steps.
+
+        Yields
+        ------
+        ndarray
+            Shape (<= chunksize, n_params).
+
+        """
+        chain = self.chain
+        steps = max(1, chunksize // self.n_walkers)
+        for i in range(0, len(chain), steps):
+            yield chain[i : i + steps].reshape(-1, self.n_params)
+
+    # /def
+
+    def summarize(self, chunksize: int = 10**6, **kwargs: T.Any) -> Table:
+        """Summarize the chain online. See `summarize_chain`.
+
+        Parameters
+        ----------
+        chunksize : int, optional
+            The number of samples read at a time.
+        **kwargs
+            Into `summarize_chain`, e.g. ``percentiles``.
+
+        Returns
+        -------
+        `~astropy.table.Table`
+
+        """
+        return summarize_chain(
+            self.iter_flatchain(chunksize), names=self.names, **kwargs
+        )
+
+    # /def
+
+
+# /class
+
+
+##############################################################################
+# END
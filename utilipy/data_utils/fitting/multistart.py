@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+
+"""Multi-Start Fitting.
+
+Multi-modal fits are sensitive to the starting point. `multistart_minimize`
+runs `lmfit.minimize` on a `scipy_residual_to_lmfit` residual from many
+starting points, in a process pool, and ranks the results.
+
+"""
+
+__author__ = "Nathaniel Starkman"
+
+
+__all__ = [
+    "multistart_minimize",
+    "MultiStartResult",
+]
+
+
+##############################################################################
+# IMPORTS
+
+# BUILT-IN
+import time
+import typing as T
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+# THIRD PARTY
+import numpy as np
+
+# PROJECT-SPECIFIC
+from .lmfit_utils import (
+    _DFUN_METHODS,
+    HAS_LMFIT,
+    ParametersType,
+    scipy_residual_to_lmfit,
+)
+
+if HAS_LMFIT:
+    import lmfit
+
+##############################################################################
+# PARAMETERS
+
+MultiStartResult: namedtuple = namedtuple(
+    "MultiStartResult", ["start", "result", "time", "error"]
+)
+MultiStartResult.__doc__ = """Result of one start of `multistart_minimize`.
+
+Attributes
+----------
+start : ndarray
+    The starting parameter values, in the residual's ``param_order``.
+result : `~lmfit.minimizer.MinimizerResult` or None
+    The fit, or None if it raised an exception.
+time : float
+    Wall-clock seconds spent in `lmfit.minimize`.
+error : Exception or None
+    The exception raised by the fit, if any.
+
+"""
+
+##############################################################################
+# CODE
+##############################################################################
+
+
+def _minimize_from(
+    residual: scipy_residual_to_lmfit,
+    params: ParametersType,
+    start: np.ndarray,
+    fit_kws: dict,
+) -> MultiStartResult:
+    """Run `lmfit.minimize` from one starting point.
+
+    Parameters
+    ----------
+    residual : `scipy_residual_to_lmfit`
+    params : `~lmfit.Parameters`
+        Copied, then the values are set to `start`.
+    start : ndarray
+        Starting values, in ``residual.param_order``.
+    fit_kws : dict
+        Keyword arguments into `lmfit.minimize`.
+
+    Returns
+    -------
+    `MultiStartResult`
+
+    """
+    params = params.copy()
+    for name, value in zip(residual.param_order, start):
+        params[name].value = value
+
+    tic = time.perf_counter()
+    try:
+        result = lmfit.minimize(residual.lmfit, params, **fit_kws)
+    except Exception as e:  # a bad start shouldn't stop the others
+        result, error = None, e
+    else:
+        error = None
+    toc = time.perf_counter()
+
+    return MultiStartResult(start, result, toc - tic, error)
+
+
+# /def
+
+
+# -------------------------------------------------------------------
+
+
+def multistart_minimize(
+    residual: scipy_residual_to_lmfit,
+    params: ParametersType,
+    starts: T.Union[T.Sequence, np.ndarray, T.Callable[[int], np.ndarray]],
+    n_starts: T.Optional[int] = None,
+    args: tuple = (),
+    kws: T.Optional[dict] = None,
+    method: str = "leastsq",
+    rank_by: str = "chisqr",
+    max_workers: T.Optional[int] = None,
+    **fit_kws: T.Any,
+) -> T.List[MultiStartResult]:
+    """Minimize from many starting points in parallel.
+
+    Parameters
+    ----------
+    residual : `scipy_residual_to_lmfit`
+        The residual function. It is sent to the worker processes, so must be
+        picklable, e.g. defined at the top level of a module.
+    params : `~lmfit.Parameters`
+        Must contain every name in ``residual.param_order``. The starting
+        values are set on a copy for each start; bounds, constraints, etc.
+        are kept.
+    starts : array-like or callable
+        The starting values, shape (n_starts, len(``residual.param_order``)),
+        or a sampler called as ``starts(n_starts)`` returning them.
+    n_starts : int or None, optional
+        The number of starts, required if `starts` is a sampler.
+    args, kws : optional
+        Positional and keyword arguments into the residual function.
+    method : str, optional
+        The `lmfit.minimize` method (default "leastsq").
+    rank_by : str, optional
+        The attribute of the `~lmfit.minimizer.MinimizerResult` by which the
+        results are ranked, smallest first (default "chisqr").
+    max_workers : int or None, optional
+        The number of worker processes. None (default) uses the number of
+        CPUs. With 1 the fits are run serially in this process.
+    **fit_kws
+        Keyword arguments into `lmfit.minimize`. If the residual is
+        ``vectorized``, ``Dfun`` defaults to its ``jacobian``.
+
+    Returns
+    -------
+    list of `MultiStartResult`
+        Ranked by `rank_by`, with failed fits last.
+
+    Raises
+    ------
+    TypeError
+        If `residual` is not a `scipy_residual_to_lmfit`.
+    ValueError
+        If `starts` is a sampler and `n_starts` is not given, or if `starts`
+        does not have one value per parameter.
+
+    Examples
+    --------
+    Starting points can be sampled uniformly within the bounds:
+
+    >>> def sampler(n):
+    ...     return np.random.uniform(lower, upper, size=(n, len(lower)))
+    >>> results = multistart_minimize(residual, params, sampler,
+    ...                               n_starts=50, args=(x, data))
+    ... # doctest: +SKIP
+    >>> best = results[0].result  # doctest: +SKIP
+
+    """
+    if not isinstance(residual, scipy_residual_to_lmfit):
+        raise TypeError("residual must be a scipy_residual_to_lmfit")
+
+    if callable(starts):
+        if n_starts is None:
+            raise ValueError("n_starts is required if starts is a sampler")
+        starts = starts(n_starts)
+    starts = np.atleast_2d(np.asarray(starts, dtype=np.float64))
+    if starts.shape[1] != len(residual.param_order):
+        raise ValueError(
+            f"starts must have {len(residual.param_order)} values per start"
+        )
+
+    fit_kws = dict(args=args, kws=kws, method=method, **fit_kws)
+    if residual.vectorized and method in _DFUN_METHODS:
+        fit_kws.setdefault("Dfun", residual.jacobian)
+
+    if max_workers == 1:
+        results = [
+            _minimize_from(residual, params, start, fit_kws)
+            for start in starts
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    _minimize_from, residual, params, start, fit_kws
+                )
+                for start in starts
+            ]
+            results = [f.result() for f in futures]
+
+    def rank(res: MultiStartResult) -> tuple:
+        value = getattr(res.result, rank_by, None)
+        if value is None or not np.isfinite(value):  # failed fits are last
+            return (True, np.inf)
+        return (False, value)
+
+    results.sort(key=rank)
+
+    return results
+
+
+# /def
+
+
+##############################################################################
+# END
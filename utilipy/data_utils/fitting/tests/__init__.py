@@ -5,6 +5,9 @@
 
 __all__ = [
     "test_lmfit_utils",
+    "test_multistart",
+    "test_batch",
+    "test_mcmc",
 ]
 
 
@@ -12,7 +15,7 @@ __all__ = [
 # IMPORTS
 
 # PROJECT-SPECIFIC
-from . import test_lmfit_utils
+from . import test_batch, test_lmfit_utils, test_mcmc, test_multistart
 
 ##############################################################################
 # END
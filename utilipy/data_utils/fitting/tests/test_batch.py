@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+
+"""Test contents of :mod:`~utilipy.data_utils.fitting.batch`."""
+
+__all__ = [
+    # functions
+    "test_batch_minimize_raises",
+    "test_batch_minimize",
+    "test_batch_minimize_vectorized",
+    "test_batch_minimize_checkpoint",
+    "test_batch_minimize_checkpoint_ids",
+]
+
+
+##############################################################################
+# IMPORTS
+
+# THIRD PARTY
+import numpy as np
+import pytest
+
+# PROJECT-SPECIFIC
+from utilipy.data_utils.fitting import batch_minimize
+
+from .test_lmfit_utils import _model, _residual, _vresidual
+
+##############################################################################
+# PARAMETERS
+
+x = np.linspace(0, 10, 50)
+amps = [1.0, 1.5, 2.0, 2.5, 3.0]
+
+
+def _make_params():
+    lmfit = pytest.importorskip("lmfit")
+
+    params = lmfit.Parameters()
+    params.add("amp", value=1.0, min=0, max=5)
+    params.add("phaseshift", value=0.5, vary=False)
+    params.add("freq", value=2.0, vary=False)
+    params.add("decay", value=0.05, vary=False)
+    return params
+
+
+# /def
+
+
+def _datasets(amps):
+    for amp in amps:
+        yield (x, _model(x, amp, 0.5, 2.0, 0.05), 1.0)
+
+
+# /def
+
+
+##############################################################################
+# CODE
+##############################################################################
+
+
+def test_batch_minimize_raises():
+    """Test Exceptions of :func:`~utilipy.data_utils.fitting.batch_minimize`."""
+    with pytest.raises(TypeError):  # not a scipy_residual_to_lmfit
+        batch_minimize(_model, _make_params(), _datasets(amps))
+
+    with pytest.raises(ValueError):
+        batch_minimize(_residual, _make_params(), _datasets(amps), chunksize=0)
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_batch_minimize(max_workers):
+    """Test :func:`~utilipy.data_utils.fitting.batch_minimize`."""
+    table = batch_minimize(
+        _residual,
+        _make_params(),
+        _datasets(amps),
+        ids=[f"lc{i}" for i in range(len(amps))],
+        chunksize=2,
+        max_workers=max_workers,
+    )
+
+    assert len(table) == len(amps)
+    assert {"id", "success", "chisqr", "amp", "amp_err", "time"} <= set(
+        table.colnames
+    )
+    assert all(table["success"])
+
+    table.sort("id")
+    assert list(table["id"]) == [f"lc{i}" for i in range(len(amps))]
+    assert np.allclose(table["amp"], amps)
+
+    # a failed fit is recorded, not raised
+    table = batch_minimize(
+        _residual, _make_params(), [(x, None, 1.0)], max_workers=1
+    )
+    assert not table["success"][0]
+    assert np.isnan(table["amp"][0])
+    assert "TypeError" in table["message"][0]
+
+
+# /def
+
+
+@pytest.mark.parametrize("method", ["leastsq", "least_squares"])
+def test_batch_minimize_vectorized(method):
+    """Test a vectorized residual, with and without its ``Dfun``."""
+    table = batch_minimize(
+        _vresidual,
+        _make_params(),
+        _datasets(amps),
+        method=method,
+        max_workers=1,
+    )
+
+    assert all(table["success"]), list(table["message"])
+    table.sort("id")
+    assert np.allclose(table["amp"], amps)
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_batch_minimize_checkpoint(tmp_path):
+    """Test resuming :func:`~utilipy.data_utils.fitting.batch_minimize`."""
+    checkpoint = str(tmp_path / "results.csv")
+
+    def interrupted(amps):
+        yield from _datasets(amps[:2])
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        batch_minimize(
+            _residual,
+            _make_params(),
+            interrupted(amps),
+            chunksize=1,
+            max_workers=1,
+            checkpoint=checkpoint,
+        )
+
+    # resume. The finished datasets would now fail, if they were refit.
+    datasets = [(x, None, 1.0)] * 2 + list(_datasets(amps[2:]))
+    table = batch_minimize(
+        _residual,
+        _make_params(),
+        datasets,
+        chunksize=1,
+        max_workers=1,
+        checkpoint=checkpoint,
+    )
+
+    assert list(table["id"]) == list(range(len(amps)))
+    assert all(table["success"])
+    assert np.allclose(table["amp"], amps)
+
+
+# /def
+
+
+def test_batch_minimize_checkpoint_ids(tmp_path):
+    """Test resuming :func:`~utilipy.data_utils.fitting.batch_minimize`.
+
+    With ids that look like numbers, which must not be read back as them.
+
+    """
+    checkpoint = str(tmp_path / "results.csv")
+    ids = ["001", "002", "003"]
+    kw = dict(ids=ids, chunksize=1, max_workers=1, checkpoint=checkpoint)
+
+    table = batch_minimize(
+        _residual, _make_params(), _datasets(amps[:3]), **kw
+    )
+    assert list(table["id"]) == ids
+
+    # rerun. Nothing is refit: these datasets would fail.
+    table = batch_minimize(
+        _residual, _make_params(), [(x, None, 1.0)] * 3, **kw
+    )
+    assert list(table["id"]) == ids  # no duplicates
+    assert all(table["success"])
+    assert np.allclose(table["amp"], amps[:3])
+
+
+# /def
+
+
+##############################################################################
+# END
@@ -8,12 +8,19 @@ __all__ = [
     "test_scipy_residual_to_lmfit_raises",
     "test_scipy_residual",
     "test_lmfit_residual",
+    "test_lmfit_values",
+    "test_pickle",
+    "test_residual_cache",
+    "test_vectorized_jacobian",
 ]
 
 
 ##############################################################################
 # IMPORTS
 
+# BUILT-IN
+import pickle
+
 # THIRD PARTY
 import numpy as np
 import pytest
@@ -52,6 +59,21 @@ def _residual(variables, x, data, eps_data):
     return (data - model) / eps_data
 
 
+# /def
+
+
+@scipy_residual_to_lmfit.decorator(
+    param_order=["amp", "phaseshift", "freq", "decay"], vectorized=True
+)
+def _vresidual(variables, x, data, eps_data):
+    """Vectorized `_residual`."""
+    amp, phaseshift, freq, decay = np.asarray(variables)[..., None]
+
+    model = _model(x, amp=amp, freq=freq, phaseshift=phaseshift, decay=decay)
+
+    return (data - model) / eps_data
+
+
 # /def
 
 # -------------------------------------------------------------------
@@ -116,6 +138,193 @@ def test_lmfit_residual():
     )
 
 
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_lmfit_values():
+    """Test the parameter values passed by ``.lmfit``."""
+    lmfit = pytest.importorskip("lmfit")
+
+    @scipy_residual_to_lmfit.decorator(param_order=["b", "a"])
+    def residual(variables):
+        return variables
+
+    assert residual.param_order == ("b", "a")
+    assert residual.param_index == {"b": 0, "a": 1}
+
+    params = lmfit.Parameters()
+    params.add_many(("a", 1), ("b", 2), ("c", 3))
+
+    variables = residual.lmfit(params)
+    assert variables.dtype == np.float64
+    assert np.all(variables == [2.0, 1.0])
+
+    # the array is reused
+    params["a"].value = 4
+    assert residual.lmfit(params) is variables
+    assert np.all(variables == [2.0, 4.0])
+
+    # the order can be changed
+    residual.param_order = ["a", "c"]
+    assert residual.param_order == ("a", "c")
+    assert residual.param_index == {"a": 0, "c": 1}
+    assert np.all(residual.lmfit(params) == [4.0, 3.0])
+
+    # a single parameter
+    @scipy_residual_to_lmfit.decorator(param_order=["c"])
+    def residual(variables):
+        return variables
+
+    assert np.all(residual.lmfit(params) == [3.0])
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_pickle():
+    """Test pickling `~utilipy.data_utils.fitting.scipy_residual_to_lmfit`."""
+    # decorated at the top level of a module, so pickled by reference
+    assert pickle.loads(pickle.dumps(_residual)) is _residual
+
+    # otherwise the function is pickled
+    residual = scipy_residual_to_lmfit(_model, param_order=["a", "b"])
+    unpickled = pickle.loads(pickle.dumps(residual))
+
+    assert isinstance(unpickled, scipy_residual_to_lmfit)
+    assert unpickled.__wrapped__ is _model
+    assert unpickled.param_order == ("a", "b")
+
+    # with the cache size
+    residual = scipy_residual_to_lmfit(_model, ["a"], cache_size=2)
+    assert pickle.loads(pickle.dumps(residual)).cache_info().maxsize == 2
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_residual_cache():
+    """Test the residual cache of `scipy_residual_to_lmfit`."""
+    lmfit = pytest.importorskip("lmfit")
+
+    calls = []
+
+    @scipy_residual_to_lmfit.decorator(param_order=["a"], cache_size=2)
+    def residual(variables, x, scale=1):
+        calls.append(variables[0])
+        return (x - variables[0]) * scale
+
+    with pytest.raises(ValueError):
+        scipy_residual_to_lmfit(_model, ["a"], cache_size=-1)
+
+    params = lmfit.Parameters()
+    params.add("a", value=1.0)
+    x = np.arange(3.0)
+
+    # repeated parameter values are cached
+    res = residual.lmfit(params, x)
+    assert residual.lmfit(params, x) is res
+    assert residual([1], x) is res  # the scipy call shares the cache
+    assert calls == [1.0]
+    assert residual.cache_info() == (2, 1, 2, 1)
+
+    # least-recently used are evicted
+    for a in (2.0, 3.0, 1.0):
+        params["a"].value = a
+        residual.lmfit(params, x)
+    assert calls == [1.0, 2.0, 3.0, 1.0]
+    assert residual.cache_info().currsize == 2
+
+    # new arguments clear the cache
+    residual.lmfit(params, x.copy())
+    residual.lmfit(params, x, scale=2)
+    assert calls == [1.0, 2.0, 3.0, 1.0, 1.0, 1.0]
+    assert residual.cache_info().currsize == 1
+
+    residual.cache_clear()
+    assert residual.cache_info() == (0, 0, 2, 0)
+
+    # values with the same bytes, but different shapes, are not confused
+    @scipy_residual_to_lmfit.decorator(param_order=["a"], cache_size=2)
+    def shaped(variables):
+        return np.asarray(variables) * 2
+
+    assert shaped([1.0]).shape == (1,)
+    assert shaped([[1.0]]).shape == (1, 1)
+    assert shaped.cache_info().misses == 2
+
+    # in a fit
+    params["a"].value = 0.0
+    lmfit.minimize(residual.lmfit, params, args=(x,), method="nelder")
+    info = residual.cache_info()
+    assert info.misses == len(calls) - 6
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_vectorized_jacobian():
+    """Test the Jacobian of a vectorized `scipy_residual_to_lmfit`."""
+    lmfit = pytest.importorskip("lmfit")
+
+    calls = []
+
+    @scipy_residual_to_lmfit.decorator(
+        param_order=["amp", "decay"], vectorized=True
+    )
+    def residual(variables, x, data):
+        calls.append(np.shape(variables))
+        amp, decay = np.asarray(variables)[..., None]
+        return data - amp * np.exp(-x * decay)
+
+    x = np.linspace(0, 5, 20)
+    data = 2 * np.exp(-0.7 * x)
+
+    params = lmfit.Parameters()
+    params.add("amp", value=1.0, min=0, max=1.0)  # at the upper bound
+    params.add("decay", value=0.5)
+    params.add("other", value=3.0)  # varies, but not in the residual
+
+    # one call, shape (n_data, n_varys)
+    jac = residual.jacobian(params, x, data)
+    assert calls == [(2, 4)]
+    assert jac.shape == (20, 3)
+
+    expected = -np.exp(-0.5 * x), x * np.exp(-0.5 * x), np.zeros_like(x)
+    assert np.allclose(jac, np.transpose(expected), atol=1e-6)
+    assert params["amp"].value == 1.0  # not modified
+
+    # through a constraint
+    params["decay"].expr = "other / 6"
+    jac = residual.jacobian(params, x, data)
+    assert np.allclose(jac[:, 1], expected[1] / 6, atol=1e-6)
+    assert params["decay"].value == 0.5
+
+    # in a fit
+    params = lmfit.Parameters()
+    params.add_many(("amp", 1.0), ("decay", 0.5))
+    result = lmfit.minimize(
+        residual.lmfit, params, args=(x, data), Dfun=residual.jacobian
+    )
+    assert result.params["amp"].value == pytest.approx(2)
+    assert result.params["decay"].value == pytest.approx(0.7)
+
+    # pickled with the option
+    residual = scipy_residual_to_lmfit(_model, ["a"], vectorized=True)
+    assert pickle.loads(pickle.dumps(residual)).vectorized
+
+    # not vectorized
+    with pytest.raises(ValueError, match="not vectorized"):
+        _residual.jacobian(params)
+
+
 # /def
 
 
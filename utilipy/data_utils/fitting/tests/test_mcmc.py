@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+"""Test contents of :mod:`~utilipy.data_utils.fitting.mcmc`."""
+
+__all__ = [
+    # functions
+    "test_online_quantiles",
+    "test_summarize_chain",
+    "test_report_mcmc_fit",
+    "test_chain_writer_reader",
+]
+
+
+##############################################################################
+# IMPORTS
+
+# BUILT-IN
+import types
+
+# THIRD PARTY
+import numpy as np
+import pandas as pd
+import pytest
+
+# PROJECT-SPECIFIC
+from utilipy.data_utils.fitting import (
+    ChainReader,
+    ChainWriter,
+    OnlineQuantiles,
+    report_mcmc_fit,
+    summarize_chain,
+)
+from utilipy.data_utils.fitting.mcmc import (
+    SIGMA_PERCENTILES,
+    _write_npy_header,
+)
+
+##############################################################################
+# PARAMETERS
+
+rng = np.random.default_rng(0)
+samples = rng.normal([0.0, 10.0], [1.0, 0.1], size=(20000, 2))
+
+##############################################################################
+# CODE
+##############################################################################
+
+
+def test_online_quantiles():
+    """Test :class:`~utilipy.data_utils.fitting.OnlineQuantiles`."""
+    with pytest.raises(ValueError):
+        OnlineQuantiles(2, bins=3)
+
+    oq = OnlineQuantiles(2, bins=1024)
+    with pytest.raises(ValueError, match="no samples"):
+        oq.quantiles(0.5)
+
+    # the range is widened by later chunks, both down and up
+    oq.update(samples[:100] * 0.01 + [0, 10])
+    for chunk in np.array_split(samples, 7):
+        oq.update(chunk)
+
+    data = np.concatenate((samples[:100] * 0.01 + [0, 10], samples))
+    assert oq.count == len(data)
+    assert np.allclose(oq.mean, data.mean(axis=0))
+    assert np.allclose(oq.std, data.std(axis=0))
+    assert np.all(oq.min == data.min(axis=0))
+    assert np.all(oq.max == data.max(axis=0))
+
+    q = [0.02275, 0.5, 0.97725]
+    expected = np.quantile(data, q, axis=0)
+    # within the current bin width, which widening has made coarser
+    width = (data.max(axis=0) - data.min(axis=0)) / 1024
+    assert np.all(oq.bin_width > width)
+    assert np.all(np.abs(oq.quantiles(q) - expected) <= oq.bin_width)
+    assert oq.quantiles(0.5).shape == (2,)
+    assert np.all(oq.quantiles([0, 1]) == [oq.min, oq.max])
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_summarize_chain():
+    """Test :func:`~utilipy.data_utils.fitting.summarize_chain`."""
+    summary = summarize_chain(samples, names=["a", "b"])
+
+    assert summary.meta["exact"]
+    assert list(summary["name"]) == ["a", "b"]
+    assert summary["percentiles"].shape == (2, len(SIGMA_PERCENTILES))
+    assert np.allclose(
+        summary["percentiles"], np.percentile(samples, SIGMA_PERCENTILES, 0).T
+    )
+    assert np.allclose(summary["median"], np.median(samples, axis=0))
+    assert np.allclose(summary["std"], samples.std(axis=0))
+
+    # walkers, from a DataFrame
+    walkers = samples.reshape(100, 200, 2)
+    assert np.all(summarize_chain(walkers)["median"] == summary["median"])
+    df = pd.DataFrame(samples, columns=["x", "y"])
+    assert list(summarize_chain(df)["name"]) == ["x", "y"]
+
+    # online
+    for chain in (np.array_split(samples, 10), samples):
+        online = summarize_chain(chain, percentiles=[50], chunksize=3000)
+        assert not online.meta["exact"]
+        assert list(online["name"]) == ["p0", "p1"]
+        assert np.allclose(online["median"], summary["median"], atol=1e-2)
+        assert np.allclose(online["mean"], samples.mean(axis=0))
+
+    with pytest.raises(ValueError, match="empty"):
+        summarize_chain(iter([]))
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_report_mcmc_fit(capsys):
+    """Test :func:`~utilipy.data_utils.fitting.report_mcmc_fit`."""
+    lmfit = pytest.importorskip("lmfit")
+
+    params = lmfit.Parameters()
+    params.add("a", value=0.0)
+    params.add("fixed", value=1.0, vary=False)
+    params.add("b", value=10.0)
+    params["a"].stderr, params["b"].stderr = 1.0, 0.1
+
+    chain = samples.reshape(200, 100, 2)  # (steps, walkers, params)
+    lnprob = -((chain - [0, 10]) ** 2).sum(axis=-1)
+    mcmc_res = types.SimpleNamespace(
+        params=params,
+        var_names=["a", "b"],
+        chain=chain,
+        lnprob=lnprob,
+        flatchain=pd.DataFrame(samples, columns=["a", "b"]),
+    )
+
+    summary = report_mcmc_fit(mcmc_res)
+    out = capsys.readouterr().out
+    assert "Maximum Likelihood" in out and "Error Estimates" in out
+
+    assert list(summary["name"]) == ["a", "b"]
+    hp_loc = np.unravel_index(np.argmax(lnprob), lnprob.shape)
+    assert np.all(summary["mle"] == chain[hp_loc])
+    assert np.all(summary["value"] == [0.0, 10.0])
+    assert np.all(summary["stderr"] == [1.0, 0.1])
+
+    # quietly, and online
+    summary = report_mcmc_fit(mcmc_res, chunksize=5000, verbose=False)
+    assert capsys.readouterr().out == ""
+    assert not summary.meta["exact"]
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_chain_writer_reader(tmp_path):
+    """Test :class:`~utilipy.data_utils.fitting.ChainWriter` and Reader."""
+    path = str(tmp_path / "run")
+    chain = samples.reshape(-1, 4, 2)  # (steps, walkers, params)
+    lnprob = chain.sum(axis=-1)
+
+    with pytest.raises(ValueError):
+        ChainWriter(path, 4, 2, mode="x")
+
+    with ChainWriter(path, 4, 2, names=["a", "b"], block_size=64) as writer:
+        for i in range(100):  # one step at a time
+            writer.append(chain[i], lnprob[i])
+        writer.append(chain[100:1000], lnprob[100:1000])  # many steps
+
+        # the complete blocks can be read while writing
+        assert len(ChainReader(path)) == 1000 // 64 * 64
+        with pytest.raises(ValueError, match="all or no"):
+            writer.append(chain[0])
+
+    # resume
+    with pytest.raises(ValueError, match="different number"):
+        ChainWriter(path, 3, 2, mode="a")
+    with ChainWriter(path, 4, 2, mode="a") as writer:
+        writer.append(chain[1000:], lnprob[1000:])
+
+    reader = ChainReader(path)
+    assert reader.names == ["a", "b"]
+    assert isinstance(reader.chain, np.memmap)
+    assert np.array_equal(reader.chain, chain)
+    assert np.array_equal(reader.lnprob, lnprob)
+
+    # burn-in and thinning are views
+    reader = ChainReader(path, burn=100, thin=7)
+    assert len(reader) == len(chain[100::7])
+    assert np.array_equal(reader.chain, chain[100::7])
+    assert np.array_equal(reader.lnprob, lnprob[100::7])
+    assert isinstance(reader.chain, np.memmap)
+
+    chunks = list(reader.iter_flatchain(chunksize=100))
+    assert all(len(c) <= 100 for c in chunks)
+    assert np.array_equal(np.concatenate(chunks), chain[100::7].reshape(-1, 2))
+
+    summary = reader.summarize(chunksize=100)
+    assert list(summary["name"]) == ["a", "b"]
+    assert np.allclose(summary["mean"], chain[100::7].mean(axis=(0, 1)))
+
+    # without log-probabilities or names
+    with ChainWriter(path, 4, 2) as writer:
+        writer.append(chain)
+    reader = ChainReader(path)
+    assert reader.lnprob is None
+    assert reader.names == ["p0", "p1"]
+
+    with pytest.raises(ValueError):
+        ChainReader(path, thin=0)
+
+    # an empty chain decides on the log-probabilities when resumed
+    ChainWriter(path, 4, 2).close()
+    with ChainWriter(path, 4, 2, mode="a") as writer:
+        writer.append(chain[:10], lnprob[:10])
+    assert np.array_equal(ChainReader(path).lnprob, lnprob[:10])
+
+    # the fixed-size header has room for the shape, but not for any dtype
+    with pytest.raises(ValueError, match="does not fit"):
+        with open(tmp_path / "big.npy", "wb") as f:
+            _write_npy_header(f, [(f"x{i}", float) for i in range(20)], (0,))
+
+
+# /def
+
+
+##############################################################################
+# END
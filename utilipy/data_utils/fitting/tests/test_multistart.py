@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+"""Test contents of :mod:`~utilipy.data_utils.fitting.multistart`."""
+
+__all__ = [
+    # functions
+    "test_multistart_minimize_raises",
+    "test_multistart_minimize",
+    "test_multistart_minimize_vectorized",
+]
+
+
+##############################################################################
+# IMPORTS
+
+# THIRD PARTY
+import numpy as np
+import pytest
+
+# PROJECT-SPECIFIC
+from utilipy.data_utils.fitting import (
+    MultiStartResult,
+    multistart_minimize,
+    scipy_residual_to_lmfit,
+)
+
+from .test_lmfit_utils import _model, _residual, _vresidual
+
+##############################################################################
+# PARAMETERS
+
+x = np.linspace(0, 10, 50)
+truth = [1.0, 0.5, 2.0, 0.05]  # amp, phaseshift, freq, decay
+data = _model(x, *truth)
+
+
+def _make_params():
+    lmfit = pytest.importorskip("lmfit")
+
+    params = lmfit.Parameters()
+    for name in _residual.param_order:
+        params.add(name, value=1.0, min=-5, max=5)
+    params["decay"].min = 0
+    return params
+
+
+# /def
+
+
+def _sampler(n):
+    return np.random.default_rng(0).uniform(0, 3, size=(n, 4))
+
+
+# /def
+
+
+##############################################################################
+# CODE
+##############################################################################
+
+
+def test_multistart_minimize_raises():
+    """Test Exceptions of :func:`~utilipy.data_utils.fitting.multistart_minimize`."""
+    params = _make_params()
+
+    with pytest.raises(TypeError):  # not a scipy_residual_to_lmfit
+        multistart_minimize(_model, params, [truth])
+
+    with pytest.raises(ValueError):  # sampler without n_starts
+        multistart_minimize(_residual, params, _sampler)
+
+    with pytest.raises(ValueError):  # wrong number of values
+        multistart_minimize(_residual, params, [[1, 2]])
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_multistart_minimize(max_workers):
+    """Test :func:`~utilipy.data_utils.fitting.multistart_minimize`."""
+    lmfit = pytest.importorskip("lmfit")
+
+    params = _make_params()
+
+    results = multistart_minimize(
+        _residual,
+        params,
+        _sampler,
+        n_starts=4,
+        args=(x, data, 1.0),
+        max_workers=max_workers,
+    )
+
+    assert len(results) == 4
+    assert all(isinstance(r, MultiStartResult) for r in results)
+    assert all(r.time > 0 and r.error is None for r in results)
+    assert set(map(tuple, (r.start for r in results))) == set(
+        map(tuple, _sampler(4))
+    )
+
+    # ranked
+    chisqr = [r.result.chisqr for r in results]
+    assert chisqr == sorted(chisqr)
+
+    # the input parameters are not modified
+    assert all(p.value == 1.0 for p in params.values())
+
+    # a failed fit is ranked last
+    @scipy_residual_to_lmfit.decorator(param_order=["amp"])
+    def residual(variables):
+        if variables[0] > 1:
+            raise ValueError
+        return variables - 0.5
+
+    params = lmfit.Parameters()
+    params.add("amp", value=1.0)
+
+    results = multistart_minimize(
+        residual, params, [[2.0], [0.0]], max_workers=1
+    )
+    assert results[0].result.params["amp"].value == pytest.approx(0.5)
+    assert results[1].result is None
+    assert isinstance(results[1].error, ValueError)
+
+
+# /def
+
+
+@pytest.mark.parametrize("method", ["leastsq", "least_squares"])
+def test_multistart_minimize_vectorized(method):
+    """Test a vectorized residual, with and without its ``Dfun``."""
+    results = multistart_minimize(
+        _vresidual,
+        _make_params(),
+        [truth, np.add(truth, 0.1)],
+        args=(x, data, 1.0),
+        method=method,
+        max_workers=1,
+    )
+
+    assert all(r.error is None for r in results)
+    assert results[0].result.chisqr == pytest.approx(0, abs=1e-10)
+
+
+# /def
+
+
+##############################################################################
+# END
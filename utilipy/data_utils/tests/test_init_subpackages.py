@@ -31,8 +31,20 @@ def test_init_fitting():
     local = [
         # modules
         "lmfit_utils",
+        "multistart",
+        "batch",
+        "mcmc",
         # functions
         "scipy_residual_to_lmfit",
+        "multistart_minimize",
+        "batch_minimize",
+        "summarize_chain",
+        "report_mcmc_fit",
+        # classes
+        "MultiStartResult",
+        "OnlineQuantiles",
+        "ChainWriter",
+        "ChainReader",
     ]
 
     # test __all__ conforms to module
@@ -57,12 +69,18 @@ def test_init_xfm():
     local = [
         # modules
         "graph",
+        "defaults",
+        "profiling",
         "transformations",
         # functions
         "TransformGraph",
         # transformations
         "DataTransform",
         "CompositeTransform",
+        "LazyTransformResult",
+        # profiling
+        "TransformProfile",
+        "TransformCosts",
         # Parameters
         "data_graph",
     ]
@@ -15,8 +15,8 @@ Notes
 -----
 These are dev notes for my thoughts on building the TransformGraph.
 
-- What about subclasses? how can a subclass be recognized to use a particular
-  conversion?
+- Subclasses of a registered type use the conversion of their nearest
+  registered base class (see `TransformGraph.get_transform`).
 - What about Any-to-something conversions, like trying Table(x) or array(y)?
   these should have lower priority than a registered conversion, but should
   work.
@@ -33,12 +33,18 @@ __credits__ = ["Astropy"]
 __all__ = [
     # modules
     "graph",
+    "defaults",
+    "profiling",
     "transformations",
     # functions
     "TransformGraph",
     # transformations
     "DataTransform",
     "CompositeTransform",
+    "LazyTransformResult",
+    # profiling
+    "TransformProfile",
+    "TransformCosts",
     # Parameters
     "data_graph",
 ]
@@ -50,9 +56,14 @@ __all__ = [
 # BUILT IN
 
 # PROJECT-SPECIFIC
-from . import graph, transformations
+from . import defaults, graph, profiling, transformations
 from .graph import TransformGraph
-from .transformations import CompositeTransform, DataTransform
+from .profiling import TransformCosts, TransformProfile
+from .transformations import (
+    CompositeTransform,
+    DataTransform,
+    LazyTransformResult,
+)
 
 ##############################################################################
 # PARAMETERS
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+
+"""Default Data Transformations.
+
+The transformations with which a `TransformGraph` is seeded (see its
+``seed_basic`` argument). Transformations that share the underlying data
+buffers, rather than copying, are marked ``zero_copy`` and have a reduced
+weight, so multi-hop routes through them are preferred by the path search.
+Direct (1-hop) transformations are always used when present, whatever their
+weight.
+
+Paths are chosen by type, not data, so the `~numpy.ndarray` to
+`~astropy.table.Table` transformation is on every route from an array to a
+table, but only structured arrays can be converted. Plain arrays raise a
+`TypeError`.
+
+"""
+
+__author__ = "Nathaniel Starkman"
+
+
+__all__ = [
+    "DEFAULT_TRANSFORMS",
+]
+
+
+##############################################################################
+# IMPORTS
+
+# BUILT-IN
+import typing as T
+from collections import defaultdict
+
+# THIRD PARTY
+import numpy as np
+import pandas as pd
+from astropy.table import QTable, Table
+
+# PROJECT-SPECIFIC
+from .transformations import DataTransform
+
+##############################################################################
+# CODE
+##############################################################################
+
+#####################################################################
+# Built-In Types
+# TODO replace these with catch-all functions, like Any-to-None
+
+
+def to_none(data):
+    """Any to `None`."""
+    return None
+
+
+# /def
+
+
+def to_tuple(data):
+    """Sequence to `tuple`."""
+    return tuple(data)
+
+
+# /def
+
+
+def to_list(data):
+    """Sequence to `list`."""
+    return list(data)
+
+
+# /def
+
+
+def to_str(data):
+    """Any to `str`."""
+    return str(data)
+
+
+# /def
+
+
+def to_dict(data):
+    """Mapping, or sequence of pairs, to `dict`."""
+    return dict(data)
+
+
+# /def
+
+
+def none_to_dict(data):
+    """`None` to an empty `dict`."""
+    return dict()
+
+
+# /def
+
+
+#####################################################################
+# Arrays & Tables
+
+
+def ndarray_to_recarray(data):
+    """`~numpy.ndarray` to `~numpy.recarray`, as a view."""
+    return data.view(np.recarray)
+
+
+# /def
+
+
+def recarray_to_ndarray(data):
+    """`~numpy.recarray` to `~numpy.ndarray`, as a view."""
+    return data.view(np.ndarray)
+
+
+# /def
+
+
+def ndarray_to_table(data):
+    """Structured `~numpy.ndarray` to `~astropy.table.Table`, sharing the data.
+
+    Raises
+    ------
+    TypeError
+        If `data` is not structured. `~astropy.table.Table` would make each
+        element of a plain array a column, e.g. a 1-row table from a 1-D array.
+
+    """
+    if data.dtype.names is None:
+        raise TypeError("only a structured ndarray can be a Table")
+    return Table(data, copy=False)
+
+
+# /def
+
+
+def table_to_ndarray(data):
+    """`~astropy.table.Table` to a structured `~numpy.ndarray` (copies)."""
+    return data.as_array()
+
+
+# /def
+
+
+def table_to_qtable(data):
+    """`~astropy.table.Table` to `~astropy.table.QTable`, sharing the data."""
+    return QTable(data, copy=False)
+
+
+# /def
+
+
+def qtable_to_table(data):
+    """`~astropy.table.QTable` to `~astropy.table.Table`, sharing the data."""
+    return Table(data, copy=False)
+
+
+# /def
+
+
+def table_to_dataframe(data):
+    """`~astropy.table.Table` to `~pandas.DataFrame` (copies)."""
+    return data.to_pandas()
+
+
+# /def
+
+
+def dataframe_to_table(data):
+    """`~pandas.DataFrame` to `~astropy.table.Table` (copies)."""
+    return Table.from_pandas(data)
+
+
+# /def
+
+
+def dataframe_to_recarray(data):
+    """`~pandas.DataFrame` to `~numpy.recarray`, without the index (copies)."""
+    return data.to_records(index=False)
+
+
+# /def
+
+
+def ndarray_to_dataframe(data):
+    """`~numpy.ndarray` to `~pandas.DataFrame` (copies)."""
+    return pd.DataFrame(data)
+
+
+# /def
+
+
+#####################################################################
+# Default Transformation Set
+
+# (func, fromtype, totype, zero_copy), in order of registration
+DEFAULT_TRANSFORMS: T.Tuple[tuple, ...] = (
+    *((to_none, k, None, False) for k in (str, list, tuple, dict)),
+    *((to_tuple, k, tuple, False) for k in (str, list, dict)),
+    *((to_list, k, list, False) for k in (str, tuple, dict)),
+    *((to_str, k, str, False) for k in (tuple, list, dict)),
+    *((to_dict, k, dict, False) for k in (tuple, list, dict)),
+    (none_to_dict, None, dict, False),
+    # arrays & tables
+    (ndarray_to_recarray, np.ndarray, np.recarray, True),
+    (recarray_to_ndarray, np.recarray, np.ndarray, True),
+    (ndarray_to_table, np.ndarray, Table, True),
+    (table_to_ndarray, Table, np.ndarray, False),
+    (table_to_qtable, Table, QTable, True),
+    (qtable_to_table, QTable, Table, True),
+    (table_to_dataframe, Table, pd.DataFrame, False),
+    (dataframe_to_table, pd.DataFrame, Table, False),
+    (dataframe_to_recarray, pd.DataFrame, np.recarray, False),
+    (ndarray_to_dataframe, np.ndarray, pd.DataFrame, False),
+)
+
+
+def _make_default_xfm_set() -> defaultdict:
+    """Build the default transformations, in graph order.
+
+    Each call builds new transformations, so that graphs seeded with them
+    can be modified independently.
+
+    Returns
+    -------
+    defaultdict
+        ``{totype: {fromtype: transform}}``
+
+    """
+    xfm_set = defaultdict(dict)
+    for func, fromtype, totype, zero_copy in DEFAULT_TRANSFORMS:
+        xfm_set[totype][fromtype] = DataTransform(
+            func, fromtype, totype, zero_copy=zero_copy
+        )
+
+    return xfm_set
+
+
+# /def
+
+
+##############################################################################
+# END
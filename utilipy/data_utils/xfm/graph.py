@@ -15,23 +15,101 @@ __all__ = [
 # IMPORTS
 
 # BUILT-IN
+import abc
+import asyncio
 import heapq
+import itertools
+import threading
+import types
 import typing as T
-from collections import defaultdict
 
 # PROJECT-SPECIFIC
-from .transformations import CompositeTransform, _default_xfm_set
-from utilipy.utils import functools, inspect
+from .defaults import _make_default_xfm_set
+from .profiling import TransformCosts, TransformProfile, _Recorders
+from .transformations import CompositeTransform, LazyTransformResult
+from utilipy.utils import functools, inspect, pickle
 
 ##############################################################################
 # PARAMETERS
 
+# The version of the format of `TransformGraph.snapshot`
+_SNAPSHOT_VERSION: int = 1
+
+# The factor by which the weight of zero-copy transforms is reduced,
+# so they are preferred by the path search.
+_ZERO_COPY_WEIGHT: float = 0.5
+
+# The docstring of the `TransformGraph.function_decorator` wrappers, which
+# is formatted and combined with the function's by `functools.wraps`.
+_WRAPPER_DOC: str = """Wrapper docstring.
+
+Other Parameters
+----------------
+_skip_decorator : bool, optional
+    Whether to skip the decorator.
+    default {_skip_decorator}
+
+Notes
+-----
+This function is wrapped with a data `~TransformGraph` decorator.
+See `~TransformGraph.function_decorator` for details.
+The transformation arguments are also attached to this function
+as the attribute ``._transforms``.
+The affected arguments are: {argkeys}
+"""
+
 
 ##############################################################################
 # CODE
 ##############################################################################
 
 
+class _GraphState:
+    """Snapshot of a `TransformGraph` and the caches computed from it.
+
+    A snapshot is never modified once published, except to fill its caches
+    with results computed from its own ``graph``. Changes to the graph
+    publish a new snapshot, so readers can use a snapshot without locking.
+
+    Parameters
+    ----------
+    graph : mapping
+        ``{totype: {fromtype: transform}}``. Not modified.
+    generation : int
+        Incremented for each new snapshot.
+
+    """
+
+    __slots__ = (
+        "graph",
+        "generation",
+        "names",
+        "type_set",
+        "shortestpaths",
+        "composite_cache",
+        "dispatch_cache",
+        "dispatch_token",
+    )
+
+    def __init__(self, graph: T.Mapping, generation: int):
+        self.graph = graph
+        self.generation = generation
+        self.names: T.Optional[dict] = None
+        self.type_set: T.Optional[set] = None
+        self.shortestpaths: dict = {}
+        self.composite_cache: dict = {}
+        self.dispatch_cache: dict = {}
+        self.dispatch_token = abc.get_cache_token()
+
+    # /def
+
+
+# /class
+
+
+# -------------------------------------------------------------------
+
+
 class TransformGraph:
     """Graph representing the paths between data types.
 
@@ -46,6 +124,12 @@ class TransformGraph:
     - sub-type conversions, where the conversion a -> b (with types A, B)
       works on any subtype of A (like A1(A)).
 
+    The graph is safe to use from many threads. The graph and the caches
+    computed from it are kept in a snapshot, which changes (like
+    `add_transform` and `invalidate_cache`) replace as a whole, while
+    holding a lock. Lookups (like `get_transform`) use the current snapshot
+    without locking, so they never wait for, or see part of, a change.
+
 
     .. todo::
 
@@ -56,52 +140,147 @@ class TransformGraph:
 
     """
 
-    def __init__(self, seed_basic: bool = True):
+    def __init__(self, seed_basic: bool = True, validate: bool = True):
         """Data Transformation Graph.
 
         Parameters
         ----------
         seed_basic : bool
-            whether to start with a basic set of transformations
+            whether to start with a basic set of transformations, between the
+            built-in types, arrays, and tables (see
+            `~utilipy.data_utils.xfm.defaults`).
 
             .. todo::
 
                 Generate documentation / colored graph like Astropy's
 
+        validate : bool
+            whether the transforms from `get_transform` check their output is
+            of the desired type.
+
+        """
+        self._lock = threading.RLock()  # held by changes to the graph
+        self._validate = validate
+        self._profile: T.Optional[TransformProfile] = None
+        self._costs: T.Optional[TransformCosts] = None
+        self._frozen = False
+
+        # graph, in reverse order, and its caches
+        graph = dict(_make_default_xfm_set()) if seed_basic else {}
+        self._state = _GraphState(graph, 0)
+
+    # /def
+
+    # ------------------------------------------
+    # State
+
+    @property
+    def _graph(self) -> T.Mapping:
+        """The graph of the current snapshot. Do not modify."""
+        return self._state.graph
+
+    @property
+    def _shortestpaths(self) -> dict:
+        return self._state.shortestpaths
+
+    @property
+    def _composite_cache(self) -> dict:
+        return self._state.composite_cache
+
+    @property
+    def _dispatch_cache(self) -> dict:
+        return self._state.dispatch_cache
+
+    @property
+    def _cache_generation(self) -> int:
+        return self._state.generation
+
+    # /def
+
+    def _new_state(
+        self, graph: T.Optional[T.Mapping] = None, keep_paths: bool = False
+    ) -> _GraphState:
+        """Snapshot to replace the current one. Must hold the lock.
+
+        Parameters
+        ----------
+        graph : mapping or None, optional
+            The new graph. If None, the graph is unchanged and the caches
+            derived only from it are kept.
+        keep_paths : bool, optional
+            Whether to keep the shortest paths, if the graph is unchanged.
+
+        Returns
+        -------
+        `_GraphState`
+
         """
-        # graph, in reverse order
-        self._graph = _default_xfm_set if seed_basic else defaultdict(dict)
-        self.invalidate_cache()  # generates cache entries
+        old = self._state
+        if graph is None:
+            state = _GraphState(old.graph, old.generation + 1)
+            state.names, state.type_set = old.names, old.type_set
+            if keep_paths:
+                state.shortestpaths = dict(old.shortestpaths)
+        else:
+            state = _GraphState(graph, old.generation + 1)
+
+        return state
+
+    # /def
+
+    # ------------------------------------------
+
+    @property
+    def validate(self) -> bool:
+        """Whether the transforms from `get_transform` check their output."""
+        return self._validate
+
+    @validate.setter
+    def validate(self, value: bool):
+        with self._lock:
+            self._validate = bool(value)
+            # the cached transforms are out of date, but not the paths, so
+            # this is permitted for a frozen graph
+            self._reset_transforms()
 
     # /def
 
     @property
     def _cached_names(self):
-        if self._cached_names_dct is None:
-            self._cached_names_dct = dct = {}
-            for c in self.type_set:
+        state = self._state
+        if state.names is None:
+            dct = {}
+            for c in self._get_type_set(state):
                 nm = getattr(c, "name", None)
                 if nm is not None:
                     if not isinstance(nm, list):
                         nm = [nm]
                     for name in nm:
                         dct[name] = c
+            state.names = dct
 
-        return self._cached_names_dct
+        return state.names
 
     # /def
 
     @property
     def type_set(self):
         """A `set` of all data types present in this `TransformGraph`."""
-        if self._cached_type_set is None:
-            self._cached_type_set = set()
-            for a in self._graph:
-                self._cached_type_set.add(a)
-                for b in self._graph[a]:
-                    self._cached_type_set.add(b)
+        return self._get_type_set(self._state).copy()
+
+    # /def
 
-        return self._cached_type_set.copy()
+    @staticmethod
+    def _get_type_set(state: _GraphState) -> set:
+        """The (cached) data types of a snapshot. Do not modify."""
+        if state.type_set is None:
+            type_set = set()
+            for a in state.graph:
+                type_set.add(a)
+                type_set.update(state.graph[a])
+            state.type_set = type_set
+
+        return state.type_set
 
     # /def
 
@@ -113,16 +292,446 @@ class TransformGraph:
         are added or removed, but will need to be called manually if
         weights on transforms are modified inplace.
 
+        Raises
+        ------
+        RuntimeError
+            If the graph is frozen (see `freeze`).
+
+        """
+        with self._lock:
+            self._check_not_frozen()
+
+            self._state = self._new_state(self._state.graph)
+
+    # /def
+
+    @property
+    def frozen(self) -> bool:
+        """Whether the graph is frozen (see `freeze`)."""
+        return self._frozen
+
+    # /def
+
+    def _check_not_frozen(self):
+        """Raise a RuntimeError if the graph is frozen."""
+        if self._frozen:
+            raise RuntimeError(
+                "the transform graph is frozen and cannot be modified."
+            )
+
+    # /def
+
+    def freeze(self):
+        """Precompute all transformations and make the graph immutable.
+
+        The shortest paths between all pairs of data types are found (by
+        repeated Dijkstra searches, see `find_shortest_path`) and the
+        transforms for them are built (see `get_transform`). Further
+        changes to the graph, like `add_transform`, raise a `RuntimeError`,
+        so these caches are never invalidated and transform lookups are
+        always a cache hit (except, the first time, for subclasses of
+        registered types).
+
+        Returns
+        -------
+        self : `TransformGraph`
+            The frozen graph, for chaining.
+
+        """
+        with self._lock:
+            if self._frozen:
+                return self
+
+            # make the graph read-only
+            graph = types.MappingProxyType(
+                {
+                    k: types.MappingProxyType(dict(v))
+                    for k, v in self._state.graph.items()
+                }
+            )
+            # the contents are unchanged, so the caches are still valid
+            old, state = self._state, self._new_state(graph)
+            state.shortestpaths = dict(old.shortestpaths)
+            state.composite_cache = dict(old.composite_cache)
+            state.dispatch_cache = dict(old.dispatch_cache)
+            state.dispatch_token = old.dispatch_token
+            self._build_all_transforms(state)
+
+            self._state = state
+            self._frozen = True
+
+        return self
+
+    # /def
+
+    def _build_all_transforms(self, state: _GraphState):
+        """Build the transforms between all connected data types."""
+        # All nodes that can be transformed into. Any other node can only be
+        # found by transforming to itself, which needs no search.
+        for totype in tuple(state.graph):
+            if totype not in state.shortestpaths:
+                self._construct_path(state, totype, totype)
+            for fromtype in state.shortestpaths[totype]:
+                self._get_transform(state, fromtype, totype)
+
+    # /def
+
+    def _reset_transforms(self):
+        """Rebuild the transforms, keeping the paths.
+
+        Unlike `invalidate_cache`, this is permitted for a frozen graph.
+
+        """
+        with self._lock:
+            state = self._new_state(keep_paths=True)
+            if self._frozen:
+                self._build_all_transforms(state)
+            self._state = state
+
+    # /def
+
+    # ------------------------------------------
+    # Snapshots
+
+    def snapshot(self) -> dict:
+        """Picklable snapshot of the graph and its shortest paths.
+
+        The snapshot can be sent to other processes, or saved to disk (see
+        `save`), and restored with `restore`, without the searches for the
+        shortest paths. The transforms are pickled, with their functions by
+        reference (their import path), so these must be importable, e.g.
+        not lambdas. Pickling a `TransformGraph` uses its snapshot.
+
+        Returns
+        -------
+        dict
+
+        """
+        state = self._state  # use one snapshot throughout
+        return {
+            "version": _SNAPSHOT_VERSION,
+            "graph": {k: dict(v) for k, v in state.graph.items()},
+            "shortestpaths": dict(state.shortestpaths),
+            "validate": self._validate,
+            "frozen": self._frozen,
+            "profile": self._profile,
+            "costs": self._costs,
+        }
+
+    # /def
+
+    @classmethod
+    def restore(cls, snapshot: dict):
+        """Graph from a `snapshot`.
+
+        Parameters
+        ----------
+        snapshot : dict
+
+        Returns
+        -------
+        `TransformGraph`
+            Frozen if the snapshot is of a frozen graph, in which case the
+            transforms are rebuilt from the snapshot's paths.
+
+        Raises
+        ------
+        ValueError
+            If the snapshot is of an unsupported format version.
+
+        """
+        self = cls.__new__(cls)
+        self.__setstate__(snapshot)
+        return self
+
+    # /def
+
+    def __getstate__(self) -> dict:
+        """State for pickling. See `snapshot`."""
+        return self.snapshot()
+
+    # /def
+
+    def __setstate__(self, snapshot: dict):
+        """Restore from pickling. See `restore`."""
+        version = snapshot.get("version")
+        if version != _SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported snapshot version {version}")
+
+        self.__init__(seed_basic=False, validate=snapshot["validate"])
+
+        self._profile = snapshot["profile"]
+        self._costs = snapshot["costs"]
+        if self._costs is not None:  # the paths are for these weights
+            self._costs.on_replan = self._auto_replan
+
+        state = self._new_state(dict(snapshot["graph"]))
+        state.shortestpaths = dict(snapshot["shortestpaths"])
+        self._state = state
+
+        if snapshot["frozen"]:
+            self.freeze()
+
+    # /def
+
+    def save(self, fname: str, **kwargs):
+        """Save a `snapshot` to a file.
+
+        Parameters
+        ----------
+        fname : str
+        **kwargs
+            Into `~utilipy.utils.pickle.dump`.
+
+        """
+        pickle.dump(self.snapshot(), fname, **kwargs)
+
+    # /def
+
+    @classmethod
+    def load(cls, fname: str, **kwargs):
+        """Load a graph saved with `save`.
+
+        Parameters
+        ----------
+        fname : str
+        **kwargs
+            Into `~utilipy.utils.pickle.load`.
+
+        Returns
+        -------
+        `TransformGraph`
+
+        """
+        return cls.restore(pickle.load(fname, **kwargs))
+
+    # /def
+
+    # ------------------------------------------
+    # Profiling
+
+    @property
+    def profile(self) -> T.Optional[TransformProfile]:
+        """The `TransformProfile` of the transforms, or None if not profiling.
+
+        See `enable_profiling`.
+
+        """
+        return self._profile
+
+    # /def
+
+    def enable_profiling(self, reset: bool = False) -> TransformProfile:
+        """Record the calls of each transformation edge.
+
+        The transforms from `get_transform` (and so `transform_many` and
+        `function_decorator`) record, for each edge, the number of
+        transformed objects, the cumulative time, and the cumulative size of
+        the outputs. This adds overhead to every transformation.
+
+        Parameters
+        ----------
+        reset : bool
+            Whether to clear any previously recorded statistics.
+
+        Returns
+        -------
+        `TransformProfile`
+            Also available as `profile`. See `TransformProfile.report` and
+            `TransformProfile.to_dict`.
+
+        """
+        with self._lock:
+            if self._profile is None:
+                self._profile = TransformProfile()
+                self._reset_transforms()
+            elif reset:
+                self._profile.reset()
+
+        return self._profile
+
+    # /def
+
+    def disable_profiling(self) -> T.Optional[TransformProfile]:
+        """Stop recording the calls of each transformation edge.
+
+        Returns
+        -------
+        `TransformProfile` or None
+            The recorded statistics, if profiling was enabled.
+
+        """
+        with self._lock:
+            profile, self._profile = self._profile, None
+            if profile is not None:
+                self._reset_transforms()
+
+        return profile
+
+    # /def
+
+    def _recorder(self):
+        """The object recording the calls of each transformation, or None."""
+        recorders = [r for r in (self._profile, self._costs) if r is not None]
+        if len(recorders) < 2:
+            return recorders[0] if recorders else None
+        return _Recorders(*recorders)
+
+    # /def
+
+    # ------------------------------------------
+    # Adaptive Weights
+
+    @property
+    def costs(self) -> T.Optional[TransformCosts]:
+        """The learned `TransformCosts` of the edges, or None if not adaptive.
+
+        See `enable_adaptive`.
+
+        """
+        return self._costs
+
+    # /def
+
+    def enable_adaptive(
+        self,
+        alpha: float = 0.2,
+        size_scaled: bool = False,
+        replan_every: T.Optional[int] = 1000,
+        costs: T.Optional[TransformCosts] = None,
+    ) -> TransformCosts:
+        """Weight the edges by their measured timings.
+
+        The transforms from `get_transform` time each of their steps and the
+        edges are weighted by a moving average of these timings, instead of
+        their static ``priority``. `find_shortest_path` then finds the
+        fastest chain of transformations, rather than the fewest hops.
+        The paths are re-planned with the latest weights every
+        ``replan_every`` calls, or with `replan`.
+
+        Parameters
+        ----------
+        alpha : float, optional
+            The smoothing factor of the moving average, in (0, 1].
+        size_scaled : bool, optional
+            Whether to weight by the time per byte of output, rather than
+            the time per call.
+        replan_every : int or None, optional
+            The number of calls between re-planning. If None, the paths are
+            only re-planned by `replan`.
+        costs : `TransformCosts` or None, optional
+            Previously learned weights (see `TransformCosts.load`). If given,
+            ``alpha``, ``size_scaled``, and ``replan_every`` are ignored.
+
+        Returns
+        -------
+        `TransformCosts`
+            Also available as `costs`. See `TransformCosts.save`.
+
+        Notes
+        -----
+        A frozen graph (see `freeze`) learns the weights but is never
+        re-planned.
+
+        """
+        if costs is None:
+            costs = TransformCosts(
+                alpha=alpha, size_scaled=size_scaled, replan_every=replan_every
+            )
+
+        with self._lock:
+            if self._costs is not None:
+                self._costs.on_replan = None
+            self._costs = costs
+            costs.on_replan = self._auto_replan
+
+            if self._frozen:
+                self._reset_transforms()  # only to time the steps
+            else:
+                self.replan()
+
+        return costs
+
+    # /def
+
+    def disable_adaptive(self) -> T.Optional[TransformCosts]:
+        """Weight the edges by their static ``priority``.
+
+        Returns
+        -------
+        `TransformCosts` or None
+            The learned weights, if adaptive weighting was enabled.
+
+        """
+        with self._lock:
+            costs, self._costs = self._costs, None
+            if costs is not None:
+                costs.on_replan = None
+                if self._frozen:
+                    self._reset_transforms()
+                else:
+                    self.replan()
+
+        return costs
+
+    # /def
+
+    def replan(self):
+        """Find the shortest paths again, with the current edge weights.
+
+        Only the type names and `type_set` are kept. The cached transforms
+        follow the old paths, so, as with `invalidate_cache`, they are
+        rebuilt on the next lookup.
+
+        Raises
+        ------
+        RuntimeError
+            If the graph is frozen (see `freeze`).
+
+        """
+        with self._lock:
+            self._check_not_frozen()
+            self._state = self._new_state()
+
+    # /def
+
+    def _auto_replan(self):
+        """Periodic `replan`, called by the `TransformCosts`.
+
+        This is skipped if another thread is changing the graph, so the
+        transformation that triggered it is not blocked.
+
+        """
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if not self._frozen:
+                self.replan()
+        finally:
+            self._lock.release()
+
+    # /def
+
+    def _edge_weight(self, fromtype, totype, transform) -> float:
+        """The weight of an edge, used to find the shortest paths.
+
+        This is the ``priority`` of the transform, reduced for ``zero_copy``
+        transforms, or the learned weight (see `enable_adaptive`).
+
         """
-        self._cached_names_dct: T.Optional[dict] = None
-        self._cached_type_set: T.Optional[set] = None
-        # self._cached_frame_attributes = None
-        # self._cached_component_names = None
-        self._shortestpaths = {}
-        self._composite_cache = {}
+        priority = float(
+            transform.priority if hasattr(transform, "priority") else 1
+        )
+        if getattr(transform, "zero_copy", False):
+            priority *= _ZERO_COPY_WEIGHT
+        if self._costs is None:
+            return priority
+        return self._costs.weight((fromtype, totype), priority)
 
     # /def
 
+    # ------------------------------------------
+
     def add_transform(self, fromtype, totype, transform):
         """Add a new data transformation to the graph.
 
@@ -130,7 +739,6 @@ class TransformGraph:
 
            - support an "Any" option in fromtype
            - support adding a tuple of types as the "fromtype"
-           - support subtypes in "fromtype"
 
         Parameters
         ----------
@@ -148,6 +756,8 @@ class TransformGraph:
         TypeError
             If ``fromtype`` or ``totype`` are not classes or ``transform`` is
             not callable.
+        RuntimeError
+            If the graph is frozen (see `freeze`).
 
         """
         if not inspect.isclass(fromtype) and fromtype is not None:
@@ -157,12 +767,13 @@ class TransformGraph:
         if not callable(transform):
             raise TypeError("transform must be callable")
 
-        type_set = self.type_set.copy()
-        type_set.add(fromtype)
-        type_set.add(totype)
+        with self._lock:
+            self._check_not_frozen()
 
-        self._graph[totype][fromtype] = transform
-        self.invalidate_cache()
+            # copy-on-write, so readers of the current snapshot are unaffected
+            graph = dict(self._state.graph)
+            graph[totype] = {**graph.get(totype, {}), fromtype: transform}
+            self._state = self._new_state(graph)
 
     # /def
 
@@ -188,6 +799,11 @@ class TransformGraph:
             and ``totype`` and ``fromtype`` are supplied, there will be no
             check to ensure the correct object is removed.
 
+        Raises
+        ------
+        RuntimeError
+            If the graph is frozen (see `freeze`).
+
         """
         if fromtype is None or totype is None:
             if not (totype is None and fromtype is None):
@@ -197,138 +813,120 @@ class TransformGraph:
             if transform is None:
                 raise ValueError("cannot give all Nones to remove_transform")
 
-            # search for the requested transform by brute force and remove it
-            for a in self._graph:
-                agraph = self._graph[a]
-                for b in agraph:
-                    if agraph[b] is transform:
-                        del agraph[b]
-                        fromtype = a
-                        break
-
-                # If transform was found, need to break out of outer loop
-                if fromtype:
-                    break
-            else:
-                raise ValueError(
-                    "Could not find transform {} in the "
-                    "graph".format(transform)
+        with self._lock:
+            self._check_not_frozen()
+
+            # copy-on-write, so readers of the current snapshot are unaffected
+            graph = dict(self._state.graph)
+
+            if fromtype is None and totype is None:
+                # search for the requested transform by brute force
+                edges = (
+                    (a, b)
+                    for a, agraph in graph.items()
+                    for b, t in agraph.items()
+                    if t is transform
                 )
+                edge = next(edges, None)
+                if edge is None:
+                    raise ValueError(
+                        "Could not find transform {} in the "
+                        "graph".format(transform)
+                    )
+                totype, fromtype = edge
 
-        else:
+            tograph = dict(graph.get(totype, {}))
             if transform is None:
-                self._graph[totype].pop(fromtype, None)
+                tograph.pop(fromtype, None)
+            elif tograph.get(fromtype, None) is transform:
+                tograph.pop(fromtype)
             else:
-                curr = self._graph[totype].get(fromtype, None)
-                if curr is transform:
-                    self._graph[totype].pop(fromtype)
-                else:
-                    raise ValueError(
-                        "Current transform from {} to {} is not "
-                        "{}".format(fromtype, totype, transform)
-                    )
+                raise ValueError(
+                    "Current transform from {} to {} is not "
+                    "{}".format(fromtype, totype, transform)
+                )
 
-        # Remove the subgraph if it is now empty
-        if self._graph[totype] == {}:
-            self._graph.pop(totype)
+            # Remove the subgraph if it is now empty
+            if tograph:
+                graph[totype] = tograph
+            else:
+                graph.pop(totype, None)
 
-        self.invalidate_cache()
+            self._state = self._new_state(graph)
 
     # /def
 
-    def _construct_path(self, fromtype, totype):
+    def _construct_path(self, state: _GraphState, fromtype, totype):
         """Construct path using Dijkstra's algorithm.
 
+        The search runs over the reversed graph from ``totype``, so a single
+        call finds the shortest path from *every* data type to ``totype``.
+        These are cached in the snapshot's ``shortestpaths[totype]``.
+
         Parameters
         ----------
-        fromtype
-        totype
+        state : `_GraphState`
+            The snapshot of the graph to search.
+        fromtype : class
+        totype : class
 
         Returns
         -------
-        path : list
-        priority : int
+        path : list or None
+        priority : float
 
         """
         inf = float("inf")
+        graph = state.graph
 
-        nodes = []
-        # first make the list of nodes
-        for a in self._graph:
-            if a not in nodes:
-                nodes.append(a)
-            for b in self._graph[a]:
-                if b not in nodes:
-                    nodes.append(b)
-
-        if fromtype not in nodes or totype not in nodes:
-            # fromtype or totype are isolated or not registered, so there's
-            # certainly no way to get from one to the other
+        if totype not in graph:
+            # totype is isolated or not registered, so there's
+            # certainly no way to get to it from anything else
             return None, inf
 
-        edgeweights = {}
-        # construct another graph that is a dict of dicts of priorities
-        # (used as edge weights in Dijkstra's algorithm)
-        for a in self._graph:
-            edgeweights[a] = aew = {}
-            agraph = self._graph[a]
-            for b in agraph:
-                aew[b] = float(
-                    agraph[b].priority if hasattr(agraph[b], "priority") else 1
-                )
-
-        # entries in q are [distance, count, nodeobj, pathlist]
+        # entries in q are (distance, count, node).
         # count is needed because in py 3.x, tie-breaking fails on the nodes.
-        # this way, insertion order is preserved if the weights are the same
-        # q = [[inf,i,n,[]] for i, n in enumerate(nodes) if n is not fromtype]
-        # q.insert(0, [0, -1, fromtype, []])
-        q = [[inf, i, n, []] for i, n in enumerate(nodes) if n is not totype]
-        q.insert(0, [0, -1, totype, []])
-
-        # this dict stores the distance to node from ``fromtype`` and the path
-        result = {}
-
-        # definitely starts as a valid heap because of the insert line;
-        # from the node to itself is always the shortest distance
-        while len(q) > 0:
-            d, orderi, n, path = heapq.heappop(q)
-
-            if d == inf:
-                # everything left is unreachable from fromtype,
-                # just copy them to the results and jump out of the loop
-                result[n] = (None, d)
-                for d, orderi, n, path in q:
-                    result[n] = (None, d)
-                break
-            else:
-                result[n] = (path, d)
-                path.append(n)
-                if n not in edgeweights:
-                    # a system that can be transformed to, but not from.
+        # this way, insertion order is preserved if the weights are the same.
+        # Nodes are not re-prioritized in-place. Instead, a new entry is pushed
+        # and the stale ones are skipped when popped ("lazy deletion").
+        count = itertools.count()
+        q = [(0.0, next(count), totype)]
+        edge_weight = self._edge_weight
+
+        distance = {totype: 0.0}  # best distance found so far
+        nextnode = {}  # next node along the path to ``totype``
+        visited = set()  # finalized nodes
+        order = []  # finalized nodes, in order of distance
+
+        while q:
+            d, _, n = heapq.heappop(q)
+
+            if n in visited:
+                continue  # stale entry for an already finalized node
+            visited.add(n)
+            order.append(n)
+
+            # the graph is in reverse order, so these are the nodes that can
+            # be transformed into ``n``.
+            for n2, t in graph.get(n, {}).items():
+                if n2 in visited:
                     continue
-                for n2 in edgeweights[n]:
-                    if n2 not in result:  # already visited
-                        # find where n2 is in the heap
-                        for i in range(len(q)):
-                            if q[i][2] == n2:
-                                break
-                        else:
-                            raise ValueError(
-                                "n2 not in heap - this should be impossible!"
-                            )
-
-                        newd = d + edgeweights[n][n2]
-                        if newd < q[i][0]:
-                            q[i][0] = newd
-                            q[i][3] = list(path)
-                            heapq.heapify(q)
-
-        # cache for later use
-        # self._shortestpaths[totype] = result # FIXME
-        # return result[fromtype]
-        # FIXME
-        path, d = result[fromtype]
-        return path[::-1], d
+                newd = d + edge_weight(n2, n, t)
+                if newd < distance.get(n2, inf):
+                    distance[n2] = newd
+                    nextnode[n2] = n
+                    heapq.heappush(q, (newd, next(count), n2))
+
+        # build the paths outwards from ``totype``. Since nodes are finalized
+        # in order of distance, the rest of a node's path is already known.
+        paths = {totype: [totype]}
+        for n in order[1:]:
+            paths[n] = [n] + paths[nextnode[n]]
+
+        result = {n: (paths[n], distance[n]) for n in order}
+        state.shortestpaths[totype] = result
+
+        return result.get(fromtype, (None, inf))
 
     # /def
 
@@ -351,43 +949,63 @@ class TransformGraph:
         distance : number
             The total distance/priority from ``fromtype`` to ``totype``.  If
             priorities are not set this is the number of transforms
-            needed. Is ``inf`` if there is no possible path.
+            needed. With adaptive weights (see `enable_adaptive`), it is
+            the estimated cost. Is ``inf`` if there is no possible path.
 
         """
+        path, priority = self._find_path(self._state, fromtype, totype)
+
+        # copy, so the cached path cannot be modified
+        return (list(path) if path is not None else None), priority
+
+    # /def
+
+    def _find_path(self, state: _GraphState, fromtype, totype):
+        """`find_shortest_path` in a snapshot. The path must not be modified.
+
+        Parameters
+        ----------
+        state : `_GraphState`
+        fromtype, totype : class
+
+        Returns
+        -------
+        path : list of classes or `None`
+        distance : number
+
+        """
+        tograph = state.graph.get(totype, {})
+
         # ----------------------------------
         # special-case the 0 or 1-path
 
         if totype is fromtype:
-            if fromtype not in self._graph[totype]:
+            if fromtype not in tograph:
                 # Means there's no transform necessary to go from it to itself.
                 return [totype], 0
 
-        if fromtype in self._graph[totype]:
+        if fromtype in tograph and (self._costs is None or totype is fromtype):
             # this will also catch the case where totype is fromtype, but has
-            # a defined transform.
-            t = self._graph[totype][fromtype]
+            # a defined transform, which is kept whatever the weights. With
+            # adaptive weights, a chain of transformations between different
+            # types may be faster, so the full search is needed.
+            t = tograph[fromtype]
             return (
                 [fromtype, totype],
-                float(t.priority if hasattr(t, "priority") else 1),
+                self._edge_weight(fromtype, totype, t),
             )
 
         # ----------------------------------
         # otherwise, need to construct the path:
 
-        inf = float("inf")
-
         # TODO verify this works for catch-alls
-        if totype in self._shortestpaths:
-            # already have a cached result
-            fpaths = self._shortestpaths[totype]
-            if fromtype in fpaths:
-                return fpaths[fromtype]
-            else:
-                path, priority = None, inf
-
-        path, priority = self._construct_path(fromtype, totype)
+        paths = state.shortestpaths.get(totype)
+        if paths is not None:  # already have a cached result
+            return paths.get(fromtype, (None, float("inf")))
+        elif not tograph:  # nothing can be transformed into ``totype``
+            return None, float("inf")
 
-        return path, priority
+        return self._construct_path(state, fromtype, totype)
 
     # /def
 
@@ -416,31 +1034,222 @@ class TransformGraph:
         intermediate steps of transformations in a way that is consistent with
         1-hop transformations.
 
+        If ``fromtype`` is not registered, or has no path to ``totype``,
+        the transform for the nearest class in its method resolution order
+        with a path to ``totype`` is used instead. Lastly, registered
+        abstract base classes of ``fromtype`` (see `abc.ABCMeta.register`)
+        are tried, in order of path distance.
+
+        The results are cached per ``(fromtype, totype)`` until the next
+        call to `invalidate_cache`, or an abstract base class gains a virtual
+        subclass, similar to `functools.singledispatch`.
+
+        Paths are found from the types alone, not the data. In the default
+        transformations, routes from `~numpy.ndarray` through
+        `~astropy.table.Table` (e.g. to `~astropy.table.QTable`) are only
+        valid for structured arrays, and raise a `TypeError` for plain ones.
+
+        """
+        state = self._state  # use one snapshot throughout
+
+        # same invalidation as ``functools.singledispatch``
+        token = abc.get_cache_token()
+        if state.dispatch_token != token:
+            state.dispatch_cache = {}
+            state.dispatch_token = token
+
+        try:  # fast path: already resolved
+            return state.dispatch_cache[(fromtype, totype)]
+        except KeyError:
+            pass
+
+        return self._get_transform(state, fromtype, totype)
+
+    # /def
+
+    def _get_transform(self, state: _GraphState, fromtype, totype):
+        """`get_transform` in a snapshot, without the fast path.
+
+        Parameters
+        ----------
+        state : `_GraphState`
+        fromtype, totype : class
+
+        Returns
+        -------
+        trans : `CompositeTransform` or `None`
+
         """
         if not inspect.isclass(fromtype) and fromtype is not None:
             raise TypeError("fromtype is not a class")
         if not inspect.isclass(totype) and totype is not None:
             raise TypeError("totype is not a class")
 
-        path, distance = self.find_shortest_path(fromtype, totype)
+        comptrans = self._get_composite(state, fromtype, totype)
 
-        if path is None:
-            return None
+        if comptrans is None and fromtype is not None:
+            comptrans = self._resolve_subtype(state, fromtype, totype)
+
+        state.dispatch_cache[(fromtype, totype)] = comptrans
 
-        transforms = []
-        currtype = path[0]
-        for p in path[1:]:  # first element is fromtype so we skip it
-            transforms.append(self._graph[p][currtype])
-            currtype = p
+        return comptrans
+
+    # /def
 
+    def _get_composite(self, state: _GraphState, fromtype, totype):
+        """`CompositeTransform` for the exact ``fromtype``.
+
+        Parameters
+        ----------
+        state : `_GraphState`
+        fromtype : class
+        totype : class
+
+        Returns
+        -------
+        trans : `CompositeTransform` or `None`
+            `None` if there is no path from ``fromtype`` to ``totype``.
+
+        """
         fttuple = (fromtype, totype)
-        if fttuple not in self._composite_cache:
+        if fttuple in state.composite_cache:  # fast path: already built
+            return state.composite_cache[fttuple]
+
+        path, distance = self._find_path(state, fromtype, totype)
+
+        if path is None:
+            comptrans = None
+        else:
+            transforms = []
+            currtype = path[0]
+            for p in path[1:]:  # first element is fromtype so we skip it
+                transforms.append(state.graph[p][currtype])
+                currtype = p
+
             comptrans = CompositeTransform(
-                transforms, fromtype, totype, register_graph=False
+                transforms,
+                fromtype,
+                totype,
+                register_graph=False,
+                validate=self._validate,
+                profile=self._recorder(),
             )
-            self._composite_cache[fttuple] = comptrans
 
-        return self._composite_cache[fttuple]
+        # cache the result, even if there is no path.
+        state.composite_cache[fttuple] = comptrans
+
+        return comptrans
+
+    # /def
+
+    def _resolve_subtype(self, state: _GraphState, fromtype, totype):
+        """Transform for the nearest base class of ``fromtype``.
+
+        Parameters
+        ----------
+        state : `_GraphState`
+        fromtype : class
+        totype : class
+
+        Returns
+        -------
+        trans : `CompositeTransform` or `None`
+            `None` if no base class of ``fromtype`` has a path to ``totype``.
+
+        """
+        # 1) real base classes, in method resolution order
+        for base in fromtype.__mro__[1:]:
+            comptrans = self._get_composite(state, base, totype)
+            if comptrans is not None:
+                return comptrans
+
+        # 2) virtual base classes. These have no well-defined order, so the
+        # one with the shortest path is used, with ties broken by the order
+        # in which they were added to the graph.
+        mro = set(fromtype.__mro__)
+        nodes = dict.fromkeys(
+            itertools.chain(state.graph, *state.graph.values())
+        )
+        bases = [
+            t
+            for t in nodes
+            if t not in mro and inspect.isclass(t) and issubclass(fromtype, t)
+        ]
+        distances = [self._find_path(state, t, totype)[1] for t in bases]
+        if distances and min(distances) < float("inf"):
+            base = bases[distances.index(min(distances))]
+            return self._get_composite(state, base, totype)
+
+        return None
+
+    # /def
+
+    def transform_many(self, items: T.Iterable, totype) -> list:
+        """Transform many objects to the same data type.
+
+        The items are grouped by type and the transform for each type is
+        found once. Each group is transformed in one batch, using the
+        vectorized ``batch_func`` of the transforms where defined
+        (see `DataTransform`).
+
+        Parameters
+        ----------
+        items : iterable
+            The objects to transform.
+        totype : class
+            The data class to transform into.
+
+        Returns
+        -------
+        list
+            The transformed ``items``, in the same order. An awaitable of
+            the list if any of the transforms is asynchronous (see
+            `DataTransform`), in which case the groups are transformed
+            concurrently.
+
+        Raises
+        ------
+        TypeError
+            If there is no transformation from the type of any item to
+            ``totype``.
+
+        """
+        items = list(items)
+
+        fromtypes = set(map(type, items))
+        if len(fromtypes) == 1:  # no need to split into groups and recombine
+            fromtype = fromtypes.pop()
+            groups = {fromtype if fromtype is not type(None) else None: None}
+        else:  # group the items by type.
+            groups = {}
+            for i, x in enumerate(items):
+                groups.setdefault(
+                    type(x) if x is not None else None, []
+                ).append(i)
+
+        results = [None] * len(items)
+        pending = []  # (indices, awaitable) of asynchronous transforms
+        for fromtype, indices in groups.items():
+            t = self.get_transform(fromtype, totype)
+            if t is None:
+                raise TypeError(
+                    f"no transformation from {fromtype} to {totype}"
+                )
+
+            if indices is None:  # all the items
+                return t.batch(items)
+
+            todatas = t.batch([items[i] for i in indices])
+            if t.is_async:
+                pending.append((indices, todatas))
+                continue
+            for i, todata in zip(indices, todatas):
+                results[i] = todata
+
+        if pending:
+            return _gather_groups(results, pending)
+
+        return results
 
     # /def
 
@@ -555,6 +1364,7 @@ class TransformGraph:
         self,
         function: T.Optional[T.Callable] = None,
         *,
+        _lazy: bool = False,
         _doc_style: str = "numpy",
         _doc_fmt: T.Dict[str, T.Any] = {},
         **arguments,
@@ -582,13 +1392,42 @@ class TransformGraph:
 
         Other Parameters
         ----------------
+        _lazy : bool, optional
+            Whether to pass each transformed argument as a
+            `~utilipy.data_utils.xfm.transformations.LazyTransformResult`,
+            which only runs the transformation when the argument is first
+            used, e.g. by an attribute access. This skips expensive
+            transformations of arguments that `function` does not use, but
+            adds a little overhead to using them. Asynchronous
+            transformations are not lazy.
         _doc_style: str or formatter, optional
             `function` docstring style. Parameter to `wraps`.
         _doc_fmt: dict, optional
             `function` docstring format arguments. Parameter to `wraps`.
 
+        Raises
+        ------
+        TypeError
+            When called, if there is no transformation for an argument, or the
+            transformation is asynchronous and `function` is not a coroutine
+            function.
+
         Notes
         -----
+        The location of each argument in the call's ``args`` and ``kwargs``
+        is found when decorating, and the transform for each argument type is
+        cached, so arguments that are already of the desired type pass
+        through with little overhead.
+
+        If `function` is a coroutine function, so is the wrapper. It can use
+        asynchronous transforms (see `DataTransform`), e.g. to load files,
+        and the arguments are transformed concurrently.
+
+        The transforms are chosen by the argument's type, as in
+        `get_transform`, so a plain `~numpy.ndarray` argument with a default
+        route through `~astropy.table.Table` raises a `TypeError`, as only
+        structured arrays can be made into tables.
+
         .. todo::
 
             - scrape output type from function argument annotation
@@ -599,66 +1438,23 @@ class TransformGraph:
         if function is None:  # allowing for optional arguments
             return functools.partial(
                 self.function_decorator,
+                _lazy=_lazy,
                 _doc_style=_doc_style,
                 _doc_fmt=_doc_fmt,
                 **arguments,
             )
 
-        sig = inspect.fuller_signature(function)
         _doc_fmt.update({"argkeys": ", ".join(arguments.keys())})
 
-        @functools.wraps(function, _doc_style=_doc_style, _doc_fmt=_doc_fmt)
-        def wrapper(*args, _skip_decorator=False, **kwargs):
-            """Wrapper docstring.
-
-            Other Parameters
-            ----------------
-            _skip_decorator : bool, optional
-                Whether to skip the decorator.
-                default {_skip_decorator}
-
-            Notes
-            -----
-            This function is wrapped with a data `~TransformGraph` decorator.
-            See `~TransformGraph.function_decorator` for details.
-            The transformation arguments are also attached to this function
-            as the attribute ``._transforms``.
-            The affected arguments are: {argkeys}
-
-            """
-            if _skip_decorator:  # whether to skip decorator or keep going
-                return function(*args, **kwargs)
-            # else:
-
-            ba = sig.bind_partial_with_defaults(*args, **kwargs)
-
-            for name, outtype in arguments.items():
-                data = ba.arguments[name]  # get the data to be transformed
-
-                # The values are either the desired output type
-                # or a 3-element *tuple* in the following order
-                # (outtype, (args), dict(kwargs)). The args and kwargs
-                # are passed into the transformation.
-                t_args, t_kw = (), {}  # assume no input (kw)args
-                if isinstance(outtype, tuple):  # output type or info tuple
-                    if len(outtype) == 3:  # it's an info tuple
-                        outtype, t_args, t_kw = outtype
-
-                # get transformation
-                fromtype = type(data) if data is not None else None
-                t = self.get_transform(fromtype, outtype)
-                # print(t, type(data), outtype)
-                # apply transformation
-                ba.arguments[name] = t(data, *t_args, **t_kw)
-
-            # /def
-
-            return_ = function(*ba.args, **ba.kwargs)
-
-            return return_
-
-        # /def
+        xfms = _ArgumentTransforms(self, function, arguments, lazy=_lazy)
+        if xfms.is_async:
+            wrapper = _make_async_wrapper(xfms)
+        else:
+            wrapper = _make_wrapper(xfms)
 
+        wrapper = functools.wraps(
+            function, _doc_style=_doc_style, _doc_fmt=_doc_fmt
+        )(wrapper)
         wrapper._transforms = arguments
 
         return wrapper
@@ -678,5 +1474,324 @@ class TransformGraph:
 # /class
 
 
+##############################################################################
+
+
+async def _gather_groups(results: list, pending: list) -> list:
+    """Await the asynchronous groups of `TransformGraph.transform_many`.
+
+    Parameters
+    ----------
+    results : list
+        The transformed items, to be filled in.
+    pending : list
+        ``(indices, awaitable)`` of the groups still to be transformed.
+
+    Returns
+    -------
+    results : list
+
+    """
+    batches = await asyncio.gather(*(todatas for _, todatas in pending))
+    for (indices, _), todatas in zip(pending, batches):
+        for i, todata in zip(indices, todatas):
+            results[i] = todata
+
+    return results
+
+
+# /def
+
+
+##############################################################################
+# function_decorator
+
+
+def _argument_specs(
+    sig: inspect.FullerSignature, arguments: T.Dict[str, T.Any]
+) -> T.Tuple[T.List[tuple], bool]:
+    """Where to find, and how to transform, the decorated arguments.
+
+    Precomputing, for each transformed argument, where to find it in the
+    call's ``args`` and ``kwargs`` means the signature need not be bound
+    on every call. Arguments that cannot be located this way, like
+    positional-only or variadic ones, fall back to binding.
+
+    Parameters
+    ----------
+    sig : `~utilipy.utils.inspect.FullerSignature`
+        Signature of the decorated function.
+    arguments : dict
+        See `TransformGraph.function_decorator`.
+
+    Returns
+    -------
+    specs : list of tuple
+        (name, index in ``args`` or None, default, outtype, transform args,
+        transform kwargs, index of the type -> transform cache)
+    needs_binding : bool
+        Whether the signature must be bound to find the arguments.
+
+    """
+    specs = []
+    needs_binding = False
+    positional = (inspect.POSITIONAL_ONLY, inspect.POSITIONAL_OR_KEYWORD)
+    for index, (name, param) in enumerate(sig.parameters.items()):
+        if name not in arguments:
+            continue
+        elif param.kind not in (
+            inspect.POSITIONAL_OR_KEYWORD,
+            inspect.KEYWORD_ONLY,
+        ):
+            needs_binding = True
+
+        # The values are either the desired output type
+        # or a 3-element *tuple* in the following order
+        # (outtype, (args), dict(kwargs)). The args and kwargs
+        # are passed into the transformation.
+        outtype, t_args, t_kw = arguments[name], (), {}
+        if isinstance(outtype, tuple):  # output type or info tuple
+            if len(outtype) == 3:  # it's an info tuple
+                outtype, t_args, t_kw = outtype
+
+        specs.append(
+            (
+                name,
+                index if param.kind in positional else None,
+                param.default,
+                outtype,
+                tuple(t_args),
+                dict(t_kw),
+                len(specs),  # index of the type -> transform cache
+            )
+        )
+
+    return specs, needs_binding
+
+
+# /def
+
+
+class _ArgumentTransforms:
+    """The argument transformations of a decorated function.
+
+    Parameters
+    ----------
+    graph : `TransformGraph`
+    function : callable
+        The decorated function.
+    arguments : dict
+        See `TransformGraph.function_decorator`.
+    lazy : bool
+        Whether to pass the transformed arguments as `LazyTransformResult`.
+
+    """
+
+    def __init__(
+        self,
+        graph: TransformGraph,
+        function: T.Callable,
+        arguments: T.Dict[str, T.Any],
+        lazy: bool = False,
+    ):
+        self.graph = graph
+        self.function = function
+        self.lazy = lazy
+        self.sig = inspect.fuller_signature(function)
+        self.is_async = inspect.iscoroutinefunction(function)
+
+        missing = set(arguments).difference(self.sig.parameters)
+        if missing:
+            raise ValueError(f"{function} has no parameter(s) {missing}")
+        self.specs, self.needs_binding = _argument_specs(self.sig, arguments)
+
+        # The type -> transform caches, which are `None` if no transform is
+        # needed, are only valid for the graph as it was. They are replaced,
+        # not cleared, so a concurrent call cannot add a stale transform.
+        self._cache_state: tuple = (None, ())
+
+    # /def
+
+    def get(self, data, outtype, i: int):
+        """Transformation of ``data`` to ``outtype``, or `None` if none.
+
+        Parameters
+        ----------
+        data : Any
+        outtype : class
+        i : int
+            Index of the argument's type -> transform cache.
+
+        Returns
+        -------
+        `CompositeTransform` or None
+
+        Raises
+        ------
+        TypeError
+            If there is no transformation, or it is asynchronous and the
+            function is not a coroutine function.
+
+        """
+        key, caches = self._cache_state
+        current = (self.graph._state.generation, abc.get_cache_token())
+        if key != current:
+            caches = tuple({} for _ in self.specs)
+            self._cache_state = (current, caches)
+        cache = caches[i]
+
+        fromtype = type(data) if data is not None else None
+        if fromtype is LazyTransformResult:  # e.g. from another decorator
+            fromtype = data.__class__  # the type of the output
+        try:
+            return cache[fromtype]
+        except KeyError:
+            pass
+
+        t = self.graph.get_transform(fromtype, outtype)
+        if t is None:
+            raise TypeError(f"no transformation from {fromtype} to {outtype}")
+        elif not t.transforms:  # no transformation needed
+            t = None
+        elif t.is_async and not self.is_async:
+            raise TypeError(
+                f"the transformation from {fromtype} to {outtype} is "
+                f"asynchronous, so {self.function} must be a coroutine "
+                "function"
+            )
+        cache[fromtype] = t
+        return t
+
+    # /def
+
+    def apply(self, t: CompositeTransform, data, t_args, t_kw):
+        """Transform ``data``, lazily if ``lazy``."""
+        if type(data) is LazyTransformResult:  # transform the output
+            data = data.__wrapped__
+        if self.lazy:
+            return LazyTransformResult(t, data, *t_args, **t_kw)
+        return t(data, *t_args, **t_kw)
+
+    # /def
+
+
+# /class
+
+
+def _make_wrapper(xfms: _ArgumentTransforms) -> T.Callable:
+    """Wrapper of a function that transforms its arguments.
+
+    Parameters
+    ----------
+    xfms : `_ArgumentTransforms`
+
+    Returns
+    -------
+    wrapper : callable
+
+    """
+    function, sig, specs = xfms.function, xfms.sig, xfms.specs
+
+    def wrapper(*args, _skip_decorator=False, **kwargs):
+        if _skip_decorator:  # whether to skip decorator or keep going
+            return function(*args, **kwargs)
+        # else:
+
+        if xfms.needs_binding:
+            ba = sig.bind_partial_with_defaults(*args, **kwargs)
+
+            for name, _, _, outtype, t_args, t_kw, i in specs:
+                data = ba.arguments[name]  # get the data to be transformed
+                t = xfms.get(data, outtype, i)
+                if t is not None:
+                    ba.arguments[name] = xfms.apply(t, data, t_args, t_kw)
+
+            return function(*ba.args, **ba.kwargs)
+
+        # else: can find the arguments without binding
+        for name, index, default, outtype, t_args, t_kw, i in specs:
+            in_args = index is not None and index < len(args)
+            if in_args:
+                data = args[index]
+            elif name in kwargs:
+                data = kwargs[name]
+            elif default is not sig.empty:
+                data = default
+            else:  # missing argument. Let ``function`` raise the error.
+                continue
+
+            t = xfms.get(data, outtype, i)
+            if t is None:  # fast skip: already the correct type
+                continue
+
+            data = xfms.apply(t, data, t_args, t_kw)
+            if in_args:
+                args = args[:index] + (data,) + args[index + 1 :]
+            else:
+                kwargs[name] = data
+
+        return function(*args, **kwargs)
+
+    # /def
+
+    wrapper.__doc__ = _WRAPPER_DOC
+    return wrapper
+
+
+# /def
+
+
+def _make_async_wrapper(xfms: _ArgumentTransforms) -> T.Callable:
+    """Wrapper of a coroutine function that transforms its arguments.
+
+    The asynchronous transformations are run concurrently.
+
+    Parameters
+    ----------
+    xfms : `_ArgumentTransforms`
+
+    Returns
+    -------
+    wrapper : coroutine function
+
+    """
+    function, sig, specs = xfms.function, xfms.sig, xfms.specs
+
+    async def wrapper(*args, _skip_decorator=False, **kwargs):
+        if _skip_decorator:  # whether to skip decorator or keep going
+            return await function(*args, **kwargs)
+        # else:
+
+        ba = sig.bind_partial_with_defaults(*args, **kwargs)
+
+        names, pending = [], []  # the asynchronous transformations
+        for name, _, _, outtype, t_args, t_kw, i in specs:
+            if name not in ba.arguments:  # let ``function`` raise
+                continue
+            data = ba.arguments[name]  # get the data to be transformed
+            t = xfms.get(data, outtype, i)
+            if t is None:
+                continue
+            elif t.is_async:
+                names.append(name)
+                pending.append(t(data, *t_args, **t_kw))
+            else:
+                ba.arguments[name] = xfms.apply(t, data, t_args, t_kw)
+
+        # run the asynchronous transformations concurrently
+        for name, data in zip(names, await asyncio.gather(*pending)):
+            ba.arguments[name] = data
+
+        return await function(*ba.args, **ba.kwargs)
+
+    # /def
+
+    wrapper.__doc__ = _WRAPPER_DOC
+    return wrapper
+
+
+# /def
+
+
 ##############################################################################
 # END
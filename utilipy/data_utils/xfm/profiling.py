@@ -0,0 +1,606 @@
+# -*- coding: utf-8 -*-
+
+"""Data Transformation Profiling."""
+
+__author__ = "Nathaniel Starkman"
+
+
+__all__ = [
+    "TransformProfile",
+    "TransformCosts",
+]
+
+
+##############################################################################
+# IMPORTS
+
+# BUILT-IN
+import inspect
+import json
+import sys
+import threading
+import time
+import typing as T
+
+##############################################################################
+# CODE
+##############################################################################
+
+
+class TransformProfile:
+    """Per-edge call statistics of a `TransformGraph`.
+
+    For each transformation edge ``(fromtype, totype)`` this records the
+    number of transformed objects, the cumulative time spent in the
+    transformation, and the cumulative size, in bytes, of the outputs.
+    The size is the ``nbytes`` attribute of the output, if it has one
+    (e.g. `~numpy.ndarray`), otherwise `sys.getsizeof`.
+
+    Examples
+    --------
+    ::
+
+        graph.enable_profiling()
+        ...  # run transformations
+        print(graph.profile.report())
+
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()  # held by updates to the statistics
+        self._stats: T.Dict[tuple, list] = {}  # edge: [calls, time, bytes]
+
+    # /def
+
+    def record(self, edge: tuple, calls: int, seconds: float, nbytes: int):
+        """Record calls of a transformation.
+
+        Parameters
+        ----------
+        edge : tuple
+            ``(fromtype, totype)``
+        calls : int
+            The number of objects transformed.
+        seconds : float
+            The time taken to transform them.
+        nbytes : int
+            The size of the outputs.
+
+        """
+        with self._lock:
+            stats = self._stats.get(edge)
+            if stats is None:
+                self._stats[edge] = [calls, seconds, nbytes]
+            else:
+                stats[0] += calls
+                stats[1] += seconds
+                stats[2] += nbytes
+
+    # /def
+
+    def reset(self):
+        """Clear all the recorded statistics."""
+        with self._lock:
+            self._stats.clear()
+
+    # /def
+
+    def __getstate__(self) -> dict:
+        """State for pickling, without the lock."""
+        with self._lock:
+            return {"_stats": {k: list(v) for k, v in self._stats.items()}}
+
+    # /def
+
+    def __setstate__(self, state: dict):
+        """Restore from pickling."""
+        self.__init__()
+        self._stats.update(state["_stats"])
+
+    # /def
+
+    def __len__(self):
+        """Number of edges with recorded statistics."""
+        return len(self._stats)
+
+    # /def
+
+    def __getitem__(self, edge: tuple) -> dict:
+        """Statistics of an edge ``(fromtype, totype)``.
+
+        Returns
+        -------
+        dict
+            With keys "calls", "time" (seconds), and "bytes".
+
+        """
+        with self._lock:
+            calls, seconds, nbytes = self._stats[edge]
+        return {"calls": calls, "time": seconds, "bytes": nbytes}
+
+    # /def
+
+    def to_dict(self) -> T.Dict[str, dict]:
+        """Export the statistics, sorted by cumulative time.
+
+        Returns
+        -------
+        dict
+            Keys are "fromtype -> totype", using the import path of the
+            types. Values are dicts with keys "fromtype", "totype", "calls",
+            "time" (seconds), and "bytes".
+
+        """
+        with self._lock:  # a consistent copy
+            stats = {k: tuple(v) for k, v in self._stats.items()}
+        edges = sorted(stats, key=lambda e: -stats[e][1])
+
+        out = {}
+        for fromtype, totype in edges:
+            fromname, toname = _type_name(fromtype), _type_name(totype)
+            calls, seconds, nbytes = stats[(fromtype, totype)]
+            out[f"{fromname} -> {toname}"] = {
+                "fromtype": fromname,
+                "totype": toname,
+                "calls": calls,
+                "time": seconds,
+                "bytes": nbytes,
+            }
+
+        return out
+
+    # /def
+
+    def to_json(self, **kwargs) -> str:
+        """Export the statistics as JSON (see `to_dict`).
+
+        Parameters
+        ----------
+        **kwargs
+            Arguments into `json.dumps`.
+
+        Returns
+        -------
+        str
+
+        """
+        return json.dumps(self.to_dict(), **kwargs)
+
+    # /def
+
+    def report(self) -> str:
+        """Table of the statistics, sorted by cumulative time.
+
+        Returns
+        -------
+        str
+
+        """
+        rows = [
+            ("transformation", "calls", "time [s]", "per call [s]", "bytes")
+        ]
+        for name, stats in self.to_dict().items():
+            rows.append(
+                (
+                    name,
+                    str(stats["calls"]),
+                    f"{stats['time']:.3e}",
+                    f"{stats['time'] / stats['calls']:.3e}",
+                    str(stats["bytes"]),
+                )
+            )
+
+        widths = [max(len(row[i]) for row in rows) for i in range(5)]
+        lines = [
+            "  ".join(
+                [row[0].ljust(widths[0])]
+                + [c.rjust(w) for c, w in zip(row[1:], widths[1:])]
+            )
+            for row in rows
+        ]
+        lines.insert(1, "-" * len(lines[0]))
+
+        return "\n".join(lines)
+
+    # /def
+
+
+# /class
+
+
+# -------------------------------------------------------------------
+
+
+class TransformCosts:
+    """Edge weights of a `TransformGraph`, learned from measured timings.
+
+    Each transformation edge ``(fromtype, totype)`` is weighted by an
+    exponential moving average of its time per call, so the shortest path
+    is the fastest chain of transformations. If ``size_scaled``, the time
+    per byte of output is averaged instead, so the weights do not depend on
+    the size of the data that happened to be measured.
+
+    Parameters
+    ----------
+    alpha : float, optional
+        The smoothing factor of the moving average, in (0, 1]. Larger values
+        follow changes in the timings faster.
+    size_scaled : bool, optional
+        Whether to average the time per byte, rather than per call.
+    replan_every : int or None, optional
+        The number of recorded calls between calls to ``on_replan``.
+        If None, ``on_replan`` is never called.
+
+    Raises
+    ------
+    ValueError
+        If ``alpha`` is not in (0, 1] or ``replan_every`` is not positive.
+
+    Notes
+    -----
+    The weights can be saved between runs with `to_json` (or `save`) and
+    restored with `from_json` (or `load`).
+
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        size_scaled: bool = False,
+        replan_every: T.Optional[int] = 1000,
+    ):
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        if replan_every is not None and replan_every < 1:
+            raise ValueError("replan_every must be positive or None")
+
+        self.alpha = float(alpha)
+        self.size_scaled = bool(size_scaled)
+        self.replan_every = replan_every
+        self.on_replan: T.Optional[T.Callable] = None
+
+        self._lock = threading.Lock()  # held by updates to the weights
+        self._weights: T.Dict[tuple, float] = {}  # edge: weight
+        self._mean: T.Optional[float] = None  # mean of the weights
+        self._pending = 0  # calls since the last re-plan
+
+    # /def
+
+    def record(self, edge: tuple, calls: int, seconds: float, nbytes: int):
+        """Update the weight of an edge with a measurement.
+
+        Parameters
+        ----------
+        edge : tuple
+            ``(fromtype, totype)``
+        calls : int
+            The number of objects transformed.
+        seconds : float
+            The time taken to transform them.
+        nbytes : int
+            The size of the outputs.
+
+        """
+        if calls < 1:
+            return
+
+        if self.size_scaled:
+            value = seconds / max(nbytes, 1)
+        else:
+            value = seconds / calls
+
+        with self._lock:
+            weight = self._weights.get(edge)
+            if weight is None:
+                self._weights[edge] = value
+            else:
+                self._weights[edge] = weight + self.alpha * (value - weight)
+            self._mean = None
+
+            self._pending += calls
+            replan = (
+                self.replan_every is not None
+                and self._pending >= self.replan_every
+            )
+            if replan:
+                self._pending = 0
+
+        # outside the lock, as re-planning reads the weights
+        if replan and self.on_replan is not None:
+            self.on_replan()
+
+    # /def
+
+    def weight(self, edge: tuple, priority: float = 1.0) -> float:
+        """The weight of an edge.
+
+        Parameters
+        ----------
+        edge : tuple
+            ``(fromtype, totype)``
+        priority : float, optional
+            The static priority of the edge. Edges without measurements are
+            weighted by their priority times the mean of the measured
+            weights, so they are neither always preferred nor never tried.
+
+        Returns
+        -------
+        float
+
+        """
+        weight = self._weights.get(edge)
+        if weight is not None:
+            return weight
+
+        mean = self._mean
+        if mean is None:
+            with self._lock:
+                mean = self._mean = (
+                    sum(self._weights.values()) / len(self._weights)
+                    if self._weights
+                    else 1.0
+                )
+
+        return priority * mean
+
+    # /def
+
+    def reset(self):
+        """Forget all the learned weights."""
+        with self._lock:
+            self._weights.clear()
+            self._mean = None
+            self._pending = 0
+
+    # /def
+
+    def __len__(self):
+        """Number of edges with learned weights."""
+        return len(self._weights)
+
+    # /def
+
+    def __contains__(self, edge: tuple):
+        """Whether an edge ``(fromtype, totype)`` has a learned weight."""
+        return edge in self._weights
+
+    # /def
+
+    def __getstate__(self) -> dict:
+        """State for pickling, without the ``on_replan`` callback or lock."""
+        with self._lock:
+            state = self.__dict__.copy()
+            state["_weights"] = dict(self._weights)
+        state["on_replan"] = None
+        del state["_lock"]
+        return state
+
+    # /def
+
+    def __setstate__(self, state: dict):
+        """Restore from pickling."""
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    # /def
+
+    # ------------------------------------------
+    # Persistence
+
+    def to_dict(self) -> dict:
+        """Export the settings and learned weights.
+
+        Returns
+        -------
+        dict
+            With keys "alpha", "size_scaled", "replan_every", and "weights".
+            The weights are a list of dicts with keys "fromtype", "totype"
+            (the import paths of the types) and "weight".
+
+        """
+        with self._lock:
+            weights = list(self._weights.items())
+
+        return {
+            "alpha": self.alpha,
+            "size_scaled": self.size_scaled,
+            "replan_every": self.replan_every,
+            "weights": [
+                {
+                    "fromtype": _type_name(fromtype),
+                    "totype": _type_name(totype),
+                    "weight": weight,
+                }
+                for (fromtype, totype), weight in weights
+            ],
+        }
+
+    # /def
+
+    @classmethod
+    def from_dict(cls, dct: dict, types: T.Iterable):
+        """Restore from the output of `to_dict`.
+
+        Parameters
+        ----------
+        dct : dict
+        types : iterable of classes
+            The data types, to resolve the type names in ``dct``.
+            Typically ``TransformGraph.type_set``. Weights of edges with
+            unknown types are dropped.
+
+        Returns
+        -------
+        `TransformCosts`
+
+        """
+        self = cls(
+            alpha=dct.get("alpha", 0.2),
+            size_scaled=dct.get("size_scaled", False),
+            replan_every=dct.get("replan_every", 1000),
+        )
+
+        names = {_type_name(t): t for t in types}
+        names["None"] = None
+        for entry in dct.get("weights", ()):
+            fromname, toname = entry["fromtype"], entry["totype"]
+            if fromname in names and toname in names:
+                edge = (names[fromname], names[toname])
+                self._weights[edge] = float(entry["weight"])
+
+        return self
+
+    # /def
+
+    def to_json(self, **kwargs) -> str:
+        """Export as JSON (see `to_dict`).
+
+        Parameters
+        ----------
+        **kwargs
+            Arguments into `json.dumps`.
+
+        Returns
+        -------
+        str
+
+        """
+        return json.dumps(self.to_dict(), **kwargs)
+
+    # /def
+
+    @classmethod
+    def from_json(cls, string: str, types: T.Iterable):
+        """Restore from the output of `to_json` (see `from_dict`)."""
+        return cls.from_dict(json.loads(string), types)
+
+    # /def
+
+    def save(self, fname: str):
+        """Save to a JSON file (see `to_json`)."""
+        with open(fname, "w") as file:
+            file.write(self.to_json(indent=1))
+
+    # /def
+
+    @classmethod
+    def load(cls, fname: str, types: T.Iterable):
+        """Load from a JSON file (see `save` and `from_dict`)."""
+        with open(fname, "r") as file:
+            return cls.from_json(file.read(), types)
+
+    # /def
+
+
+# /class
+
+
+##############################################################################
+
+
+class _Recorders:
+    """Forward measurements to several recorders (see `_profiled`)."""
+
+    def __init__(self, *recorders):
+        self.recorders = recorders
+
+    def record(self, edge: tuple, calls: int, seconds: float, nbytes: int):
+        for recorder in self.recorders:
+            recorder.record(edge, calls, seconds, nbytes)
+
+
+# /class
+
+
+def _type_name(datatype) -> str:
+    """Import path of a data type. `None` is "None"."""
+    if datatype is None:
+        return "None"
+    return f"{datatype.__module__}.{datatype.__qualname__}"
+
+
+# /def
+
+
+def _sizeof(obj) -> int:
+    """Size of an object, in bytes."""
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    return sys.getsizeof(obj)
+
+
+# /def
+
+
+def _profiled(step: T.Callable, edge: tuple, profile):
+    """Record the calls of a single-argument transformation.
+
+    ``profile`` is a `TransformProfile`, `TransformCosts`, or any object
+    with the same ``record`` method.
+
+    """
+    perf_counter = time.perf_counter
+
+    def profiled_transform(fromdata):
+        tic = perf_counter()
+        todata = step(fromdata)
+        if inspect.isawaitable(todata):  # record once it is done
+            return _profiled_await(todata, edge, profile, tic)
+        profile.record(edge, 1, perf_counter() - tic, _sizeof(todata))
+        return todata
+
+    return profiled_transform
+
+
+# /def
+
+
+def _profiled_batch(step: T.Callable, edge: tuple, profile):
+    """Record the calls of a batch transformation."""
+    perf_counter = time.perf_counter
+
+    def profiled_batch_transform(fromdatas):
+        tic = perf_counter()
+        todatas = step(fromdatas)
+        if inspect.isawaitable(todatas):  # record once it is done
+            return _profiled_await(todatas, edge, profile, tic, many=True)
+        todatas = list(todatas)
+        seconds = perf_counter() - tic
+        nbytes = sum(_sizeof(todata) for todata in todatas)
+        profile.record(edge, len(todatas), seconds, nbytes)
+        return todatas
+
+    return profiled_batch_transform
+
+
+# /def
+
+
+async def _profiled_await(
+    todata, edge: tuple, profile, tic: float, many: bool = False
+):
+    """Await the output of an asynchronous transformation and record it.
+
+    The recorded time is from ``tic`` until the output is ready, so includes
+    any time spent waiting, e.g. for I/O.
+
+    """
+    todata = await todata
+    seconds = time.perf_counter() - tic
+
+    if many:
+        todata = list(todata)
+        nbytes = sum(_sizeof(x) for x in todata)
+        profile.record(edge, len(todata), seconds, nbytes)
+    else:
+        profile.record(edge, 1, seconds, _sizeof(todata))
+
+    return todata
+
+
+# /def
+
+
+##############################################################################
+# END
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# see LICENSE.rst
+
+"""Test contents of :mod:`~utilipy.data_utils.xfm`."""
+
+__all__ = [
+    "test_defaults",
+    "test_graph",
+    "test_profiling",
+    "test_transformations",
+]
+
+
+##############################################################################
+# IMPORTS
+
+# PROJECT-SPECIFIC
+from . import (
+    test_defaults,
+    test_graph,
+    test_profiling,
+    test_transformations,
+)
+
+##############################################################################
+# END
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+
+"""Test contents of :mod:`~utilipy.data_utils.xfm.defaults`."""
+
+__all__ = [
+    # functions
+    "test_seed_independent",
+    "test_zero_copy",
+    "test_copies",
+    "test_unstructured",
+    "test_prefer_zero_copy",
+]
+
+
+##############################################################################
+# IMPORTS
+
+# THIRD PARTY
+import numpy as np
+import pandas as pd
+import pytest
+from astropy.table import QTable, Table
+
+# PROJECT-SPECIFIC
+from utilipy.data_utils.xfm import DataTransform, TransformGraph
+
+##############################################################################
+# PARAMETERS
+
+
+def _make_array():
+    return np.array(
+        [(1.0, 1), (2.0, 2), (3.0, 3)], dtype=[("x", float), ("y", int)]
+    )
+
+
+# /def
+
+
+##############################################################################
+# CODE
+##############################################################################
+
+
+def test_seed_independent():
+    """Test seeded graphs do not share their transformations."""
+    graph1 = TransformGraph()
+    graph2 = TransformGraph()
+
+    assert graph1._graph is not graph2._graph
+    assert graph1._graph[tuple][list] is not graph2._graph[tuple][list]
+
+    DataTransform(lambda x: None, set, None, register_graph=graph1)
+    assert set in graph1.type_set
+    assert set not in graph2.type_set
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+@pytest.mark.parametrize(
+    "fromtype, totype",
+    [
+        (np.ndarray, np.recarray),
+        (np.recarray, np.ndarray),
+        (np.ndarray, Table),
+        (np.recarray, Table),
+        (np.ndarray, QTable),
+        (Table, QTable),
+        (QTable, Table),
+    ],
+)
+def test_zero_copy(fromtype, totype):
+    """Test the zero-copy conversions share the data."""
+    graph = TransformGraph()
+    arr = _make_array()
+    if fromtype is np.recarray:
+        fromdata = arr.view(np.recarray)
+    elif fromtype is np.ndarray:
+        fromdata = arr
+    else:
+        fromdata = fromtype(arr, copy=False)
+
+    trans = graph.get_transform(fromtype, totype)
+    assert trans.zero_copy
+
+    todata = trans(fromdata)
+    assert type(todata) is totype
+    x = todata["x"] if issubclass(totype, Table) else todata.view(np.ndarray)
+    assert np.shares_memory(x, arr)
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_copies():
+    """Test the copying conversions round-trip."""
+    graph = TransformGraph()
+    arr = _make_array()
+
+    df = graph.get_transform(np.ndarray, pd.DataFrame)(arr)
+    assert isinstance(df, pd.DataFrame)
+    assert list(df.columns) == ["x", "y"]
+
+    trans = graph.get_transform(pd.DataFrame, np.ndarray)
+    assert not trans.zero_copy
+    assert np.all(trans(df) == arr)
+
+    table = graph.get_transform(pd.DataFrame, QTable)(df)
+    assert isinstance(table, QTable)
+    assert np.all(table["x"] == arr["x"])
+
+    out = graph.get_transform(QTable, pd.DataFrame)(table)
+    assert out.equals(df)
+
+    out = graph.get_transform(QTable, np.recarray)(table)
+    assert isinstance(out, np.recarray)
+    assert np.all(out.x == arr["x"])
+
+
+# /def
+
+
+def test_unstructured():
+    """Test plain, not structured, arrays are not made into tables."""
+    graph = TransformGraph()
+    arr = np.arange(3.0)
+
+    with pytest.raises(TypeError, match="structured"):
+        graph.get_transform(np.ndarray, Table)(arr)
+    with pytest.raises(TypeError, match="structured"):
+        graph.get_transform(np.ndarray, QTable)(arr)
+
+    # the route to QTable is through Table, whichever the data
+    assert graph.find_shortest_path(np.ndarray, QTable)[0] == [
+        np.ndarray,
+        Table,
+        QTable,
+    ]
+
+    @graph.function_decorator(table=QTable)
+    def func(table):
+        return table
+
+    with pytest.raises(TypeError, match="structured"):
+        func(arr)
+    assert isinstance(func(_make_array()), QTable)
+
+    # a DataFrame has a row per element
+    df = graph.get_transform(np.ndarray, pd.DataFrame)(arr)
+    assert df.shape == (3, 1)
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_prefer_zero_copy():
+    """Test the path search prefers zero-copy conversions."""
+    graph = TransformGraph()
+
+    # the views are cheaper than a copying conversion.
+    assert graph.find_shortest_path(np.recarray, Table) == (
+        [np.recarray, np.ndarray, Table],
+        1.0,
+    )
+    assert graph.find_shortest_path(np.ndarray, QTable) == (
+        [np.ndarray, Table, QTable],
+        1.0,
+    )
+
+    # a zero-copy chain is preferred over an equal-priority copying one
+    graph = TransformGraph(seed_basic=False)
+    DataTransform(lambda x: x, int, float, register_graph=graph)
+    DataTransform(lambda x: x, float, complex, register_graph=graph)
+    DataTransform(lambda x: x, int, str, zero_copy=True, register_graph=graph)
+    DataTransform(
+        lambda x: x, str, complex, zero_copy=True, register_graph=graph
+    )
+    path, distance = graph.find_shortest_path(int, complex)
+    assert path == [int, str, complex]
+    assert distance == 1.0
+    assert graph.get_transform(int, complex).zero_copy
+
+
+# /def
+
+
+##############################################################################
+# END
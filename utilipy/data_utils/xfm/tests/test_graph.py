@@ -0,0 +1,1022 @@
+# -*- coding: utf-8 -*-
+
+"""Test contents of :mod:`~utilipy.data_utils.xfm.graph`."""
+
+
+__all__ = [
+    # functions
+    "test_find_shortest_path",
+    "test_shortest_path_cache",
+    "test_shortest_path_cache_invalidation",
+    "test_construct_path_large_graph",
+    "test_construct_path_benchmark",
+    "test_get_transform_cache",
+    "test_get_transform_validate",
+    "test_get_transform_subclass",
+    "test_get_transform_virtual_subclass",
+    "test_transform_many",
+    "test_freeze",
+    "test_function_decorator",
+    "test_function_decorator_binding",
+    "test_function_decorator_cache",
+    "test_remove_transform",
+    "test_snapshot",
+    "test_thread_safety",
+    "test_pickle",
+    "test_save_load",
+    "test_function_decorator_async",
+    "test_transform_many_async",
+    "test_function_decorator_lazy",
+    "test_function_decorator_lazy_nested",
+]
+
+
+##############################################################################
+# IMPORTS
+
+# BUILT-IN
+import abc
+import asyncio
+import heapq
+import pickle
+import threading
+import time
+
+# THIRD PARTY
+import numpy as np
+import pytest
+from astropy.table import Column, MaskedColumn, QTable, Table
+
+# PROJECT-SPECIFIC
+from utilipy.data_utils.xfm import DataTransform, TransformGraph
+
+##############################################################################
+# PARAMETERS
+
+
+class A:
+    pass
+
+
+class B:
+    pass
+
+
+class C:
+    pass
+
+
+class D:
+    pass
+
+
+class A1(A):
+    pass
+
+
+class A2(A1):
+    pass
+
+
+# /class
+
+
+def _identity(data):
+    return data
+
+
+# /def
+
+
+def _colnames(table):
+    return list(table.colnames)
+
+
+# /def
+
+
+def _asarray(data):
+    return np.asarray(data)
+
+
+# /def
+
+
+def _make_graph():
+    """Build a small graph: A -> B -> C, with a costly A -> C shortcut."""
+    # the identity transforms do not yield the registered output types
+    graph = TransformGraph(seed_basic=False, validate=False)
+    DataTransform(_identity, A, B, register_graph=graph)
+    DataTransform(_identity, B, C, register_graph=graph)
+    DataTransform(_identity, A, C, priority=5, register_graph=graph)
+    return graph
+
+
+# /def
+
+
+##############################################################################
+# CODE
+##############################################################################
+
+
+def test_find_shortest_path():
+    """Test :meth:`~utilipy.data_utils.xfm.TransformGraph.find_shortest_path`."""
+    graph = _make_graph()
+
+    # 0 and 1 - hop
+    assert graph.find_shortest_path(A, A) == ([A], 0)
+    assert graph.find_shortest_path(A, B) == ([A, B], 1.0)
+
+    # a direct transform is used, even if a multi-hop path is cheaper
+    assert graph.find_shortest_path(A, C) == ([A, C], 5.0)
+
+    # no path
+    assert graph.find_shortest_path(C, A) == (None, float("inf"))
+    assert graph.find_shortest_path(D, A) == (None, float("inf"))
+
+    # looking up an unregistered type does not add it to the graph
+    assert D not in graph.type_set
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_shortest_path_cache():
+    """Test the single-source path cache of a `TransformGraph`."""
+    graph = _make_graph()
+    DataTransform(_identity, C, D, register_graph=graph)
+
+    assert graph._shortestpaths == {}
+
+    path, distance = graph.find_shortest_path(A, D)
+    assert path == [A, B, C, D]
+    assert distance == 3.0
+
+    # all paths to ``D`` were found at once
+    assert set(graph._shortestpaths) == {D}
+    paths = graph._shortestpaths[D]
+    assert paths[B] == ([B, C, D], 2.0)
+    assert paths[D] == ([D], 0)
+
+    # subsequent lookups are served from the cache
+    assert graph.find_shortest_path(B, D) == ([B, C, D], 2.0)
+    assert graph._shortestpaths[D] is paths
+
+    # and cannot be modified by the caller
+    path.append(A)
+    assert graph.find_shortest_path(A, D) == ([A, B, C, D], 3.0)
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_shortest_path_cache_invalidation():
+    """Test path cache invalidation on adding and removing transforms."""
+    graph = _make_graph()
+    DataTransform(_identity, C, D, register_graph=graph)
+    assert graph.find_shortest_path(A, D)[1] == 3.0
+
+    # adding a transform clears the cache
+    shortcut = DataTransform(_identity, A, D, register_graph=graph)
+    assert graph._shortestpaths == {}
+    assert graph.find_shortest_path(B, D) == ([B, C, D], 2.0)
+    assert graph.find_shortest_path(A, D) == ([A, D], 1.0)
+
+    # and so does removing one
+    graph.remove_transform(A, D, shortcut)
+    assert graph._shortestpaths == {}
+    assert graph.find_shortest_path(A, D) == ([A, B, C, D], 3.0)
+
+
+# /def
+
+
+# -------------------------------------------------------------------
+
+
+def _bellman_ford_distances(edges, totype):
+    """Reference distances to ``totype``, by relaxing every edge."""
+    dist = {totype: 0.0}
+    for _ in range(len(edges)):
+        changed = False
+        for (a, b), w in edges.items():
+            if b in dist and dist[b] + w < dist.get(a, float("inf")):
+                dist[a] = dist[b] + w
+                changed = True
+        if not changed:
+            break
+    return dist
+
+
+# /def
+
+
+def _linear_scan_distances(edges, totype):
+    """Reference distances to ``totype``, by the previous Dijkstra search.
+
+    Each relaxation finds the node in the heap by a linear scan and then
+    re-heapifies, so a search is O(E V), rather than O(E log V).
+
+    """
+    inf = float("inf")
+    reverse = {}  # totype: {fromtype: weight}
+    for (a, b), w in edges.items():
+        reverse.setdefault(b, {})[a] = w
+    nodes = list(dict.fromkeys(t for edge in edges for t in edge))
+
+    q = [[inf, i, n] for i, n in enumerate(nodes) if n is not totype]
+    q.insert(0, [0.0, -1, totype])
+    dist = {}
+    while q:
+        d, _, n = heapq.heappop(q)
+        if d == inf:
+            break
+        dist[n] = d
+        for n2, w in reverse.get(n, {}).items():
+            if n2 in dist:
+                continue
+            for entry in q:  # find n2 in the heap
+                if entry[2] is n2:
+                    break
+            if d + w < entry[0]:
+                entry[0] = d + w
+                heapq.heapify(q)
+    return dist
+
+
+# /def
+
+
+def _make_large_graph(num_types):
+    """A chain of ``num_types`` types, with random weighted shortcuts."""
+    rng = np.random.default_rng(0)
+    types = [type(f"T{i}", (), {}) for i in range(num_types)]
+
+    graph = TransformGraph(seed_basic=False)
+    edges = {}
+    for i in range(num_types - 1):  # a chain, so everything is reachable
+        edges[(types[i], types[i + 1])] = 1.0
+    for _ in range(4 * num_types):  # and random shortcuts
+        i, j = rng.integers(0, num_types, size=2)
+        edges[(types[i], types[j])] = float(rng.integers(1, 10))
+    for (a, b), w in edges.items():
+        DataTransform(_identity, a, b, priority=w, register_graph=graph)
+
+    return graph, types, edges
+
+
+# /def
+
+
+@pytest.mark.parametrize("num_types", [100, 500])
+def test_construct_path_large_graph(num_types):
+    """Test path construction on graphs of hundreds of data types.
+
+    Checks all the paths to one type against a brute-force reference.
+
+    """
+    graph, types, edges = _make_large_graph(num_types)
+
+    totype = types[-1]
+    expected = _bellman_ford_distances(edges, totype)
+
+    graph._construct_path(graph._state, types[0], totype)
+    for fromtype in types:  # looked up from the constructed paths
+        graph.find_shortest_path(fromtype, totype)
+
+    for fromtype in types:
+        path, distance = graph._shortestpaths[totype][fromtype]
+        assert distance == expected[fromtype]
+        # the path is valid and its weight is the distance
+        assert path[0] is fromtype and path[-1] is totype
+        assert sum(edges[p] for p in zip(path[:-1], path[1:])) == distance
+
+
+# /def
+
+
+def test_construct_path_benchmark():
+    """Benchmark the heap search against the previous, linear-scan, search.
+
+    The lazy-deletion heap is O(E log V), the linear scan O(E V), so on a
+    graph of hundreds of types the heap search should be much faster.
+    The best of a few runs is used, to reduce timing noise.
+
+    """
+    graph, types, edges = _make_large_graph(400)
+    totype = types[-1]
+
+    def best_of(func, repeat=3):
+        times = []
+        for _ in range(repeat):
+            tic = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - tic)
+        return min(times), result
+
+    def heap_search():
+        graph.invalidate_cache()
+        graph._construct_path(graph._state, types[0], totype)
+        return graph._shortestpaths[totype]
+
+    heap_time, paths = best_of(heap_search)
+    scan_time, expected = best_of(
+        lambda: _linear_scan_distances(edges, totype), repeat=1
+    )
+
+    # the same distances, faster
+    assert {t: paths[t][1] for t in types} == expected
+    assert 5 * heap_time < scan_time
+
+
+# /def
+
+
+# -------------------------------------------------------------------
+
+
+def test_get_transform_cache():
+    """Test :meth:`~utilipy.data_utils.xfm.TransformGraph.get_transform`."""
+    graph = _make_graph()
+    DataTransform(_identity, C, D, register_graph=graph)
+
+    # multi-hop transforms are built once
+    t = graph.get_transform(A, D)
+    assert t.transforms == (
+        graph._graph[B][A],
+        graph._graph[C][B],
+        graph._graph[D][C],
+    )
+    assert graph.get_transform(A, D) is t
+    assert graph._composite_cache[(A, D)] is t
+
+    data = A()
+    assert t(data) is data
+
+    # as are missing paths
+    assert graph.get_transform(D, A) is None
+    assert (D, A) in graph._composite_cache
+
+    # and the cache is cleared when the graph changes
+    DataTransform(_identity, A, D, register_graph=graph)
+    assert graph._composite_cache == {}
+    assert graph.get_transform(A, D) is not t
+
+
+# /def
+
+
+# -------------------------------------------------------------------
+
+
+def test_get_transform_validate():
+    """Test the ``validate`` option of a `TransformGraph`."""
+    graph = _make_graph()
+    assert graph.validate is False
+    assert graph.get_transform(A, C)(A())  # wrong type, but not checked
+
+    graph.validate = True  # clears the cache
+    assert graph._composite_cache == {}
+    with pytest.raises(TypeError):
+        graph.get_transform(A, C)(A())
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_get_transform_subclass():
+    """Test :meth:`~utilipy.data_utils.xfm.TransformGraph.get_transform`.
+
+    Subclasses of registered types use their nearest base's transform.
+
+    """
+    graph = _make_graph()
+    DataTransform(_identity, A1, D, register_graph=graph)
+
+    # exact match
+    assert graph.get_transform(A, C) is graph._composite_cache[(A, C)]
+    # nearest base class with a path
+    assert graph.get_transform(A2, C) is graph.get_transform(A, C)
+    assert graph.get_transform(A2, D) is graph.get_transform(A1, D)
+    assert graph.get_transform(A2, D).fromtype is A1
+    # an instance of the target type needs no transformation
+    assert graph.get_transform(A2, A).transforms == ()
+    # no base class has a path
+    assert graph.get_transform(A2, str) is None
+
+    # subsequent lookups are a dict hit
+    assert graph._dispatch_cache[(A2, C)] is graph.get_transform(A, C)
+
+    # Astropy Table and Column subclasses
+    graph.add_transform(Table, list, DataTransform(_colnames, Table, list))
+    graph.add_transform(
+        Column, np.ndarray, DataTransform(_asarray, Column, np.ndarray)
+    )
+
+    qt = QTable([[1, 2]], names=["a"])
+    assert graph.get_transform(QTable, list)(qt) == ["a"]
+
+    mc = MaskedColumn([1, 2], mask=[False, True])
+    assert isinstance(
+        graph.get_transform(MaskedColumn, np.ndarray)(mc), np.ndarray
+    )
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_get_transform_virtual_subclass():
+    """Test :meth:`~utilipy.data_utils.xfm.TransformGraph.get_transform`.
+
+    Virtual subclasses of registered abstract base classes use its
+    transforms, including ones registered after the first lookup.
+
+    """
+
+    class Base(abc.ABC):
+        pass
+
+    class Virtual:
+        pass
+
+    graph = _make_graph()
+    DataTransform(_identity, Base, B, register_graph=graph)
+
+    assert graph.get_transform(Virtual, C) is None
+
+    Base.register(Virtual)
+    assert graph.get_transform(Virtual, C) is graph.get_transform(Base, C)
+    assert graph.get_transform(Virtual, C).fromtype is Base
+
+
+# /def
+
+
+# -------------------------------------------------------------------
+
+
+def test_freeze():
+    """Test :meth:`~utilipy.data_utils.xfm.TransformGraph.freeze`."""
+    graph = _make_graph()
+    DataTransform(_identity, C, D, register_graph=graph)
+    t = graph.get_transform(A, D)
+
+    assert not graph.frozen
+    assert graph.freeze() is graph
+    assert graph.frozen
+    assert graph.freeze() is graph  # can re-freeze
+
+    # all the paths are precomputed
+    assert set(graph._shortestpaths) == {B, C, D}
+    assert graph._shortestpaths[D][A] == ([A, B, C, D], 3.0)
+    for fromtype, totype in [(A, B), (A, C), (A, D), (B, C), (B, D), (C, D)]:
+        assert (fromtype, totype) in graph._dispatch_cache
+
+    # as are the transforms, which are not rebuilt
+    assert graph.get_transform(A, D) is t
+    assert graph.get_transform(D, A) is None
+
+    # there is never a search
+    def _construct_path(*args):
+        raise AssertionError("should not be called")
+
+    graph._construct_path = _construct_path
+    assert graph.find_shortest_path(B, D) == ([B, C, D], 2.0)
+    assert graph.find_shortest_path(A2, D) == (None, float("inf"))
+    assert graph.get_transform(A2, D) is t
+
+    # and the graph cannot be changed
+    with pytest.raises(RuntimeError, match="frozen"):
+        DataTransform(_identity, D, A, register_graph=graph)
+    with pytest.raises(RuntimeError, match="frozen"):
+        graph.remove_transform(A, B, None)
+    with pytest.raises(RuntimeError, match="frozen"):
+        graph.invalidate_cache()
+    with pytest.raises(TypeError):
+        graph._graph[D] = {}
+    with pytest.raises(TypeError):
+        graph._graph[B][D] = _identity
+    assert graph.find_shortest_path(D, A) == (None, float("inf"))
+
+    # validation does not change the graph, so can be changed
+    graph.validate = True
+    assert graph.frozen
+    with pytest.raises(TypeError):  # wrong type, now checked
+        graph.get_transform(A, B)(A())
+    graph.validate = False
+    assert graph.get_transform(A, B)(A())
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def _to_tuple(data, reverse=False):
+    return tuple(data)[::-1] if reverse else tuple(data)
+
+
+# /def
+
+
+def test_transform_many():
+    """Test :meth:`~utilipy.data_utils.xfm.TransformGraph.transform_many`."""
+    batches = []
+
+    def _to_tuple_batch(datas):
+        batches.append(len(datas))
+        return [tuple(x) for x in datas]
+
+    graph = TransformGraph(seed_basic=False)
+    DataTransform(
+        _to_tuple,
+        list,
+        tuple,
+        batch_func=_to_tuple_batch,
+        register_graph=graph,
+    )
+    DataTransform(_to_tuple, str, list, register_graph=graph)
+
+    # a single type is transformed in one batch
+    assert graph.transform_many([[1], [2, 3]], tuple) == [(1,), (2, 3)]
+    assert batches == [2]
+
+    # mixed types are grouped, keeping the order
+    items = ["ab", [1], (2,), "c", [3]]
+    assert graph.transform_many(iter(items), tuple) == [
+        ("a", "b"),
+        (1,),
+        (2,),
+        ("c",),
+        (3,),
+    ]
+    assert batches == [2, 2, 2]  # the lists, then the strings (via lists)
+
+    with pytest.raises(TypeError, match="no transformation"):
+        graph.transform_many([[1], 2], tuple)
+
+
+# /def
+
+
+def test_function_decorator():
+    """Test :meth:`~utilipy.data_utils.xfm.TransformGraph.function_decorator`."""
+    graph = TransformGraph(seed_basic=False)
+    DataTransform(_to_tuple, list, tuple, register_graph=graph)
+
+    @graph.function_decorator(x=tuple, y=(tuple, (), {"reverse": True}))
+    def func(x, y=[1, 2], *, z=[3]):
+        return x, y, z
+
+    # positional, keyword, and default arguments are transformed
+    assert func([1]) == ((1,), (2, 1), [3])
+    assert func([1], [4, 5]) == ((1,), (5, 4), [3])
+    assert func(x=[1], y=[4, 5], z=[6]) == ((1,), (5, 4), [6])
+
+    # arguments of the correct type are passed through
+    x = (1,)
+    assert func(x, x)[0] is x
+    assert func(x, x)[1] is x
+
+    # skip the decorator
+    assert func([1], _skip_decorator=True) == ([1], [1, 2], [3])
+
+    # the transformations are attached
+    assert func._transforms == {
+        "x": tuple,
+        "y": (tuple, (), {"reverse": True}),
+    }
+
+    # errors
+    with pytest.raises(TypeError, match="no transformation"):
+        func("1")
+    with pytest.raises(TypeError, match="missing"):
+        func()
+    with pytest.raises(ValueError):
+        graph.function_decorator(lambda x: x, y=tuple)
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_function_decorator_binding():
+    """Test `~utilipy.data_utils.xfm.TransformGraph.function_decorator`.
+
+    Variadic arguments are found by binding the signature.
+
+    """
+    graph = TransformGraph(seed_basic=False)
+    DataTransform(_to_tuple, list, tuple, register_graph=graph)
+
+    @graph.function_decorator(x=tuple, args=tuple)
+    def func(x, *args):
+        return x, args
+
+    assert func([1]) == ((1,), ())
+    assert func([1], 2, 3) == ((1,), (2, 3))
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_function_decorator_cache():
+    """Test `~utilipy.data_utils.xfm.TransformGraph.function_decorator`.
+
+    The per-type transform cache is cleared with the graph's cache.
+
+    """
+    graph = TransformGraph(seed_basic=False)
+    DataTransform(_to_tuple, list, tuple, register_graph=graph)
+
+    @graph.function_decorator(x=tuple)
+    def func(x):
+        return x
+
+    assert func([1]) == (1,)
+    with pytest.raises(TypeError):
+        func("1")
+
+    DataTransform(_to_tuple, str, tuple, register_graph=graph)
+    assert func("1") == ("1",)
+
+    # a self-transform is applied, even for the correct type
+    DataTransform(
+        _to_tuple,
+        tuple,
+        tuple,
+        func_kwargs={"reverse": True},
+        register_graph=graph,
+    )
+    assert func((1, 2)) == (2, 1)
+
+
+# /def
+
+
+# -------------------------------------------------------------------
+
+
+def test_remove_transform():
+    """Test :meth:`~utilipy.data_utils.xfm.TransformGraph.remove_transform`."""
+    graph = _make_graph()
+    t = graph._graph[B][A]
+
+    with pytest.raises(ValueError, match="both be None"):
+        graph.remove_transform(A, None, t)
+    with pytest.raises(ValueError, match="all Nones"):
+        graph.remove_transform(None, None, None)
+    with pytest.raises(ValueError, match="is not"):
+        graph.remove_transform(A, B, graph._graph[C][B])
+
+    # search for the transform
+    graph.remove_transform(None, None, t)
+    assert B not in graph._graph  # the empty subgraph is removed
+    with pytest.raises(ValueError, match="Could not find"):
+        graph.remove_transform(None, None, t)
+
+    # including edges to and from None
+    t = DataTransform(_identity, None, None, register_graph=graph)
+    graph.remove_transform(None, None, t)
+    assert None not in graph.type_set
+
+    # without checking the transform
+    graph.remove_transform(A, C, None)
+    assert graph.find_shortest_path(A, C) == (None, float("inf"))
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_snapshot():
+    """Test changes to the graph do not affect the current snapshot."""
+    graph = _make_graph()
+    DataTransform(_identity, C, D, register_graph=graph)
+    state = graph._state
+    graph.find_shortest_path(A, D)
+
+    shortcut = DataTransform(_identity, A, D, register_graph=graph)
+    assert graph._state is not state
+    assert graph._cache_generation == state.generation + 1
+
+    # the old snapshot is unchanged
+    assert state.graph[D] == {C: graph._graph[D][C]}
+    assert state.shortestpaths[D][A] == ([A, B, C, D], 3.0)
+    assert graph._shortestpaths == {}
+    assert graph._graph[D][A] is shortcut
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_thread_safety():
+    """Test concurrent lookups while the graph is changed."""
+    graph = _make_graph()
+    DataTransform(_identity, D, B, register_graph=graph)
+
+    @graph.function_decorator(x=C)
+    def func(x):
+        return x
+
+    errors = []
+    done = threading.Event()
+
+    def read():
+        try:
+            while not done.is_set():
+                path, distance = graph.find_shortest_path(A, C)
+                assert (path, distance) in (
+                    ([A, C], 5.0),
+                    ([A, C], 1.0),
+                    ([A, B, C], 2.0),
+                )
+                assert graph.get_transform(A2, C) is not None
+                assert isinstance(func(A()), A)  # identity transforms
+                assert graph.find_shortest_path(D, C)[1] in (1.0, 2.0)
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+            done.set()
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+
+    try:
+        for _ in range(200):  # add and remove shortcuts
+            t1 = DataTransform(_identity, A, C, register_graph=graph)
+            t2 = DataTransform(_identity, D, C, register_graph=graph)
+            graph.remove_transform(D, C, t2)
+            DataTransform(_identity, D, B, register_graph=graph)
+            graph.invalidate_cache()
+            graph.remove_transform(A, C, t1)
+            DataTransform(_identity, A, C, priority=5, register_graph=graph)
+            DataTransform(_identity, D, C, register_graph=graph)
+    finally:
+        done.set()
+        for thread in readers:
+            thread.join()
+
+    assert not errors, errors[0]
+
+
+# /def
+
+
+# -------------------------------------------------------------------
+
+
+def test_pickle():
+    """Test pickling a `~utilipy.data_utils.xfm.TransformGraph`."""
+    graph = _make_graph()
+    DataTransform(_identity, C, D, register_graph=graph)
+    graph.find_shortest_path(A, D)
+    graph.validate = True
+
+    # the paths are restored, so need not be searched for
+    restored = pickle.loads(pickle.dumps(graph))
+    assert restored.validate and not restored.frozen
+    assert restored.type_set == graph.type_set
+    assert restored._shortestpaths == graph._shortestpaths
+    assert [t.func for t in restored.get_transform(A, D).transforms] == [
+        _identity
+    ] * 3
+
+    # and the restored graph can be modified
+    DataTransform(_identity, A, D, register_graph=restored)
+    assert restored.find_shortest_path(A, D) == ([A, D], 1.0)
+    assert graph.find_shortest_path(A, D) == ([A, B, C, D], 3.0)
+
+    # frozen graphs have all their transforms
+    graph.freeze()
+    restored = TransformGraph.restore(graph.snapshot())
+    assert restored.frozen
+    assert set(restored._dispatch_cache) == set(graph._dispatch_cache)
+
+    # profiling and adaptive weights are kept
+    graph = _make_graph()
+    graph.enable_profiling()
+    costs = graph.enable_adaptive(replan_every=None)
+    graph.get_transform(A, B)(A())
+
+    restored = pickle.loads(pickle.dumps(graph))
+    assert restored.profile[(A, B)]["calls"] == 1
+    assert (A, B) in restored.costs
+    assert restored.costs.on_replan == restored._auto_replan
+    assert costs.on_replan == graph._auto_replan
+
+    with pytest.raises(ValueError, match="version"):
+        TransformGraph.restore({"version": -1})
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_save_load(tmp_path):
+    """Test saving and loading a `~utilipy.data_utils.xfm.TransformGraph`."""
+    graph = TransformGraph().freeze()
+    fname = str(tmp_path / "graph.pkl")
+    graph.save(fname)
+
+    loaded = TransformGraph.load(fname)
+    assert loaded.frozen
+    assert loaded.type_set == graph.type_set
+    assert loaded.get_transform(list, tuple)([1, 2]) == (1, 2)
+    assert loaded.get_transform(Table, QTable).zero_copy
+
+
+# /def
+
+
+# -------------------------------------------------------------------
+
+
+async def _aload(data):
+    """Asynchronous str to tuple, like loading a file."""
+    await asyncio.sleep(0.05)
+    return tuple(data)
+
+
+# /def
+
+
+def test_function_decorator_async():
+    """Test an asynchronous function with asynchronous transforms."""
+    graph = TransformGraph(seed_basic=False)
+    DataTransform(_aload, str, tuple, register_graph=graph)
+    DataTransform(_to_tuple, list, tuple, register_graph=graph)
+
+    @graph.function_decorator(x=tuple, y=tuple, z=tuple)
+    async def func(x, y, z=()):
+        """Async function."""
+        return x, y, z
+
+    assert asyncio.iscoroutinefunction(func)
+    assert func.__doc__.startswith("Async function.")
+
+    # the arguments are loaded concurrently
+    tic = time.perf_counter()
+    out = asyncio.run(func("ab", y="cd", z="e"))
+    assert time.perf_counter() - tic < 0.12  # not 0.15
+    assert out == (("a", "b"), ("c", "d"), ("e",))
+
+    # mixed with synchronous transforms and correct types
+    assert asyncio.run(func([1], (2,))) == ((1,), (2,), ())
+    assert asyncio.run(func("a", [1], _skip_decorator=True)) == ("a", [1], ())
+    with pytest.raises(TypeError, match="no transformation"):
+        asyncio.run(func(1, (2,)))
+
+    # a synchronous function cannot use asynchronous transforms
+    @graph.function_decorator(x=tuple)
+    def sync_func(x):
+        return x
+
+    assert sync_func([1]) == (1,)
+    with pytest.raises(TypeError, match="asynchronous"):
+        sync_func("ab")
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_transform_many_async():
+    """Test `~utilipy.data_utils.xfm.TransformGraph.transform_many`.
+
+    With asynchronous transforms.
+
+    """
+    graph = TransformGraph(seed_basic=False)
+    DataTransform(_aload, str, tuple, register_graph=graph)
+    DataTransform(_to_tuple, list, tuple, register_graph=graph)
+
+    # one group
+    out = graph.transform_many(["ab", "c"], tuple)
+    assert asyncio.run(out) == [("a", "b"), ("c",)]
+
+    # many groups, transformed concurrently
+    tic = time.perf_counter()
+    out = asyncio.run(graph.transform_many(["ab", [1], "c", (2,)], tuple))
+    assert time.perf_counter() - tic < 0.1
+    assert out == [("a", "b"), (1,), ("c",), (2,)]
+
+
+# /def
+
+
+# -------------------------------------------------------------------
+
+
+def test_function_decorator_lazy():
+    """Test `~utilipy.data_utils.xfm.TransformGraph.function_decorator`.
+
+    With lazy transformations, which only run if the argument is used.
+
+    """
+    calls = []
+
+    def _counted_tuple(data):
+        calls.append(data)
+        return tuple(data)
+
+    graph = TransformGraph(seed_basic=False)
+    DataTransform(_counted_tuple, list, tuple, register_graph=graph)
+
+    @graph.function_decorator(_lazy=True, x=tuple, y=tuple)
+    def func(x, y, use_y=False):
+        return (x, y) if use_y else (x,)
+
+    out = func([1], [2])
+    assert calls == []  # nothing is used
+    assert out[0] == (1,)  # now ``x`` is used
+    assert isinstance(out[0], tuple)
+    assert calls == [[1]]
+
+    calls.clear()
+    x, y = func((1,), [2], use_y=True)
+    assert type(x) is tuple  # no transformation needed, so no proxy
+    assert y == (2,) and calls == [[2]]
+
+    # with binding, e.g. a variadic argument
+    @graph.function_decorator(_lazy=True, args=tuple)
+    def func(*args):
+        return args
+
+    calls.clear()
+    out = func(1, 2)
+    assert out == (1, 2)
+    assert calls == []  # already a tuple
+
+    # asynchronous transforms are not lazy
+    DataTransform(_aload, str, tuple, register_graph=graph)
+
+    @graph.function_decorator(_lazy=True, x=tuple, y=tuple)
+    async def afunc(x, y):
+        return x, y
+
+    calls.clear()
+    x, y = asyncio.run(afunc("ab", [1]))
+    assert type(x) is tuple and x == ("a", "b")
+    assert calls == []
+    assert y == (1,) and calls == [[1]]
+
+
+# /def
+
+
+def test_function_decorator_lazy_nested():
+    """Test `~utilipy.data_utils.xfm.TransformGraph.function_decorator`.
+
+    Passing a lazy argument on to another decorated function.
+
+    """
+    graph = TransformGraph(seed_basic=False)
+    DataTransform(list, tuple, list, register_graph=graph)
+    DataTransform(tuple, list, tuple, register_graph=graph)
+
+    @graph.function_decorator(x=tuple)
+    def inner(x):
+        return x
+
+    @graph.function_decorator(_lazy=True, x=list)
+    def outer(x, nested=inner):
+        return nested(x)
+
+    out = outer((1, 2))  # tuple -> lazy list -> tuple
+    assert type(out) is tuple and out == (1, 2)
+
+    # no transformation needed, so the argument is passed on
+    out = outer((1, 2), nested=graph.function_decorator(x=list)(lambda x: x))
+    assert out == [1, 2] and isinstance(out, list)
+
+    # and lazily
+    out = outer(
+        (1, 2),
+        nested=graph.function_decorator(_lazy=True, x=tuple)(lambda x: x),
+    )
+    assert out == (1, 2) and isinstance(out, tuple)
+
+
+# /def
+
+
+##############################################################################
+# END
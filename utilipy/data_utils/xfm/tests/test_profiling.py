@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+
+"""Test contents of :mod:`~utilipy.data_utils.xfm.profiling`."""
+
+__all__ = [
+    # functions
+    "test_transform_profile",
+    "test_transform_profile_threads",
+    "test_graph_profiling",
+    "test_transform_costs",
+    "test_transform_costs_persistence",
+    "test_graph_adaptive",
+    "test_profiling_async",
+]
+
+
+##############################################################################
+# IMPORTS
+
+# BUILT-IN
+import asyncio
+import json
+import pickle
+import threading
+import time
+
+# THIRD PARTY
+import numpy as np
+import pytest
+
+# PROJECT-SPECIFIC
+from utilipy.data_utils.xfm import (
+    DataTransform,
+    TransformCosts,
+    TransformGraph,
+    TransformProfile,
+)
+
+##############################################################################
+# PARAMETERS
+
+
+def _to_list(data):
+    return list(data)
+
+
+# /def
+
+
+def _to_array(data):
+    return np.array(data, dtype=float)
+
+
+# /def
+
+
+class A:
+    pass
+
+
+class B:
+    pass
+
+
+class C:
+    pass
+
+
+def _a_to_b(data):
+    return B()
+
+
+# /def
+
+
+def _b_to_c(data):
+    return C()
+
+
+# /def
+
+
+def _a_to_c_slow(data):
+    time.sleep(0.01)
+    return C()
+
+
+# /def
+
+
+##############################################################################
+# CODE
+##############################################################################
+
+
+def test_transform_profile():
+    """Test :class:`~utilipy.data_utils.xfm.TransformProfile`."""
+    profile = TransformProfile()
+    assert len(profile) == 0
+
+    profile.record((tuple, list), 1, 0.5, 10)
+    profile.record((tuple, list), 2, 0.5, 20)
+    profile.record((list, None), 1, 2.0, 0)
+
+    assert len(profile) == 2
+    assert profile[(tuple, list)] == {"calls": 3, "time": 1.0, "bytes": 30}
+
+    # exported in order of time
+    out = profile.to_dict()
+    assert list(out) == [
+        "builtins.list -> None",
+        "builtins.tuple -> builtins.list",
+    ]
+    assert out["builtins.list -> None"] == {
+        "fromtype": "builtins.list",
+        "totype": "None",
+        "calls": 1,
+        "time": 2.0,
+        "bytes": 0,
+    }
+    assert json.loads(profile.to_json()) == out
+
+    report = profile.report().splitlines()
+    assert len(report) == 4  # header, rule, 2 edges
+    assert report[0].split()[0] == "transformation"
+    assert report[2].startswith("builtins.list -> None")
+
+    profile.reset()
+    assert len(profile) == 0
+
+
+# /def
+
+
+def test_transform_profile_threads():
+    """Test concurrent records are not lost."""
+    profile = TransformProfile()
+    costs = TransformCosts(replan_every=None)
+
+    def work():
+        for _ in range(2000):
+            profile.record((tuple, list), 1, 1.0, 2)
+            costs.record((tuple, list), 1, 1.0, 2)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert profile[(tuple, list)] == {
+        "calls": 16000,
+        "time": 16000.0,
+        "bytes": 32000,
+    }
+    assert costs.weight((tuple, list)) == 1.0
+
+    # the locks are not pickled
+    assert pickle.loads(pickle.dumps(profile))[(tuple, list)]["calls"] == 16000
+    assert pickle.loads(pickle.dumps(costs)).weight((tuple, list)) == 1.0
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_graph_profiling():
+    """Test profiling a `~utilipy.data_utils.xfm.TransformGraph`."""
+    graph = TransformGraph(seed_basic=False)
+    DataTransform(_to_list, tuple, list, register_graph=graph)
+    DataTransform(_to_array, list, np.ndarray, register_graph=graph)
+
+    @graph.function_decorator(x=np.ndarray)
+    def func(x):
+        return x
+
+    assert graph.profile is None
+    func((1, 2))
+
+    profile = graph.enable_profiling()
+    assert graph.profile is profile
+    assert len(profile) == 0
+
+    func((1, 2))
+    func((1, 2))
+    func([1, 2, 3])
+    graph.transform_many([(1,), (2,)], np.ndarray)
+
+    assert profile[(tuple, list)]["calls"] == 4
+    assert profile[(list, np.ndarray)]["calls"] == 5
+    assert profile[(list, np.ndarray)]["bytes"] == (2 + 2 + 3 + 1 + 1) * 8
+    assert profile[(list, np.ndarray)]["time"] > 0
+
+    # arguments to the first step
+    graph.get_transform(tuple, np.ndarray)((1, 2), _override_kws=True)
+    assert profile[(tuple, list)]["calls"] == 5
+
+    # enabling again keeps the statistics, unless reset
+    assert graph.enable_profiling() is profile
+    assert len(profile) == 2
+    graph.enable_profiling(reset=True)
+    assert len(profile) == 0
+
+    # disabling stops recording
+    assert graph.disable_profiling() is profile
+    assert graph.profile is None
+    func((1, 2))
+    assert len(profile) == 0
+
+    # a frozen graph can be profiled
+    graph.freeze()
+    profile = graph.enable_profiling()
+    func((1, 2))
+    assert profile[(tuple, list)]["calls"] == 1
+
+
+# /def
+
+
+# -------------------------------------------------------------------
+
+
+def test_transform_costs():
+    """Test :class:`~utilipy.data_utils.xfm.TransformCosts`."""
+    with pytest.raises(ValueError):
+        TransformCosts(alpha=0)
+    with pytest.raises(ValueError):
+        TransformCosts(replan_every=0)
+
+    costs = TransformCosts(alpha=0.5, replan_every=3)
+    replans = []
+    costs.on_replan = lambda: replans.append(len(costs))
+
+    # unmeasured edges
+    assert costs.weight((A, B)) == 1.0
+    assert costs.weight((A, B), priority=2) == 2.0
+
+    # exponential moving average of the time per call
+    costs.record((A, B), 1, 4.0, 0)
+    assert costs.weight((A, B)) == 4.0
+    costs.record((A, B), 2, 4.0, 0)  # 2 s per call
+    assert costs.weight((A, B)) == 3.0
+    assert replans == [1]
+
+    # unmeasured edges are weighted by the mean of the measured ones
+    costs.record((B, C), 1, 1.0, 0)
+    assert (B, C) in costs and (A, C) not in costs
+    assert costs.weight((A, C), priority=2) == 4.0
+
+    costs.reset()
+    assert len(costs) == 0
+
+    # scaled by the size of the outputs
+    costs = TransformCosts(size_scaled=True, replan_every=None)
+    costs.record((A, B), 2, 4.0, 8)
+    assert costs.weight((A, B)) == 0.5
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_transform_costs_persistence(tmp_path):
+    """Test saving and loading `~utilipy.data_utils.xfm.TransformCosts`."""
+    costs = TransformCosts(alpha=0.5, size_scaled=True, replan_every=10)
+    costs.record((A, B), 1, 2.0, 1)
+    costs.record((B, None), 1, 3.0, 1)
+
+    # round-trip
+    fname = str(tmp_path / "costs.json")
+    costs.save(fname)
+    loaded = TransformCosts.load(fname, [A, B])
+    assert loaded.to_dict() == costs.to_dict()
+    assert loaded.weight((A, B)) == 2.0
+    assert loaded.weight((B, None)) == 3.0
+
+    # unknown types are dropped
+    loaded = TransformCosts.from_json(costs.to_json(), [A])
+    assert len(loaded) == 0
+    assert loaded.alpha == 0.5 and loaded.size_scaled
+    assert loaded.replan_every == 10
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_graph_adaptive():
+    """Test adaptive weights of a `~utilipy.data_utils.xfm.TransformGraph`."""
+    graph = TransformGraph(seed_basic=False)
+    DataTransform(_a_to_b, A, B, register_graph=graph)
+    DataTransform(_b_to_c, B, C, register_graph=graph)
+    DataTransform(_a_to_c_slow, A, C, register_graph=graph)
+
+    # by default, the fewest hops
+    assert graph.costs is None
+    assert graph.find_shortest_path(A, C) == ([A, C], 1.0)
+
+    costs = graph.enable_adaptive(replan_every=None)
+    assert graph.costs is costs
+
+    # measure the edges
+    graph.get_transform(A, C)(A())
+    graph.get_transform(A, B)(A())
+    graph.get_transform(B, C)(B())
+    assert len(costs) == 3
+    assert graph.find_shortest_path(A, C)[0] == [A, C]  # not re-planned
+
+    graph.replan()
+    path, distance = graph.find_shortest_path(A, C)
+    assert path == [A, B, C]
+    assert distance == costs.weight((A, B)) + costs.weight((B, C))
+    assert graph.get_transform(A, C).transforms[0].func is _a_to_b
+
+    # a self-transform is kept, whatever the weights
+    assert graph.find_shortest_path(A, A) == ([A], 0)
+    DataTransform(lambda data: data, A, A, register_graph=graph)
+    assert graph.find_shortest_path(A, A)[0] == [A, A]
+    assert len(graph.get_transform(A, A).transforms) == 1
+
+    # re-planned automatically
+    graph.disable_adaptive()
+    assert graph.find_shortest_path(A, C)[0] == [A, C]
+    costs.replan_every = 1
+    graph.enable_adaptive(costs=costs)
+    costs.record((A, B), 1, 1.0, 0)  # A -> B is now very slow
+    assert graph.find_shortest_path(A, C)[0] == [A, C]
+
+    # a frozen graph is not re-planned
+    graph.freeze()
+    costs.record((A, C), 1, 10.0, 0)
+    assert graph.find_shortest_path(A, C)[0] == [A, C]
+    with pytest.raises(RuntimeError, match="frozen"):
+        graph.replan()
+
+
+# /def
+
+
+# -------------------------------------------------------------------
+
+
+async def _ato_list(data):
+    await asyncio.sleep(0.01)
+    return list(data)
+
+
+# /def
+
+
+def test_profiling_async():
+    """Test profiling asynchronous transformations.
+
+    The time is recorded once the output is ready.
+
+    """
+    graph = TransformGraph(seed_basic=False)
+    DataTransform(_ato_list, tuple, list, register_graph=graph)
+    DataTransform(_to_array, list, np.ndarray, register_graph=graph)
+    profile = graph.enable_profiling()
+
+    t = graph.get_transform(tuple, np.ndarray)
+    assert asyncio.run(t((1, 2))).tolist() == [1, 2]
+    assert asyncio.run(t((1, 2), _override_kws=True)).tolist() == [1, 2]
+    asyncio.run(graph.transform_many([(1,), (2,)], np.ndarray))
+
+    assert profile[(tuple, list)]["calls"] == 4
+    assert profile[(tuple, list)]["time"] >= 0.03  # batch is concurrent
+    assert profile[(list, np.ndarray)]["calls"] == 4
+
+
+# /def
+
+
+##############################################################################
+# END
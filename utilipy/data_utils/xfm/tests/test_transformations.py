@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+
+"""Test contents of :mod:`~utilipy.data_utils.xfm.transformations`."""
+
+
+__all__ = [
+    # functions
+    "test_data_transform",
+    "test_data_transform_arguments",
+    "test_composite_transform",
+    "test_composite_transform_flattened",
+    "test_batch",
+    "test_pickle",
+    "test_async",
+    "test_lazy_transform_result",
+]
+
+
+##############################################################################
+# IMPORTS
+
+# BUILT-IN
+import asyncio
+import copy
+import pickle
+
+# THIRD PARTY
+import pytest
+
+# PROJECT-SPECIFIC
+from utilipy.data_utils.xfm import (
+    CompositeTransform,
+    DataTransform,
+    LazyTransformResult,
+)
+
+##############################################################################
+# PARAMETERS
+
+
+def _to_list(data, reverse=False):
+    return list(data)[::-1] if reverse else list(data)
+
+
+# /def
+
+
+def _to_tuple(data):
+    return tuple(data)
+
+
+# /def
+
+
+def _to_str(data, sep=""):
+    return sep.join(str(x) for x in data)
+
+
+# /def
+
+
+##############################################################################
+# CODE
+##############################################################################
+
+
+def test_data_transform():
+    """Test :class:`~utilipy.data_utils.xfm.DataTransform`."""
+    t = DataTransform(_to_list, tuple, list)
+    assert t((1, 2)) == [1, 2]
+
+    # stored and passed arguments
+    t = DataTransform(_to_list, tuple, list, func_kwargs={"reverse": True})
+    assert t((1, 2)) == [2, 1]
+    assert t((1, 2), reverse=False) == [1, 2]
+
+    # output type is checked, unless told otherwise
+    t = DataTransform(_to_tuple, list, list)
+    with pytest.raises(TypeError):
+        t([1, 2])
+    assert t([1, 2], _validate=False) == (1, 2)
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def _with_kwargs(data, a, b=2, **kwargs):
+    return [data, a, b, kwargs]
+
+
+# /def
+
+
+def test_data_transform_arguments():
+    """Test :class:`~utilipy.data_utils.xfm.DataTransform` arguments."""
+    t = DataTransform(
+        _with_kwargs,
+        int,
+        list,
+        func_args=[1],
+        func_kwargs={"x": 3, "y": 4},
+    )
+
+    # the stored arguments are bound once
+    assert t._default_ba.arguments["b"] == 2
+    assert t(0) == [0, 1, 2, {"x": 3, "y": 4}]
+
+    # supplied arguments take precedence
+    assert t(0, 10, b=20) == [0, 10, 20, {"x": 3, "y": 4}]
+    # including individual var-kwargs, merged with the stored ones
+    assert t(0, y=5, z=6) == [0, 1, 2, {"x": 3, "y": 5, "z": 6}]
+    # unless overriding all the stored var-kwargs
+    assert t(0, y=5, _override_kws=True) == [0, 1, 2, {"y": 5}]
+
+    # and the stored arguments are unchanged
+    assert t(0) == [0, 1, 2, {"x": 3, "y": 4}]
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_composite_transform():
+    """Test :class:`~utilipy.data_utils.xfm.CompositeTransform`."""
+    t1 = DataTransform(_to_list, tuple, list)
+    t2 = DataTransform(_to_str, list, str, func_kwargs={"sep": "-"})
+    comp = CompositeTransform([t1, t2], tuple, str)
+
+    assert comp((1, 2)) == "1-2"
+    # arguments are passed to the first transform
+    assert comp((1, 2), reverse=True) == "2-1"
+    assert comp((1, 2), True) == "2-1"
+
+    # the null composite is the identity
+    comp = CompositeTransform([], tuple, tuple)
+    assert comp((1, 2)) == (1, 2)
+    assert comp((1, 2), reverse=True) == (1, 2)
+
+    # only the output is validated
+    t3 = DataTransform(_to_tuple, str, str)  # wrong output type
+    comp = CompositeTransform([t1, t2, t3], tuple, str)
+    with pytest.raises(TypeError):
+        comp((1, 2))
+    assert comp((1, 2), _validate=False) == ("1", "-", "2")
+    with pytest.raises(TypeError):
+        comp((1, 2), reverse=True)
+
+    comp = CompositeTransform([t1, t3, t2], tuple, str)
+    assert comp((1, 2)) == "1-2"
+
+    comp = CompositeTransform([t1, t2, t3], tuple, str, validate=False)
+    assert comp((1, 2)) == ("1", "-", "2")
+
+
+# /def
+
+# -------------------------------------------------------------------
+
+
+def test_composite_transform_flattened():
+    """Test :class:`~utilipy.data_utils.xfm.CompositeTransform` flattening."""
+    t1 = DataTransform(_to_list, tuple, list)
+    t2 = DataTransform(_to_str, list, str, func_kwargs={"sep": "-"})
+    t3 = DataTransform(_to_tuple, str, tuple)
+    comp = CompositeTransform([t1, t2, t3], tuple, tuple)
+
+    # steps without stored arguments are the bare functions
+    assert comp._steps[0] is _to_list
+    assert comp._steps[2] is _to_tuple
+    assert comp._steps[1]([1, 2]) == "1-2"
+
+    assert comp._compiled((1, 2)) == ("1", "-", "2")
+    assert comp((1, 2)) == ("1", "-", "2")
+
+    # composites of composites are flattened too
+    nested = CompositeTransform([comp, t2], tuple, str)
+    assert nested._steps[0] is comp._compiled
+    assert nested((1, 2)) == "1---2"
+
+
+# /def
+
+
+# -------------------------------------------------------------------
+
+
+def _to_list_batch(datas, reverse=False):
+    return [_to_list(data, reverse=reverse) for data in datas]
+
+
+# /def
+
+
+def test_batch():
+    """Test batch transformations."""
+    t1 = DataTransform(
+        _to_list,
+        tuple,
+        list,
+        func_kwargs={"reverse": True},
+        batch_func=_to_list_batch,
+    )
+    assert t1._flatten_batch()([(1, 2)]) == [[2, 1]]
+    assert t1.batch([(1, 2), (3,)]) == [[2, 1], [3]]
+
+    # without a batch function, each input is transformed
+    t2 = DataTransform(_to_str, list, str)
+    assert t2.batch([[1, 2], [3]]) == ["12", "3"]
+
+    comp = CompositeTransform([t1, t2], tuple, str)
+    assert comp.batch([(1, 2), (3,)]) == ["21", "3"]
+    assert comp.batch([]) == []
+
+    # outputs are validated
+    t3 = DataTransform(_to_tuple, list, list)
+    with pytest.raises(TypeError):
+        t3.batch([[1]])
+    assert t3.batch([[1]], _validate=False) == [(1,)]
+
+    comp = CompositeTransform([t1, t3], tuple, list)
+    with pytest.raises(TypeError):
+        comp.batch([(1,)])
+    assert comp.batch([(1,)], _validate=False) == [(1,)]
+
+    with pytest.raises(TypeError):
+        DataTransform(_to_list, tuple, list, batch_func="not callable")
+
+
+# /def
+
+
+# -------------------------------------------------------------------
+
+
+def test_pickle():
+    """Test pickling transformations."""
+    t1 = DataTransform(
+        _to_list,
+        tuple,
+        list,
+        func_kwargs={"reverse": True},
+        batch_func=_to_list_batch,
+        zero_copy=True,
+    )
+    t2 = DataTransform(_to_str, list, str, func_args=("-",))
+
+    # the function is pickled by reference
+    t = pickle.loads(pickle.dumps(t1))
+    assert t.func is _to_list and t.batch_func is _to_list_batch
+    assert t.zero_copy and t.priority == 1.0
+    assert t.func_sig == t1.func_sig
+    assert t((1, 2)) == [2, 1]
+    assert t((1, 2), reverse=False) == [1, 2]
+
+    # the steps are recompiled
+    comp = pickle.loads(pickle.dumps(CompositeTransform([t1, t2], tuple, str)))
+    assert [x.func for x in comp.transforms] == [_to_list, _to_str]
+    assert comp((1, 2)) == "2-1"
+    assert comp.batch([(1, 2), (3,)]) == ["2-1", "3"]
+
+    # but lambdas cannot be pickled
+    with pytest.raises((pickle.PicklingError, AttributeError)):
+        pickle.dumps(DataTransform(lambda x: x, tuple, tuple))
+
+
+# /def
+
+
+# -------------------------------------------------------------------
+
+
+async def _ato_list(data, reverse=False):
+    await asyncio.sleep(0)
+    return list(data)[::-1] if reverse else list(data)
+
+
+# /def
+
+
+async def _ato_list_batch(datas, reverse=False):
+    return [await _ato_list(data, reverse=reverse) for data in datas]
+
+
+# /def
+
+
+def test_async():
+    """Test asynchronous transformations."""
+    t1 = DataTransform(_ato_list, tuple, list)
+    assert t1.is_async
+    assert asyncio.run(t1((1, 2))) == [1, 2]
+    assert asyncio.run(t1((1, 2), reverse=True)) == [2, 1]
+    assert asyncio.run(t1.batch([(1, 2), (3,)])) == [[1, 2], [3]]
+
+    # the output is validated once awaited
+    t2 = DataTransform(_ato_list, tuple, tuple)
+    with pytest.raises(TypeError):
+        asyncio.run(t2((1,)))
+    assert asyncio.run(t2((1,), _validate=False)) == [1]
+    with pytest.raises(TypeError):
+        asyncio.run(t2.batch([(1,)]))
+
+    # composites are asynchronous if any step is
+    t3 = DataTransform(_to_str, list, str)
+    comp = CompositeTransform([t1, t3], tuple, str)
+    assert comp.is_async
+    assert not CompositeTransform([t3], list, str).is_async
+    assert asyncio.run(comp((1, 2))) == "12"
+    assert asyncio.run(comp((1, 2), reverse=True)) == "21"
+    assert asyncio.run(comp.batch([(1, 2), (3,)])) == ["12", "3"]
+
+    comp = CompositeTransform([t1, t3], tuple, list)
+    with pytest.raises(TypeError):
+        asyncio.run(comp((1,)))
+    assert asyncio.run(comp((1,), _validate=False)) == "1"
+
+    # with an asynchronous batch function
+    t4 = DataTransform(
+        _ato_list,
+        tuple,
+        list,
+        func_kwargs={"reverse": True},
+        batch_func=_ato_list_batch,
+    )
+    comp = CompositeTransform([t4, t3], tuple, str)
+    assert asyncio.run(comp.batch([(1, 2), (3,)])) == ["21", "3"]
+
+    with pytest.raises(ValueError, match="coroutine"):
+        DataTransform(_ato_list, tuple, list, batch_func=_to_list_batch)
+
+
+# /def
+
+
+# -------------------------------------------------------------------
+
+
+def test_lazy_transform_result():
+    """Test :class:`~utilipy.data_utils.xfm.LazyTransformResult`."""
+    calls = []
+
+    def transform(data, reverse=False):
+        calls.append(data)
+        return _to_list(data, reverse=reverse)
+
+    # not run until used
+    x = LazyTransformResult(transform, (1, 2), reverse=True)
+    assert not x._self_is_resolved
+    assert "not yet run" in repr(x)
+    assert calls == []
+
+    # then run once
+    assert isinstance(x, list)
+    assert x == [2, 1]
+    assert x[0] == 2 and len(x) == 2 and 1 in x
+    assert x + [0] == [2, 1, 0] and [0] + x == [0, 2, 1]
+    x.append(3)  # attributes
+    assert x.__wrapped__ == [2, 1, 3]
+    assert calls == [(1, 2)]
+
+    # in-place operators update the output
+    x += [4]
+    assert isinstance(x, LazyTransformResult)
+    assert x.__wrapped__ == [2, 1, 3, 4]
+
+    # copies and pickles are of the output
+    y = LazyTransformResult(transform, (1,))
+    assert type(copy.copy(y)) is list
+    assert pickle.loads(pickle.dumps(y)) == [1]
+
+    # errors are raised on use
+    z = LazyTransformResult(DataTransform(_to_list, tuple, tuple), (1,))
+    with pytest.raises(TypeError):
+        len(z)
+
+
+# /def
+
+
+##############################################################################
+# END
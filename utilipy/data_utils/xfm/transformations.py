@@ -9,6 +9,7 @@ __credits__ = ["Astropy"]
 __all__ = [
     "DataTransform",
     "CompositeTransform",
+    "LazyTransformResult",
 ]
 
 
@@ -16,12 +17,27 @@ __all__ = [
 # IMPORTS
 
 # BUILT-IN
+import asyncio
+import copy
 import inspect
+import operator
+import time
 import typing as T
 from abc import ABCMeta, abstractmethod
-from collections import defaultdict
 from contextlib import suppress
 
+# THIRD PARTY
+from wrapt import ObjectProxy
+
+# PROJECT-SPECIFIC
+from .profiling import (
+    TransformProfile,
+    _profiled,
+    _profiled_await,
+    _profiled_batch,
+    _sizeof,
+)
+
 ##############################################################################
 # CODE
 ##############################################################################
@@ -50,10 +66,29 @@ class DataTransformBase(metaclass=ABCMeta):
     register_graph : `TransformGraph` or `None`
         A graph to register this transformation with on creation, or
         `None` to leave it unregistered.
+    zero_copy : bool
+        Whether the output shares the underlying data of the input, rather
+        than copying it. Zero-copy transforms are preferred when finding
+        the shortest coordinate transform path.
+
+    Attributes
+    ----------
+    is_async : bool
+        Whether calling the transformation returns an awaitable of the
+        output, rather than the output.
 
     """
 
-    def __init__(self, fromtype, totype, priority=1, register_graph=None):
+    is_async: bool = False
+
+    def __init__(
+        self,
+        fromtype,
+        totype,
+        priority=1,
+        register_graph=None,
+        zero_copy=False,
+    ):
         if not inspect.isclass(fromtype) and fromtype is not None:
             raise TypeError("fromtype must be a class")
         if not inspect.isclass(totype) and totype is not None:
@@ -62,6 +97,7 @@ class DataTransformBase(metaclass=ABCMeta):
         self.fromtype = fromtype
         self.totype = totype
         self.priority = float(priority)
+        self.zero_copy = bool(zero_copy)
 
         if register_graph:
             # this will do the type-checking when it adds to the graph
@@ -108,6 +144,28 @@ class DataTransformBase(metaclass=ABCMeta):
 
     # /def
 
+    def _flatten(self) -> T.Callable:
+        """Single-argument callable equivalent to calling the transformation.
+
+        Used by `CompositeTransform` to chain steps without the overhead of
+        each step's ``__call__``. By default this is the transformation.
+
+        """
+        return self
+
+    # /def
+
+    def _flatten_batch(self) -> T.Callable:
+        """Callable mapping a sequence of inputs to a sequence of outputs.
+
+        Used by `CompositeTransform` to chain steps over many inputs.
+        By default this applies the flattened transformation to each input.
+
+        """
+        return _batched(self._flatten())
+
+    # /def
+
     @abstractmethod
     def __call__(self, fromdata, totype):
         """Perform the transformation from ``fromtype`` to ``totype``.
@@ -149,7 +207,9 @@ class DataTransform(DataTransformBase):
     ----------
     func : callable
         The transformation function. Should have a call signature
-        ``func(fromdata, *args, **kwargs)``.
+        ``func(fromdata, *args, **kwargs)``. May be a coroutine function,
+        e.g. for I/O-bound transformations, in which case the
+        transformation is asynchronous (see ``is_async``).
     fromtype : class
         The coordinate frame class to start from.
     totype : class
@@ -160,13 +220,27 @@ class DataTransform(DataTransformBase):
     register_graph : `TransformGraph` or `None`
         A graph to register this transformation with on creation, or
         `None` to leave it unregistered.
+    func_args : sequence, optional
+        Arguments into ``func`` after ``fromdata``.
+    func_kwargs : mapping, optional
+        Keyword arguments into ``func``.
+    batch_func : callable or None, optional
+        A vectorized version of ``func``, used to transform many inputs at
+        once (see `batch`). Should have a call signature
+        ``batch_func(sequence_of_fromdata, *args, **kwargs)`` and return a
+        sequence of the outputs, in the same order. Must be a coroutine
+        function if ``func`` is.
+    zero_copy : bool, optional
+        Whether the output shares the underlying data of the input, rather
+        than copying it (e.g. a view of an array).
 
     Raises
     ------
     TypeError
-        If ``func`` is not callable.
+        If ``func`` or ``batch_func`` is not callable.
     ValueError
         If ``func`` cannot accept two arguments.
+        If only one of ``func`` and ``batch_func`` is a coroutine function.
 
     """
 
@@ -179,10 +253,23 @@ class DataTransform(DataTransformBase):
         register_graph=None,
         func_args: T.Optional[T.Sequence] = None,
         func_kwargs: T.Optional[T.Mapping] = None,
+        batch_func: T.Optional[T.Callable] = None,
+        zero_copy: bool = False,
     ):
         """Create a data transformer."""
         if not callable(func):
             raise TypeError("func must be callable")
+        if batch_func is not None and not callable(batch_func):
+            raise TypeError("batch_func must be callable")
+
+        is_async = inspect.iscoroutinefunction(func)
+        if batch_func is not None and (
+            inspect.iscoroutinefunction(batch_func) != is_async
+        ):
+            raise ValueError(
+                "batch_func must be a coroutine function if, and only if, "
+                "func is"
+            )
 
         with suppress(TypeError):
             sig = inspect.signature(func)
@@ -196,20 +283,67 @@ class DataTransform(DataTransformBase):
                 )
 
         self.func = func
+        self.batch_func = batch_func
+        self.is_async = is_async
         self.func_args = list(func_args or [])  # None -> [], keeps full
-        self.func_kwargs = func_kwargs  # None -> {}, keeps full
+        self.func_kwargs = dict(func_kwargs or {})  # None -> {}, keeps full
 
-        # TODO store these or make each time in __call__?
-        self.func_sig = inspect.signature(func)
-        self.func_spec = inspect.getfullargspec(func)
+        self._bind_signature()
 
         super().__init__(
-            fromtype, totype, priority=priority, register_graph=register_graph
+            fromtype,
+            totype,
+            priority=priority,
+            register_graph=register_graph,
+            zero_copy=zero_copy,
         )
 
     # /def
 
-    def __call__(self, fromdata, *args, _override_kws: bool = False, **kwargs):
+    def _bind_signature(self):
+        """Inspect ``func`` and bind the stored arguments to its signature."""
+        self.func_sig = inspect.signature(self.func)
+        self.func_spec = inspect.getfullargspec(self.func)
+
+        # bind the stored arguments once, for use in `__call__`.
+        # have None here in `fromdata` b/c will update later
+        self._default_ba = self.func_sig.bind_partial(
+            None, *self.func_args, **self.func_kwargs
+        )
+        self._default_ba.apply_defaults()  # and the defaults
+
+    # /def
+
+    def __getstate__(self) -> dict:
+        """State for pickling.
+
+        The signature information is derived from ``func``, so is not
+        pickled. ``func`` is pickled by reference (its import path), so must
+        be importable, e.g. not a lambda.
+
+        """
+        state = self.__dict__.copy()
+        for name in ("func_sig", "func_spec", "_default_ba"):
+            state.pop(name, None)
+        return state
+
+    # /def
+
+    def __setstate__(self, state: dict):
+        """Restore from pickling."""
+        self.__dict__.update(state)
+        self._bind_signature()
+
+    # /def
+
+    def __call__(
+        self,
+        fromdata,
+        *args,
+        _override_kws: bool = False,
+        _validate: bool = True,
+        **kwargs,
+    ):
         """Run transformation.
 
         Parameters
@@ -221,52 +355,147 @@ class DataTransform(DataTransformBase):
             whether to permit the default kwargs, or completely override by any
             supplied kwargs (if any are given here). If they are permitted,
             individual arguments are still overriden by ones supplied here.
+        _validate : bool
+            whether to check the output is of type ``totype``.
         **kwargs : Any
             keyword argument into the transformation
 
         Returns
         -------
         todata : Any
-            The result of running `fromdata` through the transformation
+            The result of running `fromdata` through the transformation.
+            An awaitable of the result if the transformation is
+            asynchronous (see ``is_async``).
+
+        Raises
+        ------
+        TypeError
+            If ``_validate`` and the output is not of type ``totype``.
+
+        Notes
+        -----
+        The stored ``func_args`` and ``func_kwargs`` are bound to the
+        signature when the transformation is created, so should not be
+        modified afterwards.
 
         """
-        # create BoundArgument
-        # have None here in `fromdata` b/c will update later
-        ba = self.func_sig.bind_partial(
-            None, *self.func_args, **self.func_kwargs
-        )
-        ba.apply_defaults()  # and the defaults
-
-        # have to override with provided arguments
-        _ba = self.func_sig.bind_partial(fromdata, *args, **kwargs)
-        # propagate default kwargs (unless `_override_kws`)
-        vkw = self.func_spec.varkw  # the name of the varkw param
-        if vkw in _ba.arguments and not _override_kws:
-            keys = _ba.arguments[vkw].keys()  # do not override these keys
-            _ba.arguments[vkw].update(  # update arguments
-                {
-                    k: ba.arguments[vkw][k]
-                    for k in keys
-                    if k not in keys  # filtering out locked keys
-                }
+        if not args and not kwargs:  # only the stored arguments
+            todata = self.func(fromdata, *self.func_args, **self.func_kwargs)
+
+        else:  # have to override with provided arguments
+            ba = inspect.BoundArguments(
+                self.func_sig, self._default_ba.arguments.copy()
             )
-        ba.arguments.update(_ba.arguments)
 
-        # call function
-        todata = self.func(*ba.args, **ba.kwargs)
+            _ba = self.func_sig.bind_partial(fromdata, *args, **kwargs)
+            # propagate default kwargs (unless `_override_kws`)
+            vkw = self.func_spec.varkw  # the name of the varkw param
+            if vkw in _ba.arguments and not _override_kws:
+                # the supplied kwargs take precedence over the stored ones
+                _ba.arguments[vkw] = {
+                    **ba.arguments[vkw],
+                    **_ba.arguments[vkw],
+                }
+            ba.arguments.update(_ba.arguments)
+
+            # call function
+            todata = self.func(*ba.args, **ba.kwargs)
 
-        totype = self.totype if self.totype is not None else type(None)
+        if self.is_async:
+            return _await_checked(todata, self.totype, validate=_validate)
+        elif _validate:
+            totype = self.totype if self.totype is not None else type(None)
 
-        if not isinstance(todata, totype):
-            raise TypeError(
-                f"the transformation function yielded {todata} but "
-                f"should have been of type {totype}"
-            )
+            if not isinstance(todata, totype):
+                raise TypeError(
+                    f"the transformation function yielded {todata} but "
+                    f"should have been of type {totype}"
+                )
 
         return todata
 
     # /def
 
+    def _flatten(self) -> T.Callable:
+        """Call ``func`` directly with the stored arguments.
+
+        This skips the signature binding and the output type check, so is
+        only used for steps inside a `CompositeTransform`. Changes to
+        ``func_args`` and ``func_kwargs`` after flattening are not reflected.
+
+        """
+        func = self.func
+        if not self.func_args and not self.func_kwargs:
+            return func
+
+        func_args = tuple(self.func_args)
+        func_kwargs = dict(self.func_kwargs)
+
+        def flat_transform(fromdata):
+            return func(fromdata, *func_args, **func_kwargs)
+
+        return flat_transform
+
+    # /def
+
+    def _flatten_batch(self) -> T.Callable:
+        """Call ``batch_func``, if defined, with the stored arguments."""
+        batch_func = self.batch_func
+        if batch_func is None and self.is_async:  # run concurrently
+            return _gathered(self._flatten())
+        elif batch_func is None:
+            return super()._flatten_batch()
+
+        func_args = tuple(self.func_args)
+        func_kwargs = dict(self.func_kwargs)
+
+        def flat_batch_transform(fromdatas):
+            return batch_func(fromdatas, *func_args, **func_kwargs)
+
+        return flat_batch_transform
+
+    # /def
+
+    def batch(self, fromdatas: T.Sequence, _validate: bool = True) -> list:
+        """Run transformation on many inputs.
+
+        Uses ``batch_func``, if defined, otherwise ``func`` on each input.
+
+        Parameters
+        ----------
+        fromdatas : sequence
+        _validate : bool
+            whether to check the outputs are of type ``totype``.
+
+        Returns
+        -------
+        todatas : list
+            The result of running each of `fromdatas` through the
+            transformation. An awaitable of the list if the transformation
+            is asynchronous, in which case the inputs are transformed
+            concurrently (unless using ``batch_func``).
+
+        Raises
+        ------
+        TypeError
+            If ``_validate`` and an output is not of type ``totype``.
+
+        """
+        todatas = self._flatten_batch()(fromdatas)
+        if self.is_async:
+            return _await_checked(
+                todatas, self.totype, validate=_validate, many=True
+            )
+
+        todatas = list(todatas)
+
+        if _validate:
+            _check_types(todatas, self.totype)
+
+        return todatas
+
+    # /def
+
 
 # /class
 
@@ -295,6 +524,18 @@ class CompositeTransform(DataTransformBase):
     register_graph : `TransformGraph` or `None`
         A graph to register this transformation with on creation, or
         `None` to leave it unregistered.
+    validate : bool
+        Whether to check the output is of type ``totype``.
+        Intermediate steps are not checked.
+    profile : `~utilipy.data_utils.xfm.TransformProfile` or None
+        If not None, the calls of each step are recorded in the profile.
+        Any object with the same ``record`` method may be used, like
+        `~utilipy.data_utils.xfm.TransformCosts`.
+
+    Notes
+    -----
+    The transformation is ``zero_copy`` if all of its steps are, and
+    asynchronous (see ``is_async``) if any of its steps are.
 
     """
 
@@ -305,17 +546,88 @@ class CompositeTransform(DataTransformBase):
         totype,
         priority: int = 1,
         register_graph=None,
+        validate: bool = True,
+        profile: T.Optional[TransformProfile] = None,
     ):
         """Create Composite Data Transformer."""
+        transforms = tuple(transforms)
         super().__init__(
-            fromtype, totype, priority=priority, register_graph=register_graph
+            fromtype,
+            totype,
+            priority=priority,
+            register_graph=register_graph,
+            zero_copy=all(getattr(t, "zero_copy", False) for t in transforms),
         )
 
-        self.transforms = tuple(transforms)
+        self.transforms = transforms
+        self.validate = validate
+        self.profile = profile
+        self.is_async = any(getattr(t, "is_async", False) for t in transforms)
+
+        self._compile()
 
     # /def
 
-    def __call__(self, fromdata, *args, _override_kws: bool = False, **kwargs):
+    def _compile(self):
+        """Pre-flatten the steps into one callable, for single and batch."""
+        profile = self.profile
+
+        steps = [
+            t._flatten() if hasattr(t, "_flatten") else t
+            for t in self.transforms
+        ]
+        batch_steps = [
+            t._flatten_batch() if hasattr(t, "_flatten_batch") else _batched(t)
+            for t in self.transforms
+        ]
+
+        if profile is not None:  # record the calls of each step
+            edges = [
+                (getattr(t, "fromtype", None), getattr(t, "totype", None))
+                for t in self.transforms
+            ]
+            steps = [_profiled(*x, profile) for x in zip(steps, edges)]
+            batch_steps = [
+                _profiled_batch(*x, profile) for x in zip(batch_steps, edges)
+            ]
+
+        chain = _achain if self.is_async else _chain
+        self._steps = tuple(steps)
+        self._compiled = chain(self._steps)
+        self._compiled_rest = chain(self._steps[1:])  # after the first step
+        self._compiled_batch = chain(batch_steps)
+
+    # /def
+
+    def __getstate__(self) -> dict:
+        """State for pickling, without the compiled steps."""
+        state = self.__dict__.copy()
+        for name in (
+            "_steps",
+            "_compiled",
+            "_compiled_rest",
+            "_compiled_batch",
+        ):
+            state.pop(name, None)
+        return state
+
+    # /def
+
+    def __setstate__(self, state: dict):
+        """Restore from pickling, recompiling the steps."""
+        self.__dict__.update(state)
+        self._compile()
+
+    # /def
+
+    def __call__(
+        self,
+        fromdata,
+        *args,
+        _override_kws: bool = False,
+        _validate: T.Optional[bool] = None,
+        **kwargs,
+    ):
         """Run transformation.
 
         Parameters
@@ -328,6 +640,9 @@ class CompositeTransform(DataTransformBase):
             or completely override by any supplied kwargs (if any are given
             here). If they are permitted, individual arguments are still
             overriden by ones supplied here.
+        _validate : bool or None
+            whether to check the output is of type ``totype``.
+            If None (default), uses ``self.validate``.
         **kwargs : Any
             keyword argument into the first transformation
 
@@ -335,63 +650,496 @@ class CompositeTransform(DataTransformBase):
         -------
         todata : Any
             The result of running `fromdata` through the transformation series
-            listed in ``self.transforms``
+            listed in ``self.transforms``. An awaitable of the result if the
+            transformation is asynchronous (see ``is_async``).
+
+        Raises
+        ------
+        TypeError
+            If validating and the output is not of type ``totype``.
 
         """
-        todata = fromdata
-        for i, t in enumerate(self.transforms):
-            if i == 0:  # TODO what if doesn't accept args/kwargs?
-                todata = t(
-                    todata, *args, _override_kws=_override_kws, **kwargs
+        if not args and not kwargs:  # nothing to pass to the first step
+            todata = self._compiled(fromdata)
+        elif not self.transforms:
+            todata = fromdata
+        else:
+            first = self.transforms[0]
+            # TODO what if doesn't accept args/kwargs?
+            if isinstance(first, DataTransformBase):  # validated at the end
+                kwargs["_validate"] = False
+            tic = time.perf_counter()
+            todata = first(
+                fromdata, *args, _override_kws=_override_kws, **kwargs
+            )
+            if self.profile is not None:
+                edge = (
+                    getattr(first, "fromtype", None),
+                    getattr(first, "totype", None),
+                )
+                if inspect.isawaitable(todata):
+                    todata = _profiled_await(todata, edge, self.profile, tic)
+                else:
+                    seconds = time.perf_counter() - tic
+                    self.profile.record(edge, 1, seconds, _sizeof(todata))
+            todata = self._compiled_rest(todata)
+
+        validate = self.validate if _validate is None else _validate
+        if self.is_async:
+            return _await_checked(todata, self.totype, validate=validate)
+        elif validate:
+            totype = self.totype if self.totype is not None else type(None)
+
+            if not isinstance(todata, totype):
+                raise TypeError(
+                    f"the transformation yielded {todata} but "
+                    f"should have been of type {totype}"
                 )
-            else:
-                todata = t(todata)
 
         return todata
 
     # /def
 
+    def _flatten(self) -> T.Callable:
+        """The pre-flattened chain of transformations."""
+        return self._compiled
+
+    # /def
+
+    def _flatten_batch(self) -> T.Callable:
+        """The pre-flattened chain of batch transformations."""
+        return self._compiled_batch
+
+    # /def
+
+    def batch(
+        self, fromdatas: T.Sequence, _validate: T.Optional[bool] = None
+    ) -> list:
+        """Run transformation series on many inputs.
+
+        Each step uses its vectorized ``batch_func``, if defined.
+
+        Parameters
+        ----------
+        fromdatas : sequence
+        _validate : bool or None
+            whether to check the outputs are of type ``totype``.
+            If None (default), uses ``self.validate``.
+
+        Returns
+        -------
+        todatas : list
+            The result of running each of `fromdatas` through the
+            transformation series listed in ``self.transforms``. An
+            awaitable of the list if the transformation is asynchronous.
+
+        Raises
+        ------
+        TypeError
+            If validating and an output is not of type ``totype``.
+
+        """
+        todatas = self._compiled_batch(fromdatas)
+
+        validate = self.validate if _validate is None else _validate
+        if self.is_async:
+            return _await_checked(
+                todatas, self.totype, validate=validate, many=True
+            )
+
+        todatas = list(todatas)
+        if validate:
+            _check_types(todatas, self.totype)
+
+        return todatas
+
+    # /def
+
 
 # /class
 
 
-#####################################################################
-# Default Transformation Set
-# TODO seed many more basics
-#    - can do astropy and numpy ones
-# AND do in separate file?
-
-
-_default_xfm_set = defaultdict(
-    dict,
-    {
-        None: {  # TODO replace this with an Any-to-None function
-            k: DataTransform(lambda x: None, k, None)
-            for k in (str, list, tuple, dict)
-        },
-        tuple: {  # TODO replace this with a many-to-tuple function
-            k: DataTransform(lambda x: tuple(x), k, tuple)
-            for k in (str, list, dict)
-        },
-        list: {  # TODO replace this with a many-to-list function
-            k: DataTransform(lambda x: list(x), k, list)
-            for k in (str, tuple, dict)
-        },
-        str: {  # TODO replace this with a many-to-str function
-            k: DataTransform(lambda x: str(x), k, str)
-            for k in (tuple, list, dict)
-        },
-        dict: {
-            **{  # TODO replace this with a many-to-dict function
-                k: DataTransform(lambda x: dict(x), k, dict)
-                for k in (tuple, list, dict)
-            },
-            **{
-                None: DataTransform(lambda x: dict(), None, dict)
-            },  # None to dict
-        },
-    },
-)
+# -------------------------------------------------------------------
+
+
+class LazyTransformResult(ObjectProxy):
+    """Proxy for the output of a transformation, run on first use.
+
+    This is a :class:`~wrapt.ObjectProxy`, so the proxy behaves like the
+    output. The transformation is only run when the output is first needed,
+    e.g. by an attribute access, an operator, or an `isinstance` check, and
+    the output is then kept. ``__wrapped__`` is the output.
+
+    Parameters
+    ----------
+    transform : callable
+        The transformation, e.g. a `CompositeTransform`.
+    fromdata : Any
+        The object to transform.
+    *args, **kwargs
+        Arguments into ``transform``.
+
+    Notes
+    -----
+    Any error from the transformation, like a failed output type check, is
+    raised when the output is first needed, not on creating the proxy.
+
+    """
+
+    def __init__(self, transform: T.Callable, fromdata, *args, **kwargs):
+        super().__init__(None)  # placeholder until run
+        self._self_transform = transform
+        self._self_inputs = (fromdata, args, kwargs)
+        self._self_resolved = False
+
+    # /def
+
+    @property
+    def _self_is_resolved(self) -> bool:
+        """Whether the transformation has run."""
+        return self._self_resolved
+
+    # /def
+
+    def _self_resolve(self):
+        """Run the transformation, if it has not yet run, and return output."""
+        if not self._self_resolved:
+            fromdata, args, kwargs = self._self_inputs
+            todata = self._self_transform(fromdata, *args, **kwargs)
+            ObjectProxy.__wrapped__.__set__(self, todata)
+            self._self_resolved = True
+            self._self_transform = self._self_inputs = None  # release
+
+        return ObjectProxy.__wrapped__.__get__(self)
+
+    # /def
+
+    @property
+    def __wrapped__(self):
+        """The output of the transformation."""
+        return self._self_resolve()
+
+    @__wrapped__.setter
+    def __wrapped__(self, value):
+        ObjectProxy.__wrapped__.__set__(self, value)
+        self._self_resolved = True
+        self._self_transform = self._self_inputs = None
+
+    # /def
+
+    @property
+    def __class__(self):
+        return self._self_resolve().__class__
+
+    # /def
+
+    def __getattr__(self, name: str):
+        if name.startswith("_self_"):  # not yet set
+            raise AttributeError(name)
+        return getattr(self._self_resolve(), name)
+
+    # /def
+
+    def __setattr__(self, name: str, value):
+        if name.startswith("_self_") or name == "__wrapped__":
+            super().__setattr__(name, value)
+        else:
+            setattr(self._self_resolve(), name, value)
+
+    # /def
+
+    def __delattr__(self, name: str):
+        if name.startswith("_self_"):
+            super().__delattr__(name)
+        else:
+            delattr(self._self_resolve(), name)
+
+    # /def
+
+    def __repr__(self) -> str:
+        if not self._self_resolved:
+            return (
+                f"<{type(self).__name__} at 0x{id(self):x} "
+                f"for {self._self_transform!r} (not yet run)>"
+            )
+        return super().__repr__()
+
+    # /def
+
+    def __copy__(self):
+        return copy.copy(self._self_resolve())
+
+    # /def
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self._self_resolve(), memo)
+
+    # /def
+
+    def __reduce_ex__(self, protocol):
+        # pickle as the output
+        return self._self_resolve().__reduce_ex__(protocol)
+
+    # /def
+
+
+# /class
+
+
+def _lazy_method(func: T.Callable, kind: str = "") -> T.Callable:
+    """Method of `LazyTransformResult` calling ``func`` on the output.
+
+    Parameters
+    ----------
+    func : callable
+    kind : {"", "reflected", "inplace"}, optional
+        How the output is passed to ``func``.
+
+    """
+    if kind == "reflected":
+
+        def method(self, other):
+            return func(other, self._self_resolve())
+
+    elif kind == "inplace":
+
+        def method(self, other):
+            self.__wrapped__ = func(self._self_resolve(), other)
+            return self
+
+    else:
+
+        def method(self, *args):
+            return func(self._self_resolve(), *args)
+
+    return method
+
+
+# /def
+
+
+# The C implementation of `~wrapt.ObjectProxy` uses the wrapped object
+# directly, not ``__wrapped__``, in its special methods, so these are
+# redefined to first run the transformation.
+for _name, _func in {
+    "__str__": str,
+    "__bytes__": bytes,
+    "__format__": format,
+    "__dir__": dir,
+    "__hash__": hash,
+    "__bool__": bool,
+    "__len__": len,
+    "__iter__": iter,
+    "__reversed__": reversed,
+    "__round__": round,
+    "__int__": int,
+    "__float__": float,
+    "__complex__": complex,
+    "__index__": operator.index,
+    "__contains__": operator.contains,
+    "__getitem__": operator.getitem,
+    "__setitem__": operator.setitem,
+    "__delitem__": operator.delitem,
+    "__enter__": lambda obj: obj.__enter__(),
+    "__exit__": lambda obj, *args: obj.__exit__(*args),
+    "__fspath__": lambda obj: obj.__fspath__(),
+    "__divmod__": divmod,
+    "__lt__": operator.lt,
+    "__le__": operator.le,
+    "__eq__": operator.eq,
+    "__ne__": operator.ne,
+    "__gt__": operator.gt,
+    "__ge__": operator.ge,
+    "__neg__": operator.neg,
+    "__pos__": operator.pos,
+    "__abs__": operator.abs,
+    "__invert__": operator.invert,
+}.items():
+    setattr(LazyTransformResult, _name, _lazy_method(_func))
+
+setattr(LazyTransformResult, "__rdivmod__", _lazy_method(divmod, "reflected"))
+
+for _name in (
+    "add",
+    "sub",
+    "mul",
+    "matmul",
+    "truediv",
+    "floordiv",
+    "mod",
+    "pow",
+    "lshift",
+    "rshift",
+    "and",
+    "xor",
+    "or",
+):
+    _func = getattr(operator, _name + "_" if _name in ("and", "or") else _name)
+    setattr(LazyTransformResult, f"__{_name}__", _lazy_method(_func))
+    setattr(
+        LazyTransformResult,
+        f"__r{_name}__",
+        _lazy_method(_func, "reflected"),
+    )
+    setattr(
+        LazyTransformResult,
+        f"__i{_name}__",
+        _lazy_method(getattr(operator, f"i{_name}"), "inplace"),
+    )
+
+del _name, _func
+
+
+# -------------------------------------------------------------------
+
+
+def _chain(steps: T.Sequence[T.Callable]) -> T.Callable:
+    """Compose single-argument callables into one, in order.
+
+    Parameters
+    ----------
+    steps : sequence of callables
+
+    Returns
+    -------
+    callable
+
+    """
+    if len(steps) == 0:
+        return _identity
+    elif len(steps) == 1:
+        return steps[0]
+
+    def chained_transform(fromdata):
+        for step in steps:
+            fromdata = step(fromdata)
+        return fromdata
+
+    return chained_transform
+
+
+# /def
+
+
+def _achain(steps: T.Sequence[T.Callable]) -> T.Callable:
+    """Compose single-argument callables, some asynchronous, into one.
+
+    Parameters
+    ----------
+    steps : sequence of callables
+        Each may return an awaitable, which is awaited before the next step.
+
+    Returns
+    -------
+    coroutine function
+        Also awaits its input, if it is awaitable.
+
+    """
+
+    async def achained_transform(fromdata):
+        if inspect.isawaitable(fromdata):
+            fromdata = await fromdata
+        for step in steps:
+            fromdata = step(fromdata)
+            if inspect.isawaitable(fromdata):
+                fromdata = await fromdata
+        return fromdata
+
+    return achained_transform
+
+
+# /def
+
+
+def _identity(data):
+    """Return the input, unchanged."""
+    return data
+
+
+# /def
+
+
+def _batched(step: T.Callable) -> T.Callable:
+    """Apply a single-argument callable to each of a sequence of inputs."""
+
+    def batch_transform(fromdatas):
+        return [step(fromdata) for fromdata in fromdatas]
+
+    return batch_transform
+
+
+# /def
+
+
+def _gathered(step: T.Callable) -> T.Callable:
+    """Apply an asynchronous callable to a sequence of inputs, concurrently."""
+
+    async def gathered_transform(fromdatas):
+        return list(await asyncio.gather(*map(step, fromdatas)))
+
+    return gathered_transform
+
+
+# /def
+
+
+async def _await_checked(
+    todata, totype, validate: bool = True, many: bool = False
+):
+    """Await the output of an asynchronous transformation and check it.
+
+    Parameters
+    ----------
+    todata : awaitable
+    totype : class
+    validate : bool, optional
+        Whether to check the output is of type ``totype``.
+    many : bool, optional
+        Whether ``todata`` is a sequence of outputs, which is made a list.
+
+    Raises
+    ------
+    TypeError
+        If ``validate`` and the output is not of type ``totype``.
+
+    """
+    todata = await todata
+    if many:
+        todata = list(todata)
+
+    if validate:
+        _check_types(todata if many else (todata,), totype)
+
+    return todata
+
+
+# /def
+
+
+def _check_types(todatas: T.Sequence, totype):
+    """Check the outputs of a transformation are of type ``totype``.
+
+    Raises
+    ------
+    TypeError
+        If any of ``todatas`` is not of type ``totype``.
+
+    """
+    totype = totype if totype is not None else type(None)
+
+    # check each output type once
+    for cls in set(map(type, todatas)):
+        if issubclass(cls, totype):
+            continue
+
+        todata = next(x for x in todatas if type(x) is cls)
+        raise TypeError(
+            f"the transformation yielded {todata} but "
+            f"should have been of type {totype}"
+        )
+
+
+# /def
 
 
 # # # map class names to colorblind-safe colors
@@ -12,6 +12,7 @@ __all__ = [
     "qsquare",
     "qnorm",
     "qarange",
+    "QuantityRange",
 ]
 
 
@@ -19,14 +20,20 @@ __all__ = [
 # IMPORTS
 
 # BUILT-IN
+import functools
 import typing as T
 import warnings
 
 # THIRD PARTY
 import numpy as np
-from astropy.units import Quantity
+from astropy.units import Quantity, UnitBase, UnitsError
 from numpy.linalg import norm
 
+try:
+    from numpy.exceptions import AxisError
+except ImportError:  # NumPy < 1.25
+    AxisError = np.AxisError
+
 ##############################################################################
 # IMPORTS
 
@@ -47,7 +54,12 @@ if (_NUMPY_VERSION[0] <= 1) and (_NUMPY_VERSION[1] <= 16):  # v1.16
 ###############################################################################
 
 
-def quadrature(*args: T.Tuple[T.Sequence], axis: int = 0) -> T.Sequence:
+def quadrature(
+    *args: T.Tuple[T.Sequence],
+    axis: int = 0,
+    out: T.Optional[np.ndarray] = None,
+    scaled: bool = False,
+) -> T.Sequence:
     """Return arguments summed in quadrature.
 
     ::
@@ -59,18 +71,164 @@ def quadrature(*args: T.Tuple[T.Sequence], axis: int = 0) -> T.Sequence:
     args: Sequence
     axis: int
         the summation axis, default 0.
+    out : ndarray or Quantity or None, optional
+        Array in which to place the result. Must be a Quantity if the
+        arguments are Quantities, in which case they are converted to its
+        unit.
+    scaled : bool, optional
+        Whether to divide by the largest magnitude before squaring, so that
+        very large or small values neither overflow nor underflow.
+        Two arguments are always summed with :func:`~numpy.hypot`, which is
+        scaled.
 
     Returns
     -------
     array-like
 
+    Notes
+    -----
+    When summing over the arguments (``axis=0``), the squares are
+    accumulated argument by argument into the output, rather than stacking
+    the arguments into a new array. Quantities are converted to a common
+    unit (not stacked) and may be broadcast against each other.
+
     """
     if len(args) == 0:
         raise ValueError
     if len(args) == 1:
-        args = args[0]
+        if out is None and not scaled:
+            return np.sqrt(np.sum(np.square(args[0]), axis=axis))
+
+        # sum over `axis` by accumulating the (view) slices along it.
+        arg = np.asanyarray(args[0])
+        if arg.ndim == 0:
+            _check_axis(axis, 1)
+            args = (arg,)
+        else:
+            args = tuple(np.moveaxis(arg, axis, 0))
+            if not args:  # empty along `axis`
+                args = (np.zeros_like(arg[0]),)
+    elif _check_axis(axis, max(np.ndim(a) for a in args) + 1) != 0:
+        # summing within each argument, so they must be stacked.
+        result = np.sqrt(np.sum(np.square(args), axis=axis))
+        if out is None:
+            return result
+        out[...] = result
+        return out
+
+    return _sum_in_quadrature(args, out=out, scaled=scaled)
+
+
+# /def
+
+
+def _check_axis(axis: int, ndim: int) -> int:
+    """Normalize a (negative) axis index, checking it is in bounds.
+
+    Parameters
+    ----------
+    axis : int
+    ndim : int
+
+    Returns
+    -------
+    int
+        In [0, `ndim`).
+
+    Raises
+    ------
+    `~numpy.exceptions.AxisError`
+        If `axis` is out of bounds.
+
+    """
+    if not -ndim <= axis < ndim:
+        raise AxisError(axis, ndim)
+    return axis % ndim
+
+
+# /def
+
+
+def _sum_in_quadrature(
+    args: T.Sequence, out: T.Optional[np.ndarray] = None, scaled: bool = False
+) -> T.Sequence:
+    """Sum arguments in quadrature, accumulating into one output buffer.
 
-    return np.sqrt(np.sum(np.square(args), axis=axis))
+    Parameters
+    ----------
+    args : Sequence
+        The arguments, which broadcast together.
+    out : ndarray or Quantity or None, optional
+    scaled : bool, optional
+        Whether to divide by the largest magnitude before squaring.
+
+    Returns
+    -------
+    array-like
+
+    """
+    # Quantities are summed as their values, in a common unit
+    unit = None
+    if isinstance(out, Quantity):
+        unit = out.unit
+    elif any(isinstance(a, Quantity) for a in args):
+        if out is not None:
+            raise TypeError("out must be a Quantity for Quantity arguments")
+        unit = next(a.unit for a in args if isinstance(a, Quantity))
+    if unit is not None:
+        args = [
+            (a if isinstance(a, Quantity) else Quantity(a)).to_value(unit)
+            for a in args
+        ]
+        out_value = None if out is None else out.view(np.ndarray)
+    else:
+        out_value = out
+
+    dtype = np.result_type(*(np.asarray(a).dtype for a in args), np.float16)
+
+    if len(args) == 2 and dtype.kind == "f":
+        result = np.hypot(*args, out=out_value)
+    elif dtype.kind != "f":  # e.g. complex, which are not simply squared
+        result = np.sqrt(np.sum(np.square(np.broadcast_arrays(*args)), 0))
+        if out_value is not None:
+            out_value[...] = result
+            result = out_value
+    else:
+        if out_value is None:
+            out_value = np.empty(np.broadcast(*args).shape, dtype=dtype)
+        result = out_value
+        scratch = np.empty_like(result)
+
+        if scaled:
+            scale = np.empty_like(result)
+            np.absolute(args[0], out=scale)
+            for arg in args[1:]:
+                np.absolute(arg, out=scratch)
+                np.maximum(scale, scratch, out=scale)
+            # 0 / 0, and inf / inf. A non-finite argument is then the result,
+            # and the other arguments may overflow only where it is.
+            np.copyto(scale, 1, where=(scale == 0) | ~np.isfinite(scale))
+
+            result[...] = 0
+            with np.errstate(over="ignore"):
+                for arg in args:
+                    np.divide(arg, scale, out=scratch)
+                    np.square(scratch, out=scratch)
+                    np.add(result, scratch, out=result)
+            np.sqrt(result, out=result)
+            np.multiply(result, scale, out=result)
+        else:
+            np.square(args[0], out=result)
+            for arg in args[1:]:
+                np.square(arg, out=scratch)
+                np.add(result, scratch, out=result)
+            np.sqrt(result, out=result)
+
+    if out is not None:
+        return out
+    elif np.ndim(result) == 0:
+        result = result[()]
+    return result if unit is None else result << unit  # a view, if an array
 
 
 # /def
@@ -80,6 +238,73 @@ def quadrature(*args: T.Tuple[T.Sequence], axis: int = 0) -> T.Sequence:
 # Quantity Functions
 
 
+@functools.lru_cache(maxsize=128)
+def _unit_scale(from_unit: UnitBase, to_unit: UnitBase) -> float:
+    """Scale converting `from_unit` to `to_unit`, cached."""
+    return from_unit.to(to_unit)
+
+
+# /def
+
+
+@functools.lru_cache(maxsize=128)
+def _unit_power(unit: UnitBase, power: int) -> UnitBase:
+    """`unit` to the `power`, cached."""
+    return unit**power
+
+
+# /def
+
+
+def _quantity_values(
+    args: T.Any,
+) -> T.Optional[T.Tuple[np.ndarray, UnitBase]]:
+    """Stack the values of a sequence of Quantities, in a common unit.
+
+    Parameters
+    ----------
+    args : Any
+        The fast path is for a list or tuple of Quantities, with units
+        convertible to the unit of the first.
+
+    Returns
+    -------
+    values : ndarray or None
+        The stacked values, in `unit`, as floats.
+        None if `args` aren't (convertible) Quantities.
+    unit : `~astropy.units.UnitBase`
+
+    """
+    if not isinstance(args, (list, tuple)) or not args:
+        return None
+
+    unit = getattr(args[0], "unit", None)
+    values = []
+    for arg in args:
+        if not isinstance(arg, Quantity):
+            return None
+        elif arg.unit is unit or arg.unit == unit:
+            values.append(arg.value)
+        else:
+            try:
+                scale = _unit_scale(arg.unit, unit)
+            except UnitsError:  # e.g. needs equivalencies
+                return None
+            values.append(arg.value * scale)
+
+    try:
+        values = np.asarray(values)
+        if values.dtype.kind not in "fc":  # as for Quantity
+            values = values.astype(np.float64)
+    except (ValueError, TypeError):  # e.g. different shapes
+        return None
+
+    return values, unit
+
+
+# /def
+
+
 def as_quantity(arg):
     """Convert argument to a Quantity (or raise NotImplementedError).
 
@@ -95,7 +320,16 @@ def as_quantity(arg):
     NotImplementedError
         if Quantity() fails
 
+    Notes
+    -----
+    A list or tuple of Quantities is stacked as their values, converted to
+    the unit of the first with a cached scale, and the unit attached once.
+
     """
+    values = _quantity_values(arg)
+    if values is not None:
+        return values[0] << values[1]  # a view, not a copy
+
     try:
         return Quantity(arg, copy=False, subok=True)
     except Exception:
@@ -128,6 +362,10 @@ def qsquare(*args, **kw):
         if :func:`~as_quantity` fails
 
     """
+    values = None if "out" in kw else _quantity_values(args)
+    if values is not None:  # square the values, not the Quantity
+        return np.square(values[0], **kw) << _unit_power(values[1], 2)
+
     return np.square(as_quantity(args), **kw)
 
 
@@ -157,6 +395,11 @@ def qnorm(*args, **kw):
         if :func:`~as_quantity` fails
 
     """
+    # the 0-"norm" counts the non-zero values, so is dimensionless
+    values = None if kw.get("ord") == 0 else _quantity_values(args)
+    if values is not None:  # norm the values, not the Quantity
+        return norm(values[0], **kw) << values[1]
+
     return norm(as_quantity(args), **kw)
 
 
@@ -166,16 +409,57 @@ def qnorm(*args, **kw):
 # -------------------------------------------------------------------
 
 
-def qarange(start, stop, step, unit=None):
-    """:func:`~numpy.arange` for Quantities."""
+def qarange(start, stop, step, unit=None, out=None, dtype=None):
+    """:func:`~numpy.arange` for Quantities.
+
+    Parameters
+    ----------
+    start, stop, step : Quantity
+    unit : `~astropy.units.UnitBase` or None, optional
+        The unit of the range. If None, the unit of `step`, or of `out`.
+    out : ndarray or Quantity or None, optional
+        Array in which to place the values, which must have the length of
+        the range. A Quantity is filled in its own unit, and a plain array
+        with the values in `unit`, returned as a Quantity view.
+    dtype : dtype or None, optional
+        The type of the values. See :func:`~numpy.arange`.
+
+    Returns
+    -------
+    Quantity
+        The values are not copied to attach the unit.
+
+    Raises
+    ------
+    ValueError
+        If `out` has the wrong length or is a Quantity in a different unit
+        than `unit`.
+
+    See Also
+    --------
+    QuantityRange
+        A lazy range, for ranges too large to create at once.
+
+    """
+    if out is not None:
+        if isinstance(out, Quantity):
+            if unit is not None and unit != out.unit:
+                raise ValueError("unit must be None or the unit of out")
+            unit = out.unit
+        rng = QuantityRange(start, stop, step, unit=unit, dtype=out.dtype)
+        return rng.to_quantity(out=out)
+
     if unit is None:
         unit = step.unit
 
     arng = np.arange(
-        start.to_value(unit), stop.to_value(unit), step.to_value(unit)
+        start.to_value(unit),
+        stop.to_value(unit),
+        step.to_value(unit),
+        dtype=dtype,
     )
 
-    return arng * unit
+    return Quantity(arng, unit, dtype=arng.dtype, copy=False)
 
 
 # /def
@@ -184,5 +468,205 @@ def qarange(start, stop, step, unit=None):
 # -------------------------------------------------------------------
 
 
+class QuantityRange:
+    """A lazy :func:`~numpy.arange` for Quantities.
+
+    Values are only created when indexed or iterated over, one chunk at
+    a time, so very large grids can be processed without creating them.
+    The values match those of :func:`~utilipy.math.core.qarange`.
+
+    Parameters
+    ----------
+    start, stop, step : Quantity
+    unit : `~astropy.units.UnitBase` or None, optional
+        The unit of the range. If None (default), the unit of `step`.
+    dtype : dtype or None, optional
+        The type of the values. If None, the type :func:`~numpy.arange`
+        would return.
+
+    Examples
+    --------
+    >>> import astropy.units as u
+    >>> rng = QuantityRange(0 * u.m, 1 * u.km, 1 * u.cm)
+    >>> len(rng)
+    100000
+    >>> rng[-1]
+    <Quantity 99999. cm>
+    >>> rng[::25000]
+    QuantityRange(0.0 cm, 100000.0 cm, 25000.0 cm)
+    >>> for chunk in rng.chunks(40000):
+    ...     print(chunk.shape)
+    (40000,)
+    (40000,)
+    (20000,)
+
+    """
+
+    def __init__(self, start, stop, step, unit=None, dtype=None):
+        if unit is None:
+            unit = step.unit
+        start, stop, step = (x.to_value(unit) for x in (start, stop, step))
+        if step == 0:
+            raise ValueError("step cannot be zero")
+
+        self.unit = unit
+        if dtype is None:  # as np.arange, by the types, not the values
+            dtype = np.result_type(
+                *(np.asarray(x).dtype for x in (start, stop, step))
+            )
+        self.dtype = np.dtype(dtype)
+
+        # as np.arange: the i-th value is ``start + i * delta``
+        self._start = self.dtype.type(start)
+        self._delta = self.dtype.type(start + step) - self._start
+        length = int(np.ceil((stop - start) / step))
+        self._indices = range(max(length, 0))
+
+    # /def
+
+    @classmethod
+    def _from_indices(cls, base: "QuantityRange", indices: range):
+        """A range of the same values as `base`, at other indices."""
+        self = cls.__new__(cls)
+        self.unit, self.dtype = base.unit, base.dtype
+        self._start, self._delta = base._start, base._delta
+        self._indices = indices
+        return self
+
+    # /def
+
+    @property
+    def start(self) -> Quantity:
+        """The first value of the range."""
+        return self._value(self._indices.start)
+
+    # /def
+
+    @property
+    def stop(self) -> Quantity:
+        """The end of the range, exclusive."""
+        return self._value(self._indices.stop)
+
+    # /def
+
+    @property
+    def step(self) -> Quantity:
+        """The difference between successive values."""
+        return Quantity(self._delta * self._indices.step, self.unit)
+
+    # /def
+
+    def _value(self, index: int) -> Quantity:
+        """The value at (unbounded) index `index` of the base range."""
+        return Quantity(self._start + index * self._delta, self.unit)
+
+    # /def
+
+    def __len__(self) -> int:
+        """The number of values."""
+        return len(self._indices)
+
+    # /def
+
+    def __getitem__(self, key: T.Union[int, slice]):
+        """The value at an index, or a lazy range for a slice."""
+        if isinstance(key, slice):
+            return self._from_indices(self, self._indices[key])
+        return self._value(self._indices[key])
+
+    # /def
+
+    def __iter__(self) -> T.Iterator[Quantity]:
+        """Iterate over the values, which are created in chunks."""
+        for chunk in self.chunks():
+            yield from chunk
+
+    # /def
+
+    def chunks(self, size: int = 2**16) -> T.Iterator[Quantity]:
+        """Iterate over the range in chunks.
+
+        Parameters
+        ----------
+        size : int, optional
+            The number of values per chunk (default 65536).
+
+        Yields
+        ------
+        Quantity
+            The values of each chunk, at most `size`.
+
+        """
+        indices = self._indices
+        for i in range(0, len(indices), size):
+            yield self.to_quantity(indices=indices[i : i + size])
+
+    # /def
+
+    def to_quantity(self, out=None, indices: T.Optional[range] = None):
+        """Create the values.
+
+        Parameters
+        ----------
+        out : ndarray or Quantity or None, optional
+            Array in which to place the values, which must have the length of
+            the range. A Quantity is filled in its own unit, and a plain
+            array with the values in `unit`, returned as a Quantity view.
+        indices : range or None, optional
+            The indices to create, if not all.
+
+        Returns
+        -------
+        Quantity
+
+        Raises
+        ------
+        ValueError
+            If `out` has the wrong length.
+
+        """
+        if indices is None:
+            indices = self._indices
+        if out is None:
+            out = np.empty(len(indices), dtype=self.dtype)
+        elif len(out) != len(indices):
+            raise ValueError(f"out must have length {len(indices)}")
+
+        if isinstance(out, Quantity):  # in its unit
+            scale = _unit_scale(self.unit, out.unit)
+            values = out.view(np.ndarray)
+        else:
+            scale = None
+            values = out
+
+        # fill in blocks, to bound the memory of the indices
+        block = 2**16
+        for i in range(0, len(indices), block):
+            idx = indices[i : i + block]
+            view = values[i : i + len(idx)]
+            view[...] = np.arange(idx.start, idx.stop, idx.step)
+            np.multiply(view, self._delta, out=view)
+            np.add(view, self._start, out=view)
+            if scale is not None and scale != 1:
+                np.multiply(view, scale, out=view)
+
+        if isinstance(out, Quantity):
+            return out
+        return Quantity(out, self.unit, dtype=out.dtype, copy=False)
+
+    # /def
+
+    def __repr__(self) -> str:
+        """String representation."""
+        return "{}({}, {}, {})".format(
+            type(self).__name__, self.start, self.stop, self.step
+        )
+
+    # /def
+
+
+# /class
+
+
 ###############################################################################
 # END
@@ -9,13 +9,19 @@ __all__ = [
     "test_quadrature_multi_scalar_argument",
     "test_quadrature_single_vector_argument",
     "test_quadrature_multi_vector_argument",
+    "test_quadrature_out",
+    "test_quadrature_scaled",
+    "test_quadrature_quantity",
     "test_as_quantity_unchanged",
     "test_as_quantity_modifications",
     "test_as_quantity_recast",
     "test_as_quantity_exceptions",
+    "test_quantity_values",
     "test_qsquare",
     "test_qnorm",
     "test_qarange",
+    "test_qarange_out",
+    "test_quantity_range",
 ]
 
 
@@ -24,9 +30,11 @@ __all__ = [
 
 # BUILT-IN
 import os
+import warnings
 
 # THIRD PARTY
 import astropy.units as u
+from astropy.units import Quantity
 import numpy as np
 import pytest
 
@@ -38,6 +46,11 @@ from utilipy.math import core
 
 _NP_V = [int(v) for i, v in enumerate(np.__version__.split(".")) if i < 3]
 
+try:
+    from numpy.exceptions import AxisError
+except ImportError:  # NumPy < 1.25
+    AxisError = np.AxisError
+
 
 ##############################################################################
 # CODE
@@ -62,10 +75,10 @@ def test_quadrature_single_argument():
     assert core.quadrature(-2.0) == 2.0
 
     # axis argument can matter
-    with pytest.raises(np.AxisError):
+    with pytest.raises(AxisError):
         assert core.quadrature(-2.0, axis=1) == 2.0
 
-    with pytest.raises(np.AxisError):
+    with pytest.raises(AxisError):
         core.quadrature(2, axis=2)
 
 
@@ -80,7 +93,7 @@ def test_quadrature_multi_scalar_argument():
     # axis argument can matter
     assert core.quadrature(3.0, 4.0, axis=-1) == 5.0
 
-    with pytest.raises(np.AxisError):
+    with pytest.raises(AxisError):
         core.quadrature(3.0, 4.0, axis=2)
 
 
@@ -104,7 +117,7 @@ def test_quadrature_single_vector_argument():
     actual = core.quadrature(x, axis=-1)
     np.testing.assert_equal(actual, expected)
 
-    with pytest.raises(np.AxisError):
+    with pytest.raises(AxisError):
         core.quadrature(x, axis=2)
 
 
@@ -125,13 +138,100 @@ def test_quadrature_multi_vector_argument():
     expected = np.array([12.36931688, 6.40312424])
     np.testing.assert_almost_equal(actual, expected)
 
-    with pytest.raises(np.AxisError):
+    with pytest.raises(AxisError):
         core.quadrature(x, y, axis=2)
 
 
 # /def
 
 
+def test_quadrature_out():
+    """Test :class:`~utilipy.math.core.quadrature` with an output array."""
+    x, y, z = [3.0, 12.0], [4.0, 5.0], [12.0, 84.0]
+
+    out = np.empty(2)
+    assert core.quadrature(x, y, z, out=out) is out
+    np.testing.assert_equal(out, [13.0, 85.0])
+
+    # the arguments are broadcast
+    actual = core.quadrature(x, 4.0, [[0.0], [12.0]])
+    expected = np.sqrt(np.square(x) + 16.0 + np.square([[0.0], [12.0]]))
+    np.testing.assert_allclose(actual, expected)
+
+    # a single argument is summed along the axis
+    xyz = np.array([x, y, z])
+    assert core.quadrature(xyz, out=out) is out
+    np.testing.assert_equal(out, [13.0, 85.0])
+
+    # summing within each argument
+    actual = core.quadrature(x, y, axis=-1, out=out)
+    np.testing.assert_almost_equal(actual, [12.36931688, 6.40312424])
+
+    with pytest.raises(AxisError):
+        core.quadrature(2.0, axis=1, out=np.empty(()))
+
+
+# /def
+
+
+def test_quadrature_scaled():
+    """Test :class:`~utilipy.math.core.quadrature` scaled mode."""
+    big, small = 1e200, 1e-200
+
+    with np.errstate(over="ignore"):
+        assert core.quadrature(big, big, big) == np.inf
+    np.testing.assert_allclose(
+        core.quadrature(big, big, big, scaled=True), np.sqrt(3) * big
+    )
+
+    with np.errstate(under="ignore"):
+        assert core.quadrature(small, small, small) == 0
+    np.testing.assert_allclose(
+        core.quadrature(small, small, small, scaled=True), np.sqrt(3) * small
+    )
+
+    # zeros don't divide by zero
+    assert core.quadrature(0.0, 0.0, 0.0, scaled=True) == 0.0
+
+    # non-finite arguments are as without scaling
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # no inf / inf
+        assert core.quadrature(np.inf, 1.0, 2.0, scaled=True) == np.inf
+        assert core.quadrature(-np.inf, big, big, scaled=True) == np.inf
+        assert np.isnan(core.quadrature(np.nan, 1.0, 2.0, scaled=True))
+        actual = core.quadrature([np.inf, 3.0], 4.0, 0.0, scaled=True)
+    np.testing.assert_equal(actual, [np.inf, 5.0])
+
+    # a single argument
+    actual = core.quadrature([[3.0, 4.0], [4.0, 3.0]], axis=1, scaled=True)
+    np.testing.assert_equal(actual, [5.0, 5.0])
+
+
+# /def
+
+
+def test_quadrature_quantity():
+    """Test :class:`~utilipy.math.core.quadrature` with Quantities."""
+    assert core.quadrature(3 * u.m, 400 * u.cm) == 5 * u.m
+
+    actual = core.quadrature([3, 3] * u.m, 400 * u.cm, [0, 12] * u.m)
+    assert all(actual == [5, 13] * u.m)
+
+    # in the unit of the output
+    out = np.empty(2) * u.km
+    assert core.quadrature([3, 4] * u.m, [4, 3] * u.m, 0 * u.m, out=out) is out
+    assert all(out == [5, 5] * u.m)
+    assert out.unit == u.km
+
+    with pytest.raises(TypeError):
+        core.quadrature([3, 4] * u.m, [4, 3] * u.m, 0 * u.m, out=np.empty(2))
+    with pytest.raises(u.UnitConversionError):
+        core.quadrature(3 * u.m, 4 * u.s, 0 * u.m)
+
+
+# /def
+
+
 # -------------------------------------------------------------------
 # As_quantity
 
@@ -192,6 +292,54 @@ def test_as_quantity_exceptions():
 # /def
 
 
+def test_quantity_values():
+    """Test the same-unit fast path of :func:`~utilipy.math.core.as_quantity`.
+
+    Also used by :func:`~utilipy.math.core.qsquare` and
+    :func:`~utilipy.math.core.qnorm`.
+
+    """
+    x, y = [1, 2] * u.m, [300, 400] * u.cm
+
+    values, unit = core._quantity_values((x, x))
+    assert unit == u.m
+    assert values.dtype == np.float64
+    np.testing.assert_equal(values, [[1, 2], [1, 2]])
+
+    # converted with a cached scale
+    core._unit_scale.cache_clear()
+    for _ in range(2):
+        values, unit = core._quantity_values([x, y])
+        np.testing.assert_equal(values, [[1, 2], [3, 4]])
+    assert core._unit_scale.cache_info().hits == 1
+
+    # integers are floats, as for Quantity
+    values, _ = core._quantity_values([1 * u.m, 2 * u.m])
+    assert values.dtype == np.float64
+
+    # not on the fast path
+    assert core._quantity_values(x) is None
+    assert core._quantity_values([x, [1, 2]]) is None
+    assert core._quantity_values([x, 1 * u.s]) is None
+    with pytest.raises(NotImplementedError):
+        core.as_quantity([x, 1 * u.s])
+    assert core._quantity_values((1 * u.m, [1, 2, 3] * u.m)) is None
+    with pytest.raises(NotImplementedError):  # different shapes
+        core.as_quantity((1 * u.m, [1, 2, 3] * u.m))
+
+    # results are the same as without the fast path
+    assert np.all(core.as_quantity((x, y)) == Quantity((x, y)))
+    assert np.all(core.qsquare(x, y) == np.square(Quantity((x, y))))
+    assert core.qnorm(x, y) == np.linalg.norm(Quantity((x, y)))
+    assert np.all(core.qnorm(x, y, axis=0) == np.sqrt([10, 20]) * u.m)
+    # the 0-"norm" is dimensionless
+    actual = core.qnorm(3 * u.m, 0 * u.m, 4 * u.m, ord=0)
+    assert actual == 2 and actual.unit == u.dimensionless_unscaled
+
+
+# /def
+
+
 # -------------------------------------------------------------------
 
 
@@ -287,5 +435,74 @@ def test_qarange():
 # /def
 
 
+def test_qarange_out():
+    """Test :func:`~utilipy.math.core.qarange` with ``out`` and ``dtype``."""
+    start, stop, step = 1 * u.m, 10 * u.m, 0.1 * u.m
+    expected = np.arange(1, 10, 0.1) * u.m
+
+    # a plain array is filled with the values, and viewed as a Quantity
+    out = np.empty(len(expected))
+    actual = core.qarange(start, stop, step, out=out)
+    assert np.shares_memory(actual, out)
+    assert np.all(actual == expected)
+
+    # a Quantity is filled in its unit
+    out = np.empty(len(expected)) * u.cm
+    assert core.qarange(start, stop, step, out=out) is out
+    np.testing.assert_allclose(out.to_value(u.m), expected.value)
+
+    with pytest.raises(ValueError, match="unit"):
+        core.qarange(start, stop, step, unit=u.m, out=out)
+    with pytest.raises(ValueError, match="length"):
+        core.qarange(start, stop, step, out=np.empty(3))
+
+    # dtype
+    actual = core.qarange(start, stop, 1 * u.m, dtype=int)
+    assert actual.dtype == int
+    assert np.all(actual == np.arange(1, 10) * u.m)
+
+
+# /def
+
+
+def test_quantity_range():
+    """Test :class:`~utilipy.math.core.QuantityRange`."""
+    start, stop, step = 1 * u.m, 10 * u.m, 0.1 * u.m
+    expected = core.qarange(start, stop, step)
+
+    rng = core.QuantityRange(start, stop, step)
+    assert len(rng) == len(expected)
+    assert rng.unit == u.m
+    assert rng.dtype == np.float64
+    assert rng.start == expected[0]
+    assert u.allclose(rng.step, 0.1 * u.m)
+
+    # indexing and slicing
+    assert rng[5] == expected[5] and rng[-1] == expected[-1]
+    with pytest.raises(IndexError):
+        rng[len(rng)]
+    for key in (slice(None), slice(2, 50, 3), slice(None, None, -7)):
+        sliced = rng[key]
+        assert isinstance(sliced, core.QuantityRange)
+        assert np.all(sliced.to_quantity() == expected[key])
+
+    # iteration, in chunks
+    chunks = list(rng.chunks(size=40))
+    assert [len(c) for c in chunks] == [40, 40, 10]
+    assert np.all(np.concatenate(chunks) == expected)
+    assert np.all(u.Quantity(list(rng)) == expected)
+
+    # in another unit, and empty
+    rng = core.QuantityRange(start, stop, 10 * u.cm, unit=u.km)
+    np.testing.assert_allclose(rng.to_quantity().to_value(u.m), expected.value)
+    assert len(core.QuantityRange(stop, start, step)) == 0
+
+    with pytest.raises(ValueError):
+        core.QuantityRange(start, stop, 0 * u.m)
+
+
+# /def
+
+
 ##############################################################################
 # END